@@ -32,6 +32,9 @@ from pyrogram import enums
 from qbittorrentapi import Client as qbClient
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from bot.helper.ext_utils.cpu_pool import cpu_pool
+from bot.helper.ext_utils.task_registry import TaskRegistry
+
 faulthandler_enable()
 install()
 setdefaulttimeout(600)
@@ -59,6 +62,9 @@ basicConfig(handlers=[file_handler, stream_handler], level=INFO)
 
 LOGGER = getLogger(__name__)
 
+# fork the CPU workers while this process still has a single thread
+cpu_pool.start()
+
 load_dotenv("config.env", override=True)
 
 Interval = []
@@ -80,7 +86,7 @@ status_reply_dict_lock = Lock()
 queue_dict_lock = Lock()
 qb_listener_lock = Lock()
 status_reply_dict = {}
-download_dict = {}
+download_dict = TaskRegistry()
 
 BOT_TOKEN = environ.get("BOT_TOKEN", "")
 if len(BOT_TOKEN) == 0:
@@ -260,12 +266,33 @@ QUEUE_DOWNLOAD = "" if len(QUEUE_DOWNLOAD) == 0 else int(QUEUE_DOWNLOAD)
 QUEUE_UPLOAD = environ.get("QUEUE_UPLOAD", "")
 QUEUE_UPLOAD = "" if len(QUEUE_UPLOAD) == 0 else int(QUEUE_UPLOAD)
 
+LEECH_UPLOAD_WORKERS = environ.get("LEECH_UPLOAD_WORKERS", "")
+LEECH_UPLOAD_WORKERS = (
+    "" if len(LEECH_UPLOAD_WORKERS) == 0 else int(LEECH_UPLOAD_WORKERS)
+)
+
+DIRECT_DOWNLOAD_WORKERS = environ.get("DIRECT_DOWNLOAD_WORKERS", "")
+DIRECT_DOWNLOAD_WORKERS = (
+    3 if len(DIRECT_DOWNLOAD_WORKERS) == 0 else int(DIRECT_DOWNLOAD_WORKERS)
+)
+
+LEECH_STREAM = environ.get("LEECH_STREAM", "")
+LEECH_STREAM = LEECH_STREAM.lower() == "true"
+
 STOP_DUPLICATE = environ.get("STOP_DUPLICATE", "")
 STOP_DUPLICATE = STOP_DUPLICATE.lower() == "true"
 
 USE_SERVICE_ACCOUNTS = environ.get("USE_SERVICE_ACCOUNTS", "")
 USE_SERVICE_ACCOUNTS = USE_SERVICE_ACCOUNTS.lower() == "true"
 
+GDRIVE_UPLOAD_WORKERS = environ.get("GDRIVE_UPLOAD_WORKERS", "")
+GDRIVE_UPLOAD_WORKERS = (
+    "" if len(GDRIVE_UPLOAD_WORKERS) == 0 else int(GDRIVE_UPLOAD_WORKERS)
+)
+
+USE_DRIVE_INDEX = environ.get("USE_DRIVE_INDEX", "")
+USE_DRIVE_INDEX = USE_DRIVE_INDEX.lower() == "true"
+
 AS_DOCUMENT = environ.get("AS_DOCUMENT", "")
 AS_DOCUMENT = AS_DOCUMENT.lower() == "true"
 
@@ -379,6 +406,9 @@ config_dict = {
     "QUEUE_ALL": QUEUE_ALL,
     "QUEUE_DOWNLOAD": QUEUE_DOWNLOAD,
     "QUEUE_UPLOAD": QUEUE_UPLOAD,
+    "LEECH_UPLOAD_WORKERS": LEECH_UPLOAD_WORKERS,
+    "DIRECT_DOWNLOAD_WORKERS": DIRECT_DOWNLOAD_WORKERS,
+    "LEECH_STREAM": LEECH_STREAM,
     "RCLONE_FLAGS": RCLONE_FLAGS,
     "RCLONE_PATH": RCLONE_PATH,
     "SEARCH_API_LINK": SEARCH_API_LINK,
@@ -395,6 +425,8 @@ config_dict = {
     "USER_SESSION_STRING": USER_SESSION_STRING,
     "GROUPS_EMAIL": GROUPS_EMAIL,
     "USE_SERVICE_ACCOUNTS": USE_SERVICE_ACCOUNTS,
+    "GDRIVE_UPLOAD_WORKERS": GDRIVE_UPLOAD_WORKERS,
+    "USE_DRIVE_INDEX": USE_DRIVE_INDEX,
     "YT_DLP_OPTIONS": YT_DLP_OPTIONS,
 }
 
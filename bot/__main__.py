@@ -13,7 +13,11 @@ from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath
 from aiofiles.os import remove as aioremove
 from pyrogram.filters import regex, command
-from pyrogram.handlers import MessageHandler, CallbackQueryHandler
+from pyrogram.handlers import (
+    MessageHandler,
+    CallbackQueryHandler,
+    ChatMemberUpdatedHandler,
+)
 
 from bot import (
     LOGGER,
@@ -49,9 +53,11 @@ from .modules import (
     torrent_select,
     users_settings,
 )
+from .helper.ext_utils.cpu_pool import cpu_pool
 from .helper.ext_utils.bot_utils import (
     new_task,
     new_thread,
+    pool_depth,
     set_commands,
     sync_to_async,
     get_readable_time,
@@ -59,8 +65,11 @@ from .helper.ext_utils.bot_utils import (
 )
 from .helper.ext_utils.db_handler import DbManager
 from .helper.ext_utils.files_utils import clean_all, exit_clean_up, start_cleanup
+from .helper.ext_utils.http_client import http_client
+from .helper.ext_utils.aria2_client import aria2_client
 from .helper.telegram_helper.filters import CustomFilters
 from .helper.listeners.aria2_listener import start_aria2_listener
+from .helper.telegram_helper.chat_cache import chat_cache
 from .helper.telegram_helper.bot_commands import BotCommands
 from .helper.telegram_helper.button_build import ButtonMaker
 from .helper.telegram_helper.message_utils import (
@@ -71,6 +80,7 @@ from .helper.telegram_helper.message_utils import (
     one_minute_del,
     five_minute_del,
 )
+from .helper.mirror_leech_utils.rclone_utils.daemon import rclone_daemon
 
 if config_dict["GDRIVE_ID"]:
     help_string = f"""<b>NOTE: Try each command without any arguments to see more details.</b>
@@ -127,7 +137,9 @@ async def stats(_, message):
         f"<code>• RAM usage  :</code> {memory.percent}%\n"
         f"<code>• Disk usage :</code> {disk}%\n"
         f"<code>• Free space :</code> {get_readable_file_size(free)}\n"
-        f"<code>• Total space:</code> {get_readable_file_size(total)}\n\n"
+        f"<code>• Total space:</code> {get_readable_file_size(total)}\n"
+        f"<code>• IO jobs    :</code> {pool_depth['io']}\n"
+        f"<code>• CPU jobs   :</code> {pool_depth['cpu']}\n\n"
     )
 
     limitations = "<b>LIMITATIONS</b>\n\n"
@@ -141,7 +153,17 @@ async def stats(_, message):
             value = f"{v} Tasks/user"
         limitations += f"<code>• {k:<11}:</code> {value}\n"
 
-    stats = system_info + limitations
+    http_info = ""
+    if hosts := sorted(
+        http_client.stats().items(), key=lambda x: x[1].requests, reverse=True
+    )[:5]:
+        http_info = "<b>HTTP HOSTS</b>\n\n"
+        for host, host_stats in hosts:
+            avg = host_stats.elapsed / host_stats.requests
+            http_info += f"<code>• {host}:</code> {host_stats.requests} req, {host_stats.errors} err, {avg:.2f}s avg\n"
+        http_info += "\n"
+
+    stats = system_info + http_info + limitations
     reply_message = await send_message(message, stats, photo="Random")
     await delete_message(message)
     await one_minute_del(reply_message)
@@ -191,6 +213,8 @@ async def start(client, message):
         await send_message(message, start_string, photo="Random")
     else:
         await send_message(message, "You are not a authorized user!", photo="Random")
+    if message.chat.type == message.chat.type.PRIVATE:
+        chat_cache.set_pm_reachable(message.from_user.id)
     await DbManager().update_pm_users(message.from_user.id)
     return None
 
@@ -203,6 +227,10 @@ async def restart(_, message):
         if interval:
             interval[0].cancel()
     await sync_to_async(clean_all)
+    await http_client.close()
+    await aria2_client.close()
+    await rclone_daemon.shutdown()
+    cpu_pool.shutdown()
     proc1 = await create_subprocess_exec(
         "pkill", "-9", "-f", "-e", "gunicorn|xria|xnox|xtra|xone"
     )
@@ -295,13 +323,14 @@ async def restart_notification():
 
 
 async def main():
+    await http_client.start()
     await gather(
         start_cleanup(),
         torrent_search.initiate_search_tools(),
         restart_notification(),
         set_commands(bot),
     )
-    await sync_to_async(start_aria2_listener, wait=False)
+    await start_aria2_listener()
     bot.add_handler(MessageHandler(start, filters=command(BotCommands.StartCommand)))
     bot.add_handler(
         MessageHandler(
@@ -331,6 +360,7 @@ async def main():
         )
     )
     bot.add_handler(CallbackQueryHandler(aeon_callback, filters=regex(r"^aeon")))
+    bot.add_handler(ChatMemberUpdatedHandler(chat_cache.on_member_updated))
     LOGGER.info("Bot Started!")
     signal(SIGINT, exit_clean_up)
 
@@ -1,5 +1,4 @@
 import os
-import json
 from asyncio import create_subprocess_exec
 from asyncio.subprocess import PIPE
 
@@ -12,29 +11,15 @@ async def change_metadata(file, dirpath, key):
     full_file_path = os.path.join(dirpath, file)
     temp_file_path = os.path.join(dirpath, temp_file)
 
-    cmd = [
-        "ffprobe",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-print_format",
-        "json",
-        "-show_streams",
-        full_file_path,
-    ]
-    process = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-    stdout, stderr = await process.communicate()
+    # files_utils imports this module, so import the probe cache lazily
+    from bot.helper.ext_utils.files_utils import get_ffprobe  # noqa: PLC0415
 
-    if process.returncode != 0:
-        LOGGER.error(f"Error getting stream info: {stderr.decode().strip()}")
+    if (ffresult := await get_ffprobe(full_file_path)) is None:
+        LOGGER.error(f"Error getting stream info: {full_file_path}")
         return file
 
-    try:
-        streams = json.loads(stdout)["streams"]
-    except KeyError:
-        LOGGER.error(
-            f"No streams found in the ffprobe output: {stdout.decode().strip()}"
-        )
+    if (streams := ffresult.get("streams")) is None:
+        LOGGER.error(f"No streams found in the ffprobe output: {ffresult}")
         return file
 
     languages = {}
@@ -125,7 +110,7 @@ async def change_metadata(file, dirpath, key):
     cmd.append(temp_file_path)
 
     process = await create_subprocess_exec(*cmd, stderr=PIPE, stdout=PIPE)
-    stdout, stderr = await process.communicate()
+    _, stderr = await process.communicate()
 
     if process.returncode != 0:
         err = stderr.decode().strip()
@@ -170,7 +155,7 @@ async def add_attachment(file, dirpath, attachment_path):
     ]
 
     process = await create_subprocess_exec(*cmd, stderr=PIPE, stdout=PIPE)
-    stdout, stderr = await process.communicate()
+    _, stderr = await process.communicate()
 
     if process.returncode != 0:
         err = stderr.decode().strip()
@@ -0,0 +1,262 @@
+import contextlib
+from json import loads
+from base64 import b64encode
+from asyncio import Event, sleep, wait_for
+from asyncio import TimeoutError as WaitTimeoutError
+from functools import partial
+from itertools import count
+
+from aria2p import Download
+from aiohttp import WSMsgType, ClientSession
+from aiofiles import open as aiopen
+from aioshutil import rmtree as aiormtree
+from aiofiles.os import path as aiopath
+from aiofiles.os import remove as aioremove
+
+from bot import LOGGER, aria2, bot_loop
+from bot.helper.ext_utils.exceptions import Aria2RpcError
+
+RPC_URL = "ws://localhost:6800/jsonrpc"
+CALL_TIMEOUT = 30
+HEARTBEAT = 30
+RECONNECT_DELAY = 3
+WATCH_INTERVAL = 0.5
+
+
+class Aria2Client:
+    """Asyncio JSON-RPC client for aria2c over one persistent WebSocket."""
+
+    def __init__(self, url=RPC_URL, secret=""):
+        self.__url = url
+        self.__token = f"token:{secret}" if secret else None
+        self.__ids = count()
+        self.__ws = None
+        self.__runner = None
+        self.__connected = Event()
+        self.__pending = {}
+        self.__handlers = {}
+        self.__events = {}
+        self.__watchers = {}
+        self.__watch_task = None
+
+    def on(self, notification, handler):
+        self.__handlers[notification] = handler
+
+    async def start(self):
+        if self.__runner is None or self.__runner.done():
+            self.__runner = bot_loop.create_task(self.__run())
+        try:
+            await wait_for(self.__connected.wait(), CALL_TIMEOUT)
+        except WaitTimeoutError as e:
+            raise Aria2RpcError("Aria2c RPC is not reachable") from e
+
+    async def close(self):
+        if self.__runner is not None:
+            self.__runner.cancel()
+            with contextlib.suppress(BaseException):
+                await self.__runner
+        self.__runner = None
+
+    async def __run(self):
+        async with ClientSession() as session:
+            while True:
+                try:
+                    async with session.ws_connect(
+                        self.__url, heartbeat=HEARTBEAT, max_msg_size=0
+                    ) as ws:
+                        self.__ws = ws
+                        self.__connected.set()
+                        LOGGER.info("Aria2c RPC connected")
+                        async for msg in ws:
+                            if msg.type == WSMsgType.TEXT:
+                                self.__dispatch(loads(msg.data))
+                except Exception as e:
+                    LOGGER.error(f"{e}: Aria2c RPC connection")
+                self.__connected.clear()
+                self.__ws = None
+                for future in self.__pending.values():
+                    if not future.done():
+                        future.set_exception(
+                            Aria2RpcError("Aria2c RPC connection lost")
+                        )
+                self.__pending.clear()
+                await sleep(RECONNECT_DELAY)
+
+    def __dispatch(self, data):
+        if (future := self.__pending.pop(data.get("id"), None)) is not None:
+            if future.done():
+                return
+            if "error" in data:
+                future.set_exception(Aria2RpcError(data["error"]["message"]))
+            else:
+                future.set_result(data["result"])
+            return
+        notification = data.get("method")
+        for event in data.get("params", []):
+            gid = event["gid"]
+            for future in self.__events.pop(gid, []):
+                if not future.done():
+                    future.set_result(notification)
+            if (handler := self.__handlers.get(notification)) is not None:
+                bot_loop.create_task(self.__notify(handler, notification, gid))
+
+    @staticmethod
+    async def __notify(handler, notification, gid):
+        try:
+            await handler(gid)
+        except Exception as e:
+            LOGGER.error(f"{e}: Aria2c, while handling {notification} for {gid}")
+
+    @staticmethod
+    def __method(method):
+        return method if "." in method else f"aria2.{method}"
+
+    def __params(self, method, params):
+        if self.__token is None or method.startswith("system."):
+            return list(params)
+        return [self.__token, *params]
+
+    async def call(self, method, *params):
+        method = self.__method(method)
+        if not self.__connected.is_set():
+            await self.start()
+        request_id = str(next(self.__ids))
+        future = bot_loop.create_future()
+        self.__pending[request_id] = future
+        try:
+            await self.__ws.send_json(
+                {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": method,
+                    "params": self.__params(method, params),
+                }
+            )
+            return await wait_for(future, CALL_TIMEOUT)
+        except WaitTimeoutError as e:
+            raise Aria2RpcError(f"Aria2c RPC timed out on {method}") from e
+        except (AttributeError, ConnectionError) as e:
+            raise Aria2RpcError(f"Aria2c RPC is not connected: {e}") from e
+        finally:
+            self.__pending.pop(request_id, None)
+
+    async def multicall(self, *calls):
+        """Run (method, *params) calls in one round-trip, None for each fault."""
+        if not calls:
+            return []
+        results = await self.call(
+            "system.multicall",
+            [
+                {
+                    "methodName": self.__method(method),
+                    "params": self.__params(self.__method(method), params),
+                }
+                for method, *params in calls
+            ],
+        )
+        return [res[0] if isinstance(res, list) else None for res in results]
+
+    async def get_download(self, gid):
+        return Download(aria2, await self.call("tellStatus", gid))
+
+    async def get_download_options(self, gid):
+        status, options = await self.multicall(
+            ("tellStatus", gid), ("getOption", gid)
+        )
+        if status is None:
+            raise Aria2RpcError(f"GID {gid} is not found")
+        return Download(aria2, status), options or {}
+
+    async def get_downloads(self, gids):
+        structs = await self.multicall(*(("tellStatus", gid) for gid in gids))
+        return {
+            gid: Download(aria2, struct)
+            for gid, struct in zip(gids, structs)
+            if struct is not None
+        }
+
+    async def get_active(self):
+        active, waiting = await self.multicall(
+            ("tellActive",), ("tellWaiting", 0, 1000)
+        )
+        return [
+            Download(aria2, struct) for struct in [*(active or []), *(waiting or [])]
+        ]
+
+    async def add(self, link, options):
+        if link.startswith("magnet:") or not await aiopath.exists(link):
+            gid = await self.call("addUri", [link], options)
+        else:
+            async with aiopen(link, "rb") as f:
+                content = b64encode(await f.read()).decode()
+            if link.lower().endswith((".metalink", ".meta4")):
+                gid = (await self.call("addMetalink", content, options))[0]
+            else:
+                gid = await self.call("addTorrent", content, [], options)
+        return await self.get_download(gid)
+
+    async def add_uris(self, uris, options, position=None):
+        params = [uris, options] if position is None else [uris, options, position]
+        return await self.get_download(await self.call("addUri", *params))
+
+    async def remove(self, downloads, files=False):
+        gids = [download.gid for download in downloads]
+        await self.multicall(*(("forceRemove", gid) for gid in gids))
+        await self.multicall(*(("removeDownloadResult", gid) for gid in gids))
+        if not files:
+            return
+        for download in downloads:
+            for path in [*download.root_files_paths, download.control_file_path]:
+                with contextlib.suppress(Exception):
+                    if await aiopath.isdir(path):
+                        await aiormtree(path)
+                    elif await aiopath.exists(path):
+                        await aioremove(path)
+
+    def next_event(self, gid):
+        """Future resolved with the method of the next notification about gid."""
+        future = bot_loop.create_future()
+        self.__events.setdefault(gid, []).append(future)
+        future.add_done_callback(partial(self.__drop_event, gid))
+        return future
+
+    def __drop_event(self, gid, future):
+        if future in (waiters := self.__events.get(gid, [])):
+            waiters.remove(future)
+            if not waiters:
+                del self.__events[gid]
+
+    async def wait_for_status(self, gid, predicate, timeout):
+        """Resolve once predicate(download) holds; gids share one batched poll."""
+        future = bot_loop.create_future()
+        watcher = (predicate, future)
+        self.__watchers.setdefault(gid, []).append(watcher)
+        if self.__watch_task is None or self.__watch_task.done():
+            self.__watch_task = bot_loop.create_task(self.__watch())
+        try:
+            return await wait_for(future, timeout)
+        except WaitTimeoutError:
+            return None
+        finally:
+            watchers = self.__watchers.get(gid, [])
+            if watcher in watchers:
+                watchers.remove(watcher)
+                if not watchers:
+                    del self.__watchers[gid]
+
+    async def __watch(self):
+        while self.__watchers:
+            await sleep(WATCH_INTERVAL)
+            gids = list(self.__watchers)
+            try:
+                downloads = await self.get_downloads(gids)
+            except Aria2RpcError as e:
+                LOGGER.error(f"{e}: Aria2c, while watching downloads")
+                continue
+            for gid, download in downloads.items():
+                for predicate, future in self.__watchers.get(gid, []):
+                    if not future.done() and predicate(download):
+                        future.set_result(download)
+
+
+aria2_client = Aria2Client()
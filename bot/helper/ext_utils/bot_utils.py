@@ -16,7 +16,6 @@ from asyncio.subprocess import PIPE
 from concurrent.futures import ThreadPoolExecutor
 
 from psutil import disk_usage
-from aiohttp import ClientSession as aioClientSession
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath
 from aiofiles.os import mkdir
@@ -35,8 +34,10 @@ from bot import (
     download_dict_lock,
 )
 from bot.helper.aeon_utils.tinyfy import tinyfy
+from bot.helper.ext_utils.cpu_pool import cpu_pool
 from bot.helper.ext_utils.db_handler import DbManager
 from bot.helper.ext_utils.shorteners import short_url
+from bot.helper.ext_utils.http_client import http_client
 from bot.helper.ext_utils.telegraph_helper import telegraph
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.button_build import ButtonMaker
@@ -88,7 +89,7 @@ command_descriptions = {
     "ListCommand": "- Search in Drive",
     "SearchCommand": "- Search in Torrent",
     "UserSetCommand": "- User settings",
-    "StatusCommand": "- Get mirror status message",
+    "StatusCommand": "- Get mirror status message, add me or chat to filter",
     "StatsCommand": "- Check Bot & System stats",
     "StopAllCommand": "- Cancel all tasks added by you to the bot.",
     "HelpCommand": "- Get detailed help",
@@ -99,13 +100,12 @@ command_descriptions = {
 
 
 THREADPOOL = ThreadPoolExecutor(max_workers=1000)
+pool_depth = {"io": 0, "cpu": 0}
 MAGNET_REGEX = r"magnet:\?xt=urn:(btih|btmh):[a-zA-Z0-9]*\s*"
 URL_REGEX = r"^(?!\/)(rtmps?:\/\/|mms:\/\/|rtsp:\/\/|https?:\/\/|ftp:\/\/)?([^\/:]+:[^\/@]+@)?(www\.)?(?=[^\/:\s]+\.[^\/:\s]+)([^\/:\s]+\.[^\/:\s]+)(:\d+)?(\/[^#\s]*[\s\S]*)?(\?[^#\s]*)?(#.*)?$"
 SIZE_UNITS = ["B", "KB", "MB", "GB", "TB", "PB"]
-STATUS_START = 0
-PAGES = 1
-PAGE_NO = 1
 STATUS_LIMIT = 4
+status_pages = {}
 
 
 class MirrorStatus:
@@ -158,31 +158,24 @@ def get_readable_file_size(size_in_bytes: int):
 
 async def get_task_by_gid(gid):
     async with download_dict_lock:
-        return next(
-            (
-                dl
-                for dl in download_dict.values()
-                if len(gid) >= 8 and dl.gid().startswith(gid)
-            ),
-            None,
-        )
+        return download_dict.find_gid(gid)
 
 
 async def get_all_task(req_status, user_id=None):
-    dls = []
     async with download_dict_lock:
-        for dl in list(download_dict.values()):
-            if user_id and user_id != dl.message.from_user.id:
-                continue
-            status = dl.status()
-            if req_status in ["all", status]:
-                dls.append(dl)
-    return dls
+        dls = (
+            download_dict.user_tasks(user_id)
+            if user_id
+            else list(download_dict.values())
+        )
+    if req_status == "all":
+        return dls
+    return [dl for dl in dls if dl.status() == req_status]
 
 
 async def get_user_tasks(user_id, maxtask):
-    if tasks := await get_all_task("all", user_id):
-        return len(tasks) >= maxtask
+    if count := download_dict.user_count(user_id):
+        return count >= maxtask
     return None
 
 
@@ -247,25 +240,36 @@ def source(self):
     )
 
 
-def get_readable_message():
+def status_tasks(chat_id):
+    page = status_pages.setdefault(chat_id, {"no": 1, "scope": None})
+    scope = page["scope"]
+    if scope is None:
+        return list(download_dict.values())
+    if scope[0] == "user":
+        return download_dict.user_tasks(scope[1])
+    return download_dict.chat_tasks(scope[1])
+
+
+def get_readable_message(chat_id=None):
     msg = "<b>Leyon Mirror</b>\n\n"
     button = None
-    tasks = len(download_dict)
+    all_tasks = status_tasks(chat_id)
+    page = status_pages[chat_id]
+    tasks = len(all_tasks)
     current_time = get_readable_time(time() - bot_start_time)
     if config_dict["BOT_MAX_TASKS"]:
         bmax_task = f"/{config_dict['BOT_MAX_TASKS']}"
     else:
         bmax_task = ""
-    globals()["PAGES"] = (tasks + STATUS_LIMIT - 1) // STATUS_LIMIT
-    if PAGE_NO > PAGES and PAGES != 0:
-        globals()["STATUS_START"] = STATUS_LIMIT * (PAGES - 1)
-        globals()["PAGE_NO"] = PAGES
-    for download in list(download_dict.values())[
-        STATUS_START : STATUS_LIMIT + STATUS_START
-    ]:
-        msg += f"<b>{download.status()}:</b> {escape(f'{download.name()}')}\n"
+    pages = (tasks + STATUS_LIMIT - 1) // STATUS_LIMIT
+    if page["no"] > pages and pages != 0:
+        page["no"] = pages
+    start = STATUS_LIMIT * (page["no"] - 1)
+    for download in all_tasks[start : STATUS_LIMIT + start]:
+        status = download.status()
+        msg += f"<b>{status}:</b> {escape(f'{download.name()}')}\n"
         msg += f"by {source(download)}\n"
-        if download.status() not in [
+        if status not in [
             MirrorStatus.STATUS_SPLITTING,
             MirrorStatus.STATUS_SEEDING,
             MirrorStatus.STATUS_PROCESSING,
@@ -277,7 +281,7 @@ def get_readable_message():
             if hasattr(download, "seeders_num"):
                 with contextlib.suppress(Exception):
                     msg += f"\nSeeders: {download.seeders_num()} | Leechers: {download.leechers_num()}"
-        elif download.status() == MirrorStatus.STATUS_SEEDING:
+        elif status == MirrorStatus.STATUS_SEEDING:
             msg += f"<blockquote>Size: {download.size()}"
             msg += f"\nSpeed: {download.upload_speed()}"
             msg += f"\nUploaded: {download.uploaded_bytes()}"
@@ -292,7 +296,7 @@ def get_readable_message():
     if tasks > STATUS_LIMIT:
         buttons = ButtonMaker()
         buttons.callback("Prev", "status pre")
-        buttons.callback(f"{PAGE_NO}/{PAGES}", "status ref")
+        buttons.callback(f"{page['no']}/{pages}", "status ref")
         buttons.callback("Next", "status nex")
         button = buttons.column(3)
     msg += f"<b>• Tasks</b>: {tasks}{bmax_task}"
@@ -317,23 +321,19 @@ def text_to_bytes(size_text):
     return 0
 
 
-async def turn_page(data):
-    global STATUS_START, PAGE_NO  # noqa: PLW0603
+async def turn_page(data, chat_id):
     async with download_dict_lock:
+        # the status message may be gone already, do not bring its page back
+        if chat_id not in status_pages:
+            return
+        pages = max(
+            (len(status_tasks(chat_id)) + STATUS_LIMIT - 1) // STATUS_LIMIT, 1
+        )
+        page = status_pages[chat_id]
         if data[1] == "nex":
-            if PAGE_NO == PAGES:
-                STATUS_START = 0
-                PAGE_NO = 1
-            else:
-                STATUS_START += STATUS_LIMIT
-                PAGE_NO += 1
+            page["no"] = 1 if page["no"] >= pages else page["no"] + 1
         elif data[1] == "pre":
-            if PAGE_NO == 1:
-                STATUS_START = STATUS_LIMIT * (PAGES - 1)
-                PAGE_NO = PAGES
-            else:
-                STATUS_START -= STATUS_LIMIT
-                PAGE_NO -= 1
+            page["no"] = pages if page["no"] <= 1 else page["no"] - 1
 
 
 def get_readable_time(seconds, full_time=False):
@@ -438,10 +438,8 @@ def arg_parser(items, arg_base):
 
 async def get_content_type(url):
     try:
-        async with (
-            aioClientSession(trust_env=True) as session,
-            session.get(url, verify_ssl=False) as response,
-        ):
+        session = await http_client.session()
+        async with session.get(url, ssl=False) as response:
             return response.headers.get("Content-Type")
     except Exception:
         return None
@@ -466,7 +464,8 @@ async def download_image_url(url):
         await mkdir(path)
     image_name = url.split("/")[-1]
     des_dir = ospath.join(path, image_name)
-    async with aioClientSession() as session, session.get(url) as response:
+    session = await http_client.session()
+    async with session.get(url) as response:
         if response.status == 200:
             async with aiopen(des_dir, "wb") as file:
                 async for chunk in response.content.iter_chunked(1024):
@@ -496,9 +495,18 @@ def new_task(func):
     return wrapper
 
 
-async def sync_to_async(func, *args, wait=True, **kwargs):
+def __pool_done(kind, _):
+    pool_depth[kind] -= 1
+
+
+async def sync_to_async(func, *args, wait=True, kind="io", **kwargs):
     pfunc = partial(func, *args, **kwargs)
-    future = bot_loop.run_in_executor(THREADPOOL, pfunc)
+    if kind == "cpu":
+        future = bot_loop.create_task(cpu_pool.run(pfunc))
+    else:
+        future = bot_loop.run_in_executor(THREADPOOL, pfunc)
+    pool_depth[kind] += 1
+    future.add_done_callback(partial(__pool_done, kind))
     return await future if wait else future
 
 
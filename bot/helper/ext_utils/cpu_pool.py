@@ -0,0 +1,73 @@
+from os import cpu_count
+from asyncio import get_running_loop
+from hashlib import new as hashlib_new
+from logging import getLogger
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image
+from xxhash import xxh64
+
+LOGGER = getLogger(__name__)
+
+HASH_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+def hash_file(path, algorithms):
+    hashers = {
+        name: xxh64() if name == "xxh64" else hashlib_new(name)
+        for name in algorithms
+    }
+    buffer = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while size := f.readinto(buffer):
+            chunk = view[:size]
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+
+def convert_to_jpeg(src, des):
+    with Image.open(src) as img:
+        img.convert("RGB").save(des, "JPEG")
+
+
+class CpuPool:
+    """Forked workers for the CPU-bound helpers above.
+
+    This module imports nothing from the bot package, and start() runs
+    before bot/__init__ opens any thread. Workers then fork from a
+    single-threaded parent and unpickle jobs without importing the bot.
+    The pool is never forked again once the bot runs, a broken pool falls
+    back to the loop's thread executor.
+    """
+
+    def __init__(self):
+        self.__executor = None
+
+    def start(self):
+        self.__executor = ProcessPoolExecutor(
+            max_workers=cpu_count() or 1, mp_context=get_context("fork")
+        )
+        # fork executors launch every worker on the first submit
+        self.__executor.submit(int).result()
+
+    async def run(self, func):
+        if (executor := self.__executor) is not None:
+            try:
+                return await get_running_loop().run_in_executor(executor, func)
+            except BrokenProcessPool:
+                if self.__executor is executor:
+                    LOGGER.error("CPU pool broken, running CPU jobs in threads")
+                    self.__executor = None
+        return await get_running_loop().run_in_executor(None, func)
+
+    def shutdown(self):
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+
+cpu_pool = CpuPool()
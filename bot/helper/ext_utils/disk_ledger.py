@@ -0,0 +1,69 @@
+import contextlib
+from os import path as ospath
+from os import walk
+from shutil import disk_usage
+from threading import Lock
+
+DOWNLOAD_DIR = "/usr/src/app/downloads/"
+
+
+class DiskLedger:
+    def __init__(self):
+        self.__lock = Lock()
+        self.__entries = {}
+
+    @staticmethod
+    def __used(path):
+        if ospath.isfile(path):
+            return ospath.getsize(path)
+        used = 0
+        for dirpath, _, files in walk(path):
+            for file_ in files:
+                with contextlib.suppress(OSError):
+                    used += ospath.getsize(ospath.join(dirpath, file_))
+        return used
+
+    def reserve(self, uid, path, peak):
+        with self.__lock:
+            self.__entries[uid] = [path, peak, 0]
+
+    def progress(self, uid, written):
+        """Bytes the download engine reports written for uid so far."""
+        with self.__lock:
+            if (entry := self.__entries.get(uid)) is not None:
+                entry[2] = written
+
+    def extend(self, uid, size):
+        with self.__lock:
+            if (entry := self.__entries.get(uid)) is None:
+                return
+            path = entry[0]
+        # one walk per phase change, the lock is not held meanwhile
+        used = self.__used(path)
+        with self.__lock:
+            if (entry := self.__entries.get(uid)) is not None:
+                entry[1] = max(entry[1], used + size)
+                entry[2] = used
+
+    def settle(self, uid):
+        with self.__lock:
+            if entry := self.__entries.get(uid):
+                entry[1] = 0
+
+    def release(self, uid):
+        with self.__lock:
+            self.__entries.pop(uid, None)
+
+    def pending(self):
+        with self.__lock:
+            return sum(
+                max(0, peak - written)
+                for _, peak, written in self.__entries.values()
+                if peak
+            )
+
+    def available(self):
+        return disk_usage(DOWNLOAD_DIR).free - self.pending()
+
+
+disk_ledger = DiskLedger()
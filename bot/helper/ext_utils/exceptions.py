@@ -8,3 +8,11 @@ class ExtractionArchiveError(Exception):
 
 class TgLinkError(Exception):
     pass
+
+
+class RcloneRcError(Exception):
+    pass
+
+
+class Aria2RpcError(Exception):
+    pass
@@ -3,15 +3,19 @@ from os import path as ospath
 from os import walk
 from re import IGNORECASE
 from re import sub as re_sub
+from re import match as re_match
 from re import split as re_split
+from re import escape as re_escape
 from re import search as re_search
+from re import fullmatch as re_fullmatch
 from sys import exit as sexit
+from json import loads
 from time import time, gmtime, strftime
 from shlex import split as ssplit
-from shutil import rmtree, disk_usage
-from asyncio import gather, create_task, create_subprocess_exec
-from hashlib import md5
+from shutil import rmtree
+from asyncio import gather, shield, create_task, create_subprocess_exec
 from subprocess import run as srun
+from collections import OrderedDict
 from asyncio.subprocess import PIPE
 
 from magic import Magic
@@ -20,6 +24,7 @@ from aioshutil import rmtree as aiormtree
 from langcodes import Language
 from telegraph import upload_file
 from aiofiles.os import path as aiopath
+from aiofiles.os import stat as aiostat
 from aiofiles.os import mkdir, rmdir, listdir, makedirs
 from aiofiles.os import remove as aioremove
 
@@ -33,6 +38,7 @@ from bot import (
     xnox_client,
 )
 from bot.modules.mediainfo import parseinfo
+from bot.helper.ext_utils.cpu_pool import hash_file
 from bot.helper.aeon_utils.metadata import change_metadata
 from bot.helper.ext_utils.bot_utils import (
     is_mkv,
@@ -41,12 +47,21 @@ from bot.helper.ext_utils.bot_utils import (
     get_readable_time,
     get_readable_file_size,
 )
+from bot.helper.ext_utils.disk_ledger import disk_ledger
 from bot.helper.ext_utils.telegraph_helper import telegraph
 
 from .exceptions import ExtractionArchiveError
 
 FIRST_SPLIT_REGEX = r"(\.|_)part0*1\.rar$|(\.|_)7z\.0*1$|(\.|_)zip\.0*1$|^(?!.*(\.|_)part\d+\.rar$).*\.rar$"
 SPLIT_REGEX = r"\.r\d+$|\.7z\.\d+$|\.z\d+$|\.zip\.\d+$"
+FFPROBE_CACHE_SIZE = 256
+HASH_CACHE_SIZE = 1024
+HASH_ALGORITHMS = {
+    "md5_hash": "md5",
+    "sha1_hash": "sha1",
+    "sha256_hash": "sha256",
+    "xxh64_hash": "xxh64",
+}
 ARCH_EXT = [
     ".tar.bz2",
     ".tar.gz",
@@ -87,8 +102,11 @@ ARCH_EXT = [
     ".xar",
 ]
 
+ffprobe_cache = OrderedDict()
+hash_cache = OrderedDict()
 
-async def is_multi_streams(path):
+
+async def __run_ffprobe(path):
     try:
         result = await cmd_exec(
             [
@@ -98,18 +116,55 @@ async def is_multi_streams(path):
                 "error",
                 "-print_format",
                 "json",
+                "-show_format",
                 "-show_streams",
                 path,
             ]
         )
         if res := result[1]:
-            LOGGER.warning(f"Get Video Streams: {res}")
+            LOGGER.warning(f"FFprobe: {res}")
     except Exception as e:
-        LOGGER.error(f"Get Video Streams: {e}. Mostly File not found!")
+        LOGGER.error(f"FFprobe: {e}. Mostly File not found!")
+        return None
+    try:
+        return loads(result[0])
+    except ValueError:
+        LOGGER.error(f"FFprobe: {result}")
+        return None
+
+
+async def get_ffprobe(path):
+    try:
+        stat = await aiostat(path)
+    except OSError as e:
+        LOGGER.error(f"FFprobe: {e}. Mostly File not found!")
+        return None
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key in ffprobe_cache:
+        ffprobe_cache.move_to_end(key)
+        task = ffprobe_cache[key]
+    else:
+        task = create_task(__run_ffprobe(path))
+        ffprobe_cache[key] = task
+        while len(ffprobe_cache) > FFPROBE_CACHE_SIZE:
+            ffprobe_cache.popitem(last=False)
+    try:
+        result = await shield(task)
+    except BaseException:
+        if task.done() and ffprobe_cache.get(key) is task:
+            del ffprobe_cache[key]
+        raise
+    if result is None and ffprobe_cache.get(key) is task:
+        del ffprobe_cache[key]
+    return result
+
+
+async def is_multi_streams(path):
+    if (ffresult := await get_ffprobe(path)) is None:
         return False
-    fields = eval(result[0]).get("streams")
+    fields = ffresult.get("streams")
     if fields is None:
-        LOGGER.error(f"get_video_streams: {result}")
+        LOGGER.error(f"get_video_streams: {ffresult}")
         return False
     videos = 0
     audios = 0
@@ -122,29 +177,11 @@ async def is_multi_streams(path):
 
 
 async def get_media_info(path, metadata=False):
-    try:
-        result = await cmd_exec(
-            [
-                "ffprobe",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-print_format",
-                "json",
-                "-show_format",
-                "-show_streams",
-                path,
-            ]
-        )
-        if res := result[1]:
-            LOGGER.warning(f"Get Media Info: {res}")
-    except Exception as e:
-        LOGGER.error(f"Media Info: {e}. Mostly File not found!")
+    if (ffresult := await get_ffprobe(path)) is None:
         return (0, "", "", "") if metadata else (0, None, None)
-    ffresult = eval(result[0])
     fields = ffresult.get("format")
     if fields is None:
-        LOGGER.error(f"Media Info Sections: {result}")
+        LOGGER.error(f"Media Info Sections: {ffresult}")
         return (0, "", "", "") if metadata else (0, None, None)
     duration = round(float(fields.get("duration", 0)))
     if metadata:
@@ -194,27 +231,11 @@ async def get_document_type(path):
         return False, False, True
     if not mime_type.startswith("video") and not mime_type.endswith("octet-stream"):
         return is_video, is_audio, is_image
-    try:
-        result = await cmd_exec(
-            [
-                "ffprobe",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-print_format",
-                "json",
-                "-show_streams",
-                path,
-            ]
-        )
-        if res := result[1]:
-            LOGGER.warning(f"Get Document Type: {res}")
-    except Exception as e:
-        LOGGER.error(f"Get Document Type: {e}. Mostly File not found!")
+    if (ffresult := await get_ffprobe(path)) is None:
         return is_video, is_audio, is_image
-    fields = eval(result[0]).get("streams")
+    fields = ffresult.get("streams")
     if fields is None:
-        LOGGER.error(f"get_document_type: {result}")
+        LOGGER.error(f"get_document_type: {ffresult}")
         return is_video, is_audio, is_image
     for stream in fields:
         if stream.get("codec_type") == "video":
@@ -295,6 +316,115 @@ async def take_ss(video_file, duration=None, total=1, gen_ss=False):
     return (des_dir, tstamps) if gen_ss else ospath.join(des_dir, "aeon_1.jpg")
 
 
+async def __plan_segments(path, size, split_size):
+    result = await cmd_exec(
+        [
+            "ffprobe",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "packet=pts_time,pos,flags",
+            "-print_format",
+            "csv=p=0",
+            path,
+        ]
+    )
+    if result[2] != 0:
+        LOGGER.warning(f"Unable to list keyframes: {result[1]}. Path: {path}")
+        return None
+    cuts = []
+    start_pos = 0
+    last_key = None
+    for line in result[0].splitlines():
+        fields = line.split(",")
+        if len(fields) < 3 or not fields[2].startswith("K"):
+            continue
+        try:
+            pts, pos = float(fields[0]), int(fields[1])
+        except ValueError:
+            continue
+        if (
+            pos - start_pos > split_size
+            and last_key is not None
+            and last_key[1] > start_pos
+        ):
+            cuts.append(last_key[0])
+            start_pos = last_key[1]
+        last_key = (pts, pos)
+    if last_key is None:
+        return None
+    if size - start_pos > split_size and last_key[1] > start_pos:
+        cuts.append(last_key[0])
+    return cuts
+
+
+async def __segment_split(path, size, file_, dirpath, split_size, listener):
+    if (cuts := await __plan_segments(path, size, split_size)) is None:
+        return None
+    base_name, extension = ospath.splitext(file_)
+    cmd = [
+        "xtra",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        path,
+        "-map",
+        "0",
+        "-map_chapters",
+        "-1",
+        "-strict",
+        "-2",
+        "-c",
+        "copy",
+        "-f",
+        "segment",
+        "-segment_times",
+        ",".join(f"{cut:.6f}" for cut in cuts),
+        "-segment_start_number",
+        "1",
+        "-reset_timestamps",
+        "1",
+        ospath.join(dirpath, f"{base_name}.part%03d{extension}"),
+    ]
+    if (
+        listener.suproc == "cancelled"
+        or listener.suproc is not None
+        and listener.suproc.returncode == -9
+    ):
+        return False
+    listener.suproc = await create_subprocess_exec(*cmd, stderr=PIPE)
+    code = await listener.suproc.wait()
+    if code == -9:
+        return False
+    parts = [
+        ospath.join(dirpath, f"{base_name}.part{i:03}{extension}")
+        for i in range(1, len(cuts) + 2)
+    ]
+    if code == 0:
+        sizes = [
+            await aiopath.getsize(part) if await aiopath.exists(part) else 0
+            for part in parts
+        ]
+        if all(0 < p_size <= MAX_SPLIT_SIZE for p_size in sizes):
+            return True
+        LOGGER.warning(
+            f"Segmented split produced parts out of range, retrying part by part. Path: {path}"
+        )
+    else:
+        err = (await listener.suproc.stderr.read()).decode().strip()
+        LOGGER.warning(
+            f"{err}. Segmented split failed, retrying part by part. Path: {path}"
+        )
+    for part in parts:
+        with contextlib.suppress(Exception):
+            await aioremove(part)
+    return None
+
+
 async def split_file(
     path,
     size,
@@ -305,6 +435,7 @@ async def split_file(
     start_time=0,
     i=1,
     multi_streams=True,
+    segmented=True,
 ):
     if (
         listener.suproc == "cancelled"
@@ -319,6 +450,12 @@ async def split_file(
     leech_split_size = MAX_SPLIT_SIZE
     parts = -(-size // leech_split_size)
     if (await get_document_type(path))[0]:
+        if segmented:
+            res = await __segment_split(
+                path, size, file_, dirpath, split_size - 5000000, listener
+            )
+            if res is not None:
+                return res
         if multi_streams:
             multi_streams = await is_multi_streams(path)
         duration = (await get_media_info(path))[0]
@@ -381,6 +518,7 @@ async def split_file(
                         start_time,
                         i,
                         False,
+                        False,
                     )
                 LOGGER.warning(
                     f"{err}. Unable to split this video, if it's size less than {MAX_SPLIT_SIZE} will be uploaded as it is. Path: {path}"
@@ -400,6 +538,7 @@ async def split_file(
                     listener,
                     start_time,
                     i,
+                    segmented=False,
                 )
             lpd = (await get_media_info(out_path))[0]
             if lpd == 0:
@@ -513,6 +652,13 @@ async def process_file(file_, user_id, dirpath=None, is_mirror=False):
         slit[0] = re_sub(r"\{([^}]+)\}", lower_vars, slit[0])
         up_path = ospath.join(dirpath, prefile_)
         dur, qual, lang, subs = await get_media_info(up_path, True)
+        hashes = dict.fromkeys(HASH_ALGORITHMS, "")
+        if wanted := [var for var in HASH_ALGORITHMS if f"{{{var}}}" in slit[0]]:
+            digests = await get_file_hashes(
+                up_path, [HASH_ALGORITHMS[var] for var in wanted]
+            )
+            for var in wanted:
+                hashes[var] = digests.get(HASH_ALGORITHMS[var], "")
         cap_mono = slit[0].format(
             filename=nfile_,
             size=get_readable_file_size(await aiopath.getsize(up_path)),
@@ -520,7 +666,7 @@ async def process_file(file_, user_id, dirpath=None, is_mirror=False):
             quality=qual,
             languages=lang,
             subtitles=subs,
-            md5_hash=get_md5_hash(up_path),
+            **hashes,
         )
         if len(slit) > 1:
             for rep in range(1, len(slit)):
@@ -560,12 +706,28 @@ async def get_mediainfo_link(up_path):
     return f"https://graph.org/{link_id}"
 
 
-def get_md5_hash(up_path):
-    md5_hash = md5()
-    with open(up_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            md5_hash.update(byte_block)
-        return md5_hash.hexdigest()
+async def get_file_hashes(path, algorithms):
+    try:
+        stat = await aiostat(path)
+    except OSError as e:
+        LOGGER.error(f"Hashing: {e}")
+        return {}
+    key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    digests = hash_cache.get(key, {})
+    if missing := [name for name in algorithms if name not in digests]:
+        try:
+            digests = {
+                **digests,
+                **await sync_to_async(hash_file, path, missing, kind="cpu"),
+            }
+        except Exception as e:
+            LOGGER.error(f"Hashing: {e}")
+            return digests
+    hash_cache[key] = digests
+    hash_cache.move_to_end(key)
+    while len(hash_cache) > HASH_CACHE_SIZE:
+        hash_cache.popitem(last=False)
+    return digests
 
 
 def is_first_archive_split(file):
@@ -580,6 +742,24 @@ def is_archive_split(file):
     return bool(re_search(SPLIT_REGEX, file))
 
 
+def archive_span(dirpath, file_, files):
+    if match := re_match(r"(.+[._]part)0*1\.rar$", file_):
+        volume = rf"{re_escape(match[1])}\d+\.rar"
+    elif match := re_match(r"(.+)\.0*1$", file_):
+        volume = rf"{re_escape(match[1])}\.\d+"
+    elif match := re_match(r"(.+)\.rar$", file_):
+        volume = rf"{re_escape(match[1])}\.(rar|r\d+)"
+    elif match := re_match(r"(.+)\.zip$", file_):
+        volume = rf"{re_escape(match[1])}\.(zip|z\d+)"
+    else:
+        return ospath.getsize(ospath.join(dirpath, file_))
+    return sum(
+        ospath.getsize(ospath.join(dirpath, name))
+        for name in files
+        if re_fullmatch(volume, name)
+    )
+
+
 async def clean_target(path):
     if await aiopath.exists(path):
         LOGGER.info(f"Cleaning Target: {path}")
@@ -681,7 +861,7 @@ def get_mime_type(file_path):
 
 
 def check_storage_threshold(size, threshold, arch=False, alloc=False):
-    free = disk_usage("/usr/src/app/downloads/").free
+    free = disk_ledger.available()
     if not alloc:
         if (
             not arch
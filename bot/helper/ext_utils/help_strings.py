@@ -107,6 +107,9 @@ bset_display_dict = {
     "QUEUE_ALL": "Number of parallel tasks for downloads and uploads. For example, if 20 tasks are added and QUEUE_ALL is 8, then the sum of uploading and downloading tasks is 8 and the rest are in the queue. Int. NOTE: If you want to fill QUEUE_DOWNLOAD or QUEUE_UPLOAD, then the QUEUE_ALL value must be greater than or equal to the largest one and less than or equal to the sum of QUEUE_UPLOAD and QUEUE_DOWNLOAD.",
     "QUEUE_DOWNLOAD": "Number of all parallel downloading tasks. Int",
     "QUEUE_UPLOAD": "Number of all parallel uploading tasks. Int",
+    "LEECH_UPLOAD_WORKERS": "Number of files uploaded in parallel by each leech task across the bot and user clients. Default is one file at a time. Int",
+    "DIRECT_DOWNLOAD_WORKERS": "Number of files fetched in parallel by aria2 for a multi-file direct link. Default is 3. Int",
+    "LEECH_STREAM": "Upload each file of a torrent leech as soon as the engine finishes it and delete it after upload, instead of waiting for the whole download. Not used with extract, zip, join or seed. Default is False.",
     "RCLONE_FLAGS": "key:value|key|key|key:value. Check here all RcloneFlags.",
     "RCLONE_PATH": "Default rclone path to which you want to upload all the mirrors using rclone.",
     "SEARCH_API_LINK": "Search API app link. Get your API from deploying this repository. Supported sites: 1337x, Piratebay, Nyaasi, Torlock, Torrent Galaxy, Zooqle, Kickass, Bitsearch, MagnetDL, Libgen, YTS, Limetorrent, TorrentFunk, Glodls, TorrentProject, and YourBittorrent.",
@@ -119,6 +122,8 @@ bset_display_dict = {
     "UPSTREAM_BRANCH": "Upstream branch for updates. Default is main.",
     "SET_COMMANDS": "Set bot commands automatically. Bool",
     "USE_SERVICE_ACCOUNTS": "Whether to use Service Accounts or not, with google-api-python-client. For this to work see Using Service Accounts section below. Default is False",
+    "GDRIVE_UPLOAD_WORKERS": "Number of files uploaded in parallel when mirroring a folder to Google Drive. Each worker uses its own service account when USE_SERVICE_ACCOUNTS is enabled. Default is one file at a time. Int",
+    "USE_DRIVE_INDEX": "Serve STOP_DUPLICATE and /list searches from a local SQLite index of the configured drives, kept fresh with the Drive changes feed. Default is False.",
     "USER_SESSION_STRING": "To download/upload from your Telegram account. To generate a session string, use this command <code>python3 generate_string_session.py</code> after mounting the repo folder for sure.\n\n<b>NOTE:</b> You can't use the bot with private messages. Use it with superGroup.",
     "YT_DLP_OPTIONS": 'Default yt-dlp options. Check all possible options HERE or use this script to convert CLI arguments to API options. Format: key:value|key:value|key:value. Add ^ before an integer or float, some numbers must be numeric and some strings. \nExample: "format:bv*+mergeall[vcodec=none]|nocheckcertificate:True".',
 }
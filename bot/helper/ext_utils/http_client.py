@@ -0,0 +1,101 @@
+from time import time
+from threading import Lock, local
+from urllib.parse import urlparse
+
+from aiohttp import TraceConfig, TCPConnector, ClientSession, ClientTimeout
+from cloudscraper import create_scraper
+
+from bot import LOGGER
+
+CONNECTION_LIMIT = 100
+PER_HOST_LIMIT = 10
+DNS_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+REQUEST_TIMEOUT = 300
+
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+
+class HttpClient:
+    """Shared aiohttp session and per-thread scrapers with per-host metrics."""
+
+    def __init__(self):
+        self.__session = None
+        self.__local = local()
+        self.__lock = Lock()
+        self.__hosts = {}
+
+    def __record(self, host, elapsed, failed=False):
+        with self.__lock:
+            stats = self.__hosts.setdefault(host, HostStats())
+            stats.requests += 1
+            stats.errors += failed
+            stats.elapsed += elapsed
+
+    async def __on_request_start(self, _, context, __):
+        context.started = time()
+
+    async def __on_request_end(self, _, context, params):
+        failed = params.response.status >= 400
+        self.__record(params.url.host, time() - context.started, failed)
+
+    async def __on_request_exception(self, _, context, params):
+        self.__record(params.url.host, time() - context.started, True)
+
+    def __trace_config(self):
+        trace = TraceConfig()
+        trace.on_request_start.append(self.__on_request_start)
+        trace.on_request_end.append(self.__on_request_end)
+        trace.on_request_exception.append(self.__on_request_exception)
+        return trace
+
+    async def start(self):
+        if self.__session is not None and not self.__session.closed:
+            return
+        self.__session = ClientSession(
+            connector=TCPConnector(
+                limit=CONNECTION_LIMIT,
+                limit_per_host=PER_HOST_LIMIT,
+                ttl_dns_cache=DNS_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ),
+            timeout=ClientTimeout(total=REQUEST_TIMEOUT),
+            trace_configs=[self.__trace_config()],
+            trust_env=True,
+        )
+        LOGGER.info("Shared HTTP session started")
+
+    async def session(self):
+        if self.__session is None or self.__session.closed:
+            await self.start()
+        return self.__session
+
+    def scraper(self):
+        if (scraper := getattr(self.__local, "scraper", None)) is None:
+            scraper = self.__local.scraper = create_scraper()
+            scraper.hooks["response"].append(self.__scraper_hook)
+        return scraper
+
+    def __scraper_hook(self, response, *_, **__):
+        self.__record(
+            urlparse(response.url).hostname,
+            response.elapsed.total_seconds(),
+            response.status_code >= 400,
+        )
+
+    def stats(self):
+        with self.__lock:
+            return dict(self.__hosts)
+
+    async def close(self):
+        if self.__session is not None and not self.__session.closed:
+            await self.__session.close()
+        self.__session = None
+
+
+http_client = HttpClient()
@@ -4,9 +4,9 @@ from random import choice, random, randrange
 from urllib.parse import quote
 
 from urllib3 import disable_warnings
-from cloudscraper import create_scraper
 
 from bot import LOGGER, shorteners_list
+from bot.helper.ext_utils.http_client import http_client
 
 
 def short_url(longurl, attempt=0):
@@ -18,7 +18,7 @@ def short_url(longurl, attempt=0):
     _shorten_dict = shorteners_list[i]
     _shortener = _shorten_dict["domain"]
     _shortener_api = _shorten_dict["api_key"]
-    cget = create_scraper().request
+    cget = http_client.scraper().request
     disable_warnings()
     try:
         if "shorte.st" in _shortener:
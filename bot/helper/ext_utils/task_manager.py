@@ -19,7 +19,9 @@ from bot.helper.ext_utils.bot_utils import (
     get_telegraph_list,
     get_readable_file_size,
 )
+from bot.helper.ext_utils.disk_ledger import disk_ledger
 from bot.helper.ext_utils.files_utils import get_base_name, check_storage_threshold
+from bot.helper.ext_utils.task_scheduler import task_scheduler
 from bot.helper.telegram_helper.message_utils import BotPm_check, isAdmin, forcesub
 from bot.helper.mirror_leech_utils.upload_utils.gdriveTools import GoogleDriveHelper
 
@@ -51,27 +53,36 @@ async def stop_duplicate_check(name, listener):
     return False, None
 
 
-async def is_queued(uid):
+async def is_queued(listener, size=None):
     all_limit = config_dict["QUEUE_ALL"]
     dl_limit = config_dict["QUEUE_DOWNLOAD"]
     event = None
     added_to_queue = False
+    task_scheduler.register(listener, size)
     if all_limit or dl_limit:
+        free = await sync_to_async(disk_ledger.available)
         async with queue_dict_lock:
             dl = len(non_queued_dl)
             up = len(non_queued_up)
             if (
-                all_limit
-                and dl + up >= all_limit
-                and (not dl_limit or dl >= dl_limit)
-            ) or (dl_limit and dl >= dl_limit):
+                (
+                    all_limit
+                    and dl + up >= all_limit
+                    and (not dl_limit or dl >= dl_limit)
+                )
+                or (dl_limit and dl >= dl_limit)
+                or not task_scheduler.fits(listener.uid, free)
+            ):
                 added_to_queue = True
                 event = Event()
-                queued_dl[uid] = event
+                queued_dl[listener.uid] = event
+    if not added_to_queue:
+        task_scheduler.admit(listener.uid)
     return added_to_queue, event
 
 
 def start_dl_from_queued(uid):
+    task_scheduler.admit(uid)
     queued_dl[uid].set()
     del queued_dl[uid]
 
@@ -85,35 +96,29 @@ async def start_from_queued():
     if all_limit := config_dict["QUEUE_ALL"]:
         dl_limit = config_dict["QUEUE_DOWNLOAD"]
         up_limit = config_dict["QUEUE_UPLOAD"]
+        free = await sync_to_async(disk_ledger.available)
         async with queue_dict_lock:
             dl = len(non_queued_dl)
             up = len(non_queued_up)
-            all_ = dl + up
-            if all_ < all_limit:
-                f_tasks = all_limit - all_
+            f_tasks = all_limit - (dl + up)
+            if f_tasks > 0:
                 if queued_up and (not up_limit or up < up_limit):
-                    for index, uid in enumerate(list(queued_up.keys()), start=1):
-                        f_tasks = all_limit - all_
+                    slots = min(f_tasks, up_limit - up) if up_limit else f_tasks
+                    for uid in task_scheduler.select(queued_up, slots):
                         start_up_from_queued(uid)
                         f_tasks -= 1
-                        if f_tasks == 0 or (up_limit and index >= up_limit - up):
-                            break
-                if queued_dl and (not dl_limit or dl < dl_limit) and f_tasks != 0:
-                    for index, uid in enumerate(list(queued_dl.keys()), start=1):
+                if queued_dl and (not dl_limit or dl < dl_limit) and f_tasks > 0:
+                    slots = min(f_tasks, dl_limit - dl) if dl_limit else f_tasks
+                    for uid in task_scheduler.select(queued_dl, slots, free):
                         start_dl_from_queued(uid)
-                        if (dl_limit and index >= dl_limit - dl) or index == f_tasks:
-                            break
         return
 
     if up_limit := config_dict["QUEUE_UPLOAD"]:
         async with queue_dict_lock:
             up = len(non_queued_up)
             if queued_up and up < up_limit:
-                f_tasks = up_limit - up
-                for index, uid in enumerate(list(queued_up.keys()), start=1):
+                for uid in task_scheduler.select(queued_up, up_limit - up):
                     start_up_from_queued(uid)
-                    if index == f_tasks:
-                        break
     else:
         async with queue_dict_lock:
             if queued_up:
@@ -121,14 +126,12 @@ async def start_from_queued():
                     start_up_from_queued(uid)
 
     if dl_limit := config_dict["QUEUE_DOWNLOAD"]:
+        free = await sync_to_async(disk_ledger.available)
         async with queue_dict_lock:
             dl = len(non_queued_dl)
             if queued_dl and dl < dl_limit:
-                f_tasks = dl_limit - dl
-                for index, uid in enumerate(list(queued_dl.keys()), start=1):
+                for uid in task_scheduler.select(queued_dl, dl_limit - dl, free):
                     start_dl_from_queued(uid)
-                    if index == f_tasks:
-                        break
     else:
         async with queue_dict_lock:
             if queued_dl:
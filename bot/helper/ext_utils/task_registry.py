@@ -0,0 +1,113 @@
+class TaskRegistry(dict):
+    def __init__(self):
+        super().__init__()
+        self.__users = {}
+        self.__chats = {}
+        self.__gids = {}
+        self.__task_gids = {}
+        self.__unresolved = set()
+
+    @staticmethod
+    def __owner(task):
+        message = getattr(task, "message", None)
+        user = getattr(message, "from_user", None)
+        return (
+            getattr(user, "id", None),
+            getattr(getattr(message, "chat", None), "id", None),
+        )
+
+    def __index(self, uid, task):
+        user_id, chat_id = self.__owner(task)
+        self.__users.setdefault(user_id, {})[uid] = None
+        self.__chats.setdefault(chat_id, {})[uid] = None
+
+    def __unindex(self, uid, task):
+        user_id, chat_id = self.__owner(task)
+        for index, key in ((self.__users, user_id), (self.__chats, chat_id)):
+            if (uids := index.get(key)) is not None:
+                uids.pop(uid, None)
+                if not uids:
+                    del index[key]
+
+    def __resolve(self, uid, task):
+        try:
+            gid = task.gid()
+        except Exception:
+            gid = None
+        if gid:
+            self.__unresolved.discard(uid)
+            self.bind_gid(uid, gid)
+        else:
+            self.__unresolved.add(uid)
+
+    def __resolve_all(self):
+        # only tasks set or replaced since the last lookup are asked again
+        for uid in list(self.__unresolved):
+            self.__resolve(uid, self[uid])
+
+    def __setitem__(self, uid, task):
+        if (old := self.get(uid)) is not None:
+            self.__unindex(uid, old)
+        super().__setitem__(uid, task)
+        self.__index(uid, task)
+        # gid() may query the engine, so it is read on the next lookup
+        self.__unresolved.add(uid)
+
+    def __delitem__(self, uid):
+        task = self[uid]
+        super().__delitem__(uid)
+        self.__unindex(uid, task)
+        self.__unresolved.discard(uid)
+        for gid in self.__task_gids.pop(uid, ()):
+            if self.__gids.get(gid) == uid:
+                del self.__gids[gid]
+
+    def pop(self, uid, *default):
+        if uid in self:
+            task = self[uid]
+            del self[uid]
+            return task
+        return super().pop(uid, *default)
+
+    def clear(self):
+        super().clear()
+        self.__users.clear()
+        self.__chats.clear()
+        self.__gids.clear()
+        self.__task_gids.clear()
+        self.__unresolved.clear()
+
+    def user_tasks(self, user_id):
+        return [self[uid] for uid in self.__users.get(user_id, ())]
+
+    def chat_tasks(self, chat_id):
+        return [self[uid] for uid in self.__chats.get(chat_id, ())]
+
+    def user_count(self, user_id):
+        return len(self.__users.get(user_id, ()))
+
+    def chat_count(self, chat_id):
+        return len(self.__chats.get(chat_id, ()))
+
+    def bind_gid(self, uid, gid):
+        """Record gid for uid in the gid index."""
+        self.__gids[gid[:8]] = uid
+        self.__task_gids.setdefault(uid, set()).add(gid[:8])
+
+    def follow_gid(self, gid, new_gid):
+        """Hand the task of gid over to new_gid, aria2 does it for magnets."""
+        self.__resolve_all()
+        if (uid := self.__gids.get(gid[:8])) in self:
+            self.bind_gid(uid, new_gid)
+            if hasattr(task := self[uid], "follow"):
+                task.follow(new_gid)
+
+    def find_gid(self, gid):
+        if len(gid) < 8:
+            return None
+        self.__resolve_all()
+        if (uid := self.__gids.get(gid[:8])) in self:
+            task = self[uid]
+            if task.gid().startswith(gid):
+                return task
+        return None
@@ -0,0 +1,111 @@
+from itertools import count
+
+from bot import OWNER_ID, user_data, non_queued_dl, non_queued_up
+from bot.helper.ext_utils.disk_ledger import disk_ledger
+
+DISK_HEADROOM = 3 * 1024**3
+# disk charged for a torrent or magnet whose size is not known before metadata
+UNKNOWN_SIZE = DISK_HEADROOM
+OWNER, SUDO, NORMAL = range(3)
+
+
+class ScheduledTask:
+    def __init__(self, user_id, priority, path, scale, size, seq):
+        self.user_id = user_id
+        self.priority = priority
+        self.path = path
+        self.scale = scale
+        self.size = None if size is None else size * scale
+        self.seq = seq
+
+
+class TaskScheduler:
+    def __init__(self):
+        self.__tasks = {}
+        self.__seq = count()
+
+    @staticmethod
+    def __priority(user_id):
+        if user_id == OWNER_ID:
+            return OWNER
+        if user_id in user_data and user_data[user_id].get("is_sudo"):
+            return SUDO
+        return NORMAL
+
+    def register(self, listener, size=None):
+        user_id = listener.message.from_user.id
+        self.__tasks[listener.uid] = ScheduledTask(
+            user_id,
+            self.__priority(user_id),
+            listener.dir,
+            2 if listener.compress or listener.extract else 1,
+            size,
+            next(self.__seq),
+        )
+
+    def resize(self, uid, size):
+        if task := self.__tasks.get(uid):
+            task.size = size
+
+    def admit(self, uid, size=None):
+        if (task := self.__tasks.get(uid)) is None:
+            return
+        if size is not None:
+            task.size = size * task.scale
+        disk_ledger.reserve(uid, task.path, task.size or 0)
+
+    def release(self, uid):
+        self.__tasks.pop(uid, None)
+        disk_ledger.release(uid)
+
+    def __running(self):
+        running = {}
+        for uid in non_queued_dl | non_queued_up:
+            if task := self.__tasks.get(uid):
+                running[task.user_id] = running.get(task.user_id, 0) + 1
+        return running
+
+    def __key(self, uid, running):
+        if (task := self.__tasks.get(uid)) is None:
+            return (NORMAL + 1, 0, True, 0, 0)
+        # unknown sizes go after every known size of the same rank
+        return (
+            task.priority,
+            running.get(task.user_id, 0),
+            task.size is None,
+            task.size or 0,
+            task.seq,
+        )
+
+    def fits(self, uid, free):
+        return bool(self.select([uid], 1, free))
+
+    def select(self, queue, slots=None, free=None):
+        running = self.__running()
+        busy = bool(non_queued_dl)
+        pending = list(queue)
+        picked = []
+        while pending and (slots is None or len(picked) < slots):
+            pending.sort(key=lambda uid: self.__key(uid, running))
+            for uid in pending:
+                if (task := self.__tasks.get(uid)) is None:
+                    size = 0
+                elif task.size is None:
+                    size = UNKNOWN_SIZE
+                else:
+                    size = task.size
+                if free is None or not busy or free - size >= DISK_HEADROOM:
+                    break
+            else:
+                break
+            pending.remove(uid)
+            picked.append(uid)
+            if free is not None:
+                free -= size
+                busy = True
+            if task is not None:
+                running[task.user_id] = running.get(task.user_id, 0) + 1
+        return picked
+
+
+task_scheduler = TaskScheduler()
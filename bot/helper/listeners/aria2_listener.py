@@ -1,20 +1,24 @@
 import contextlib
 from time import time
-from asyncio import sleep
+from asyncio import TimeoutError as WaitTimeoutError
+from asyncio import sleep, wait_for
 
 from aiofiles.os import path as aiopath
 from aiofiles.os import remove as aioremove
 
-from bot import LOGGER, aria2, config_dict, download_dict, download_dict_lock
+from bot import LOGGER, config_dict, download_dict, download_dict_lock
 from bot.helper.ext_utils.bot_utils import (
-    new_thread,
     sync_to_async,
     get_task_by_gid,
     get_telegraph_list,
     bt_selection_buttons,
 )
+from bot.helper.ext_utils.exceptions import Aria2RpcError
 from bot.helper.ext_utils.files_utils import get_base_name, clean_unwanted
+from bot.helper.ext_utils.aria2_client import aria2_client
 from bot.helper.ext_utils.task_manager import limit_checker
+from bot.helper.ext_utils.task_scheduler import task_scheduler
+from bot.helper.listeners.direct_listener import direct_listeners
 from bot.helper.telegram_helper.message_utils import (
     delete_links,
     send_message,
@@ -24,12 +28,84 @@ from bot.helper.telegram_helper.message_utils import (
 from bot.helper.mirror_leech_utils.upload_utils.gdriveTools import GoogleDriveHelper
 from bot.helper.mirror_leech_utils.status_utils.aria2_status import Aria2Status
 
+NAME_TIMEOUT = 3
+SIZE_TIMEOUT = 15
+METADATA_TIMEOUT = 60
 
-@new_thread
-async def __on_download_started(api, gid):
-    download = await sync_to_async(api.get_download, gid)
-    if download.options.follow_torrent == "false":
+# gids whose start was already handled, aria2 fires onDownloadStart again on
+# every restart (unpause, select-file change)
+started_gids = set()
+
+
+async def __get_download(gid):
+    download, options = await aria2_client.get_download_options(gid)
+    return download, options.get("follow-torrent") != "false"
+
+
+async def __follow(gid, new_gid):
+    """Move the task of gid and its status over to new_gid."""
+    async with download_dict_lock:
+        download_dict.follow_gid(gid, new_gid)
+
+
+def __metadata_done(download):
+    return bool(
+        download.followed_by_ids
+        or download.is_complete
+        or download.is_removed
+        or download.has_failed
+    )
+
+
+async def __wait_metadata(gid):
+    waiter = aria2_client.next_event(gid)
+    download = await aria2_client.get_download(gid)
+    if __metadata_done(download):
+        waiter.cancel()
+        return
+    with contextlib.suppress(WaitTimeoutError):
+        await wait_for(waiter, METADATA_TIMEOUT)
+        return
+    # the notification is lost if the socket reconnected meanwhile, poll instead
+    with contextlib.suppress(Aria2RpcError):
+        while (
+            await aria2_client.wait_for_status(
+                gid, __metadata_done, METADATA_TIMEOUT
+            )
+            is None
+        ):
+            if __metadata_done(await aria2_client.get_download(gid)):
+                return
+
+
+async def __wait_size(gid):
+    """Follow gid changes until aria2 reports a size or SIZE_TIMEOUT passes."""
+    deadline = time() + SIZE_TIMEOUT
+    download = await aria2_client.get_download(gid)
+    while True:
+        if download.followed_by_ids:
+            download = await aria2_client.get_download(download.followed_by_ids[0])
+            continue
+        if download.total_length or (left := deadline - time()) <= 0:
+            return download
+        download = (
+            await aria2_client.wait_for_status(
+                download.gid,
+                lambda d: d.total_length > 0 or d.followed_by_ids,
+                left,
+            )
+            or download
+        )
+
+
+async def __on_download_started(gid):
+    if gid in direct_listeners:
+        return
+    download, follow = await __get_download(gid)
+    if not follow:
         return
+    if download.following_id:
+        await __follow(download.following_id, gid)
     if download.is_metadata:
         LOGGER.info(f"on_download_started: {gid} METADATA")
         await sleep(1)
@@ -38,13 +114,12 @@ async def __on_download_started(api, gid):
             if listener.select:
                 metamsg = "Downloading Metadata, wait then you can select files. Use torrent file to avoid this wait."
                 meta = await send_message(listener.message, metamsg)
-                while True:
-                    await sleep(0.5)
-                    if download.is_removed or download.followed_by_ids:
-                        await delete_message(meta)
-                        break
-                    download = download.live
+                await __wait_metadata(gid)
+                await delete_message(meta)
         return
+    if gid in started_gids:
+        return
+    started_gids.add(gid)
     LOGGER.info(f"Download Started: {download.name} - Gid: {gid}")
     dl = None
     if config_dict["STOP_DUPLICATE"]:
@@ -63,10 +138,14 @@ async def __on_download_started(api, gid):
                 and not listener.select
                 and listener.upPath == "gd"
             ):
-                download = await sync_to_async(api.get_download, gid)
+                download = await aria2_client.get_download(gid)
                 if not download.is_torrent:
-                    await sleep(3)
-                    download = download.live
+                    download = (
+                        await aria2_client.wait_for_status(
+                            gid, lambda d: d.total_length > 0, NAME_TIMEOUT
+                        )
+                        or download
+                    )
                 LOGGER.info("Checking File/Folder if already in Drive...")
                 name = download.name
                 if listener.compress:
@@ -84,9 +163,7 @@ async def __on_download_started(api, gid):
                         msg = f"File/Folder is already available in Drive.\nHere are {contents_no} list results:"
                         button = await get_telegraph_list(telegraph_content)
                         await listener.onDownloadError(msg, button)
-                        await sync_to_async(
-                            api.remove, [download], force=True, files=True
-                        )
+                        await aria2_client.remove([download], files=True)
                         await delete_links(listener.message)
                         return
     await sleep(1)
@@ -99,45 +176,38 @@ async def __on_download_started(api, gid):
             )
             return
         listener = dl.listener()
-        download = await sync_to_async(api.get_download, gid)
-        download = download.live
-        if download.total_length == 0:
-            start_time = time()
-            while time() - start_time <= 15:
-                await sleep(0.5)
-                download = await sync_to_async(api.get_download, gid)
-                download = download.live
-                if download.followed_by_ids:
-                    download = await sync_to_async(
-                        api.get_download, download.followed_by_ids[0]
-                    )
-                if download.total_length > 0:
-                    break
+        download = await __wait_size(gid)
         size = download.total_length
         if limit_exceeded := await limit_checker(
             size, listener, download.is_torrent
         ):
             await listener.onDownloadError(limit_exceeded)
-            await sync_to_async(api.remove, [download], force=True, files=True)
+            await aria2_client.remove([download], files=True)
             await delete_links(listener.message)
+        else:
+            task_scheduler.admit(listener.uid, size)
 
 
-@new_thread
-async def __on_download_complete(api, gid):
+async def __on_download_complete(gid):
+    started_gids.discard(gid)
+    if direct := direct_listeners.get(gid):
+        await direct.on_download_complete(gid)
+        return
     try:
-        download = await sync_to_async(api.get_download, gid)
-    except Exception:
+        download, follow = await __get_download(gid)
+    except Aria2RpcError:
         return
-    if download.options.follow_torrent == "false":
+    if not follow:
         return
     if download.followed_by_ids:
         new_gid = download.followed_by_ids[0]
         LOGGER.info(f"Gid changed from {gid} to {new_gid}")
+        await __follow(gid, new_gid)
         if dl := await get_task_by_gid(new_gid):
             listener = dl.listener()
             if config_dict["BASE_URL"] and listener.select:
                 if not dl.queued:
-                    await sync_to_async(api.client.force_pause, new_gid)
+                    await aria2_client.call("forcePause", new_gid)
                 s_buttons = bt_selection_buttons(new_gid)
                 msg = "Your download paused. Choose files then press Done Selecting button to start downloading."
                 await send_message(listener.message, msg, s_buttons)
@@ -152,22 +222,23 @@ async def __on_download_complete(api, gid):
             await listener.onUploadError(
                 f"Seeding stopped with Ratio: {dl.ratio()} and Time: {dl.seeding_time()}"
             )
-            await sync_to_async(api.remove, [download], force=True, files=True)
+            await aria2_client.remove([download], files=True)
     else:
         LOGGER.info(f"on_download_complete: {download.name} - Gid: {gid}")
         if dl := await get_task_by_gid(gid):
             listener = dl.listener()
             await listener.on_download_complete()
-            await sync_to_async(api.remove, [download], force=True, files=True)
+            await aria2_client.remove([download], files=True)
 
 
-@new_thread
-async def __on_bt_dl_complete(api, gid):
+async def __on_bt_dl_complete(gid):
     seed_start_time = time()
     await sleep(1)
-    download = await sync_to_async(api.get_download, gid)
-    if download.options.follow_torrent == "false":
+    download, follow = await __get_download(gid)
+    if not follow:
         return
+    if download.following_id:
+        await __follow(download.following_id, gid)
     LOGGER.info(f"onBtDownloadComplete: {download.name} - Gid: {gid}")
     if dl := await get_task_by_gid(gid):
         listener = dl.listener()
@@ -181,8 +252,8 @@ async def __on_bt_dl_complete(api, gid):
             await clean_unwanted(download.dir)
         if listener.seed:
             try:
-                await sync_to_async(
-                    api.set_options, {"max-upload-limit": "0"}, [download]
+                await aria2_client.call(
+                    "changeOption", gid, {"max-upload-limit": "0"}
                 )
             except Exception as e:
                 LOGGER.error(
@@ -190,11 +261,11 @@ async def __on_bt_dl_complete(api, gid):
                 )
         else:
             try:
-                await sync_to_async(api.client.force_pause, gid)
+                await aria2_client.call("forcePause", gid)
             except Exception as e:
                 LOGGER.error(f"{e} GID: {gid}")
         await listener.on_download_complete()
-        download = download.live
+        download = await aria2_client.get_download(gid)
         if listener.seed:
             if download.is_complete:
                 if dl := await get_task_by_gid(gid):
@@ -202,39 +273,40 @@ async def __on_bt_dl_complete(api, gid):
                     await listener.onUploadError(
                         f"Seeding stopped with Ratio: {dl.ratio()} and Time: {dl.seeding_time()}"
                     )
-                    await sync_to_async(
-                        api.remove, [download], force=True, files=True
-                    )
+                    await aria2_client.remove([download], files=True)
             else:
                 async with download_dict_lock:
                     if listener.uid not in download_dict:
-                        await sync_to_async(
-                            api.remove, [download], force=True, files=True
-                        )
+                        await aria2_client.remove([download], files=True)
                         return
-                    download_dict[listener.uid] = Aria2Status(gid, listener, True)
+                    download_dict[listener.uid] = Aria2Status(
+                        gid, listener, True, download=download
+                    )
                     download_dict[listener.uid].start_time = seed_start_time
                 LOGGER.info(f"Seeding started: {download.name} - Gid: {gid}")
                 await update_all_messages()
         else:
-            await sync_to_async(api.remove, [download], force=True, files=True)
+            await aria2_client.remove([download], files=True)
 
 
-@new_thread
-async def __on_download_stopped(_, gid):
+async def __on_download_stopped(gid):
+    started_gids.discard(gid)
     await sleep(6)
     if dl := await get_task_by_gid(gid):
         listener = dl.listener()
         await listener.onDownloadError("Dead torrent!")
 
 
-@new_thread
-async def __on_download_error(api, gid):
+async def __on_download_error(gid):
+    if direct := direct_listeners.get(gid):
+        await direct.on_download_error(gid)
+        return
+    started_gids.discard(gid)
     LOGGER.info(f"onDownloadError: {gid}")
     error = "None"
     try:
-        download = await sync_to_async(api.get_download, gid)
-        if download.options.follow_torrent == "false":
+        download, follow = await __get_download(gid)
+        if not follow:
             return
         error = download.error_message
         LOGGER.info(f"Download Error: {error}")
@@ -245,13 +317,13 @@ async def __on_download_error(api, gid):
         await listener.onDownloadError(error)
 
 
-def start_aria2_listener():
-    aria2.listen_to_notifications(
-        threaded=False,
-        on_download_start=__on_download_started,
-        on_download_error=__on_download_error,
-        on_download_stop=__on_download_stopped,
-        on_download_complete=__on_download_complete,
-        on_bt_download_complete=__on_bt_dl_complete,
-        timeout=60,
-    )
+async def start_aria2_listener():
+    aria2_client.on("aria2.onDownloadStart", __on_download_started)
+    aria2_client.on("aria2.onDownloadError", __on_download_error)
+    aria2_client.on("aria2.onDownloadStop", __on_download_stopped)
+    aria2_client.on("aria2.onDownloadComplete", __on_download_complete)
+    aria2_client.on("aria2.onBtDownloadComplete", __on_bt_dl_complete)
+    try:
+        await aria2_client.start()
+    except Aria2RpcError as e:
+        LOGGER.error(f"{e}, notifications start once it connects")
@@ -1,7 +1,12 @@
-from time import sleep
+from asyncio import Semaphore, gather
 
-from bot import LOGGER, aria2
-from bot.helper.ext_utils.bot_utils import async_to_sync, sync_to_async
+from bot import LOGGER, bot_loop, config_dict
+from bot.helper.ext_utils.aria2_client import aria2_client
+from bot.helper.mirror_leech_utils.status_utils.status_snapshot import (
+    status_snapshot,
+)
+
+direct_listeners = {}
 
 
 class DirectListener:
@@ -10,73 +15,124 @@ class DirectListener:
         self.__listener = listener
         self.__is_cancelled = False
         self.__a2c_opt = a2c_opt
-        self.task = None
+        self.__downloads = {}
+        self.__waiters = {}
         self.name = foldername
         self.total_size = total_size
         self.proc_bytes = 0
         self.failed = 0
 
+    def __live(self):
+        for gid, download in list(self.__downloads.items()):
+            if (fresh := status_snapshot.aria2(gid)) is not None:
+                self.__downloads[gid] = fresh
+            yield fresh or download
+
     @property
     def processed_bytes(self):
-        if self.task:
-            return self.proc_bytes + self.task.completed_length
-        return self.proc_bytes
+        return self.proc_bytes + sum(d.completed_length for d in self.__live())
 
     @property
     def speed(self):
-        return self.task.download_speed if self.task else 0
+        return sum(d.download_speed for d in self.__live())
+
+    @property
+    def is_waiting(self):
+        downloads = list(self.__live())
+        return bool(downloads) and all(d.is_waiting for d in downloads)
 
-    def download(self, contents):
+    async def download(self, contents):
         self.is_downloading = True
-        for content in contents:
+        limit = Semaphore(max(config_dict["DIRECT_DOWNLOAD_WORKERS"] or 1, 1))
+        await gather(*(self.__fetch(content, limit) for content in contents))
+        if self.__is_cancelled:
+            return
+        if self.failed == len(contents):
+            await self.__listener.onDownloadError(
+                "All files are failed to download!"
+            )
+            return
+        await self.__listener.on_download_complete()
+
+    async def __fetch(self, content, limit):
+        async with limit:
             if self.__is_cancelled:
-                break
-            if content["path"]:
-                self.__a2c_opt["dir"] = f"{self.__path}/{content['path']}"
-            else:
-                self.__a2c_opt["dir"] = self.__path
-            filename = content["filename"]
-            self.__a2c_opt["out"] = filename
+                return
+            options = {**self.__a2c_opt, "out": content["filename"]}
+            options["dir"] = (
+                f"{self.__path}/{content['path']}"
+                if content["path"]
+                else self.__path
+            )
             try:
-                self.task = aria2.add_uris(
-                    [content["url"]], self.__a2c_opt, position=0
+                download = await aria2_client.add_uris(
+                    [content["url"]], options, position=0
                 )
             except Exception as e:
                 self.failed += 1
-                LOGGER.error(f"Unable to download {filename} due to: {e}")
-                continue
-            self.task = self.task.live
-            while True:
-                if self.__is_cancelled:
-                    if self.task:
-                        self.task.remove(True, True)
-                    break
-                self.task = self.task.live
-                if error_message := self.task.error_message:
-                    self.failed += 1
-                    LOGGER.error(
-                        f"Unable to download {self.task.name} due to: {error_message}"
-                    )
-                    self.task.remove(True, True)
-                    break
-                if self.task.is_complete:
-                    self.proc_bytes += self.task.total_length
-                    self.task.remove(True)
-                    break
-                sleep(1)
-            self.task = None
-        if self.__is_cancelled:
+                LOGGER.error(f"Unable to download {content['filename']} due to: {e}")
+                return
+            gid = download.gid
+            waiter = bot_loop.create_future()
+            self.__downloads[gid] = download
+            self.__waiters[gid] = waiter
+            direct_listeners[gid] = self
+            try:
+                await self.__catch_up(gid)
+                await waiter
+            finally:
+                direct_listeners.pop(gid, None)
+                self.__waiters.pop(gid, None)
+                self.__downloads.pop(gid, None)
+
+    async def __catch_up(self, gid):
+        # Notifications sent before the gid was registered are lost
+        try:
+            download = await aria2_client.get_download(gid)
+        except Exception:
             return
-        if self.failed == len(contents):
-            async_to_sync(
-                self.__listener.onDownloadError, "All files are failed to download!"
-            )
+        if download.is_complete:
+            await self.on_download_complete(gid)
+        elif download.has_failed:
+            await self.on_download_error(gid)
+
+    def __claim(self, gid):
+        if (waiter := self.__waiters.pop(gid, None)) is None or waiter.done():
+            return None
+        return waiter
+
+    async def on_download_complete(self, gid):
+        if (waiter := self.__claim(gid)) is None:
             return
-        async_to_sync(self.__listener.on_download_complete)
+        try:
+            download = await aria2_client.get_download(gid)
+            self.__downloads.pop(gid, None)
+            self.proc_bytes += download.total_length
+            await aria2_client.remove([download])
+        except Exception as e:
+            LOGGER.error(f"{e}: Aria2c, while finishing direct download {gid}")
+        waiter.set_result(None)
+
+    async def on_download_error(self, gid):
+        if (waiter := self.__claim(gid)) is None:
+            return
+        self.failed += 1
+        try:
+            download = await aria2_client.get_download(gid)
+            LOGGER.error(
+                f"Unable to download {download.name} due to: {download.error_message}"
+            )
+            await aria2_client.remove([download], files=True)
+        except Exception as e:
+            LOGGER.error(f"{e}: Aria2c, while failing direct download {gid}")
+        waiter.set_result(None)
 
     async def cancel_download(self):
         self.__is_cancelled = True
         LOGGER.info(f"Cancelling Download: {self.name}")
         await self.__listener.onDownloadError("Download Cancelled by User!")
-        if self.task:
-            await sync_to_async(self.task.remove, force=True, files=True)
+        if downloads := list(self.__downloads.values()):
+            await aria2_client.remove(downloads, files=True)
+        for gid in list(self.__waiters):
+            if waiter := self.__claim(gid):
+                waiter.set_result(None)
@@ -1,6 +1,8 @@
 from time import time
 from asyncio import sleep
 
+from qbittorrentapi import TorrentDictionary
+
 from bot import (
     LOGGER,
     QbInterval,
@@ -13,17 +15,74 @@ from bot import (
     download_dict_lock,
 )
 from bot.helper.ext_utils.bot_utils import (
-    new_task,
     sync_to_async,
     get_task_by_gid,
     get_readable_time,
 )
 from bot.helper.ext_utils.files_utils import clean_unwanted
 from bot.helper.ext_utils.task_manager import limit_checker, stop_duplicate_check
+from bot.helper.ext_utils.task_scheduler import task_scheduler
 from bot.helper.telegram_helper.message_utils import update_all_messages
 from bot.helper.mirror_leech_utils.status_utils.qbit_status import QbittorrentStatus
 
 
+class QbEvent:
+    METADATA_DONE = "metadata_done"
+    STALLED = "stalled"
+    COMPLETED = "completed"
+    SEED_FINISHED = "seed_finished"
+    ERROR = "error"
+
+
+class TorrentTable:
+    def __init__(self):
+        self.rid = 0
+        self.__torrents = {}
+        self.__tags = {}
+
+    def __len__(self):
+        return len(self.__torrents)
+
+    def apply(self, maindata):
+        if maindata.get("full_update"):
+            self.__torrents.clear()
+            self.__tags.clear()
+        for hash_ in maindata.get("torrents_removed") or []:
+            if (tor := self.__torrents.pop(hash_, None)) is not None:
+                self.__tags.pop(tor.get("tags"), None)
+        for hash_, delta in (maindata.get("torrents") or {}).items():
+            tor = self.__torrents.setdefault(hash_, {"hash": hash_})
+            if "tags" in delta:
+                self.__tags.pop(tor.get("tags"), None)
+                self.__tags[delta["tags"]] = hash_
+            tor.update(delta)
+        self.rid = maindata.get("rid", 0)
+
+    def get(self, tag):
+        if (hash_ := self.__tags.get(tag)) is None:
+            return None
+        return TorrentDictionary(dict(self.__torrents[hash_]), xnox_client)
+
+
+__subscribers = {}
+
+
+def subscribe(event, callback):
+    __subscribers.setdefault(event, []).append(callback)
+
+
+async def __notify(callback, tor):
+    try:
+        await callback(tor)
+    except Exception as e:
+        LOGGER.error(f"{callback.__name__}: {e}")
+
+
+def __emit(event, tor):
+    for callback in __subscribers.get(event, []):
+        bot_loop.create_task(__notify(callback, tor))
+
+
 async def __remove_torrent(hash_, tag):
     await sync_to_async(
         xnox_client.torrents_delete, torrent_hashes=hash_, delete_files=True
@@ -34,7 +93,6 @@ async def __remove_torrent(hash_, tag):
     await sync_to_async(xnox_client.torrents_delete_tags, tags=tag)
 
 
-@new_task
 async def __on_download_error(err, tor, button=None):
     LOGGER.info(f"Cancelling Download: {tor.name}")
     ext_hash = tor.hash
@@ -46,7 +104,14 @@ async def __on_download_error(err, tor, button=None):
     await __remove_torrent(ext_hash, tor.tags)
 
 
-@new_task
+async def __on_dead_torrent(tor):
+    await __on_download_error("Dead Torrent!", tor)
+
+
+async def __on_engine_error(tor):
+    await __on_download_error("No enough space for this torrent on device", tor)
+
+
 async def __on_seed_finish(tor):
     ext_hash = tor.hash
     LOGGER.info(f"Cancelling Seed: {tor.name}")
@@ -59,8 +124,9 @@ async def __on_seed_finish(tor):
     await __remove_torrent(ext_hash, tor.tags)
 
 
-@new_task
 async def __stop_duplicate(tor):
+    if not config_dict["STOP_DUPLICATE"]:
+        return
     download = await get_task_by_gid(tor.hash[:8])
     if not hasattr(download, "listener"):
         return
@@ -68,10 +134,9 @@ async def __stop_duplicate(tor):
     name = tor.content_path.rsplit("/", 1)[-1].rsplit(".!qB", 1)[0]
     msg, button = await stop_duplicate_check(name, listener)
     if msg:
-        __on_download_error(msg, tor, button)
+        await __on_download_error(msg, tor, button)
 
 
-@new_task
 async def __size_checked(tor):
     download = await get_task_by_gid(tor.hash[:8])
     if hasattr(download, "listener"):
@@ -79,9 +144,10 @@ async def __size_checked(tor):
         size = tor.size
         if limit_exceeded := await limit_checker(size, listener, True):
             await __on_download_error(limit_exceeded, tor)
+        else:
+            task_scheduler.admit(listener.uid, size)
 
 
-@new_task
 async def __on_download_complete(tor):
     ext_hash = tor.hash
     tag = tor.tags
@@ -114,91 +180,113 @@ async def __on_download_complete(tor):
         await __remove_torrent(ext_hash, tag)
 
 
+subscribe(QbEvent.METADATA_DONE, __stop_duplicate)
+subscribe(QbEvent.METADATA_DONE, __size_checked)
+subscribe(QbEvent.STALLED, __on_dead_torrent)
+subscribe(QbEvent.ERROR, __on_engine_error)
+subscribe(QbEvent.COMPLETED, __on_download_complete)
+subscribe(QbEvent.SEED_FINISHED, __on_seed_finish)
+
+
+def __check_torrent(tor_info, state_dict, reannounce, recheck, resume):
+    state = tor_info.state
+    TORRENT_TIMEOUT = config_dict["TORRENT_TIMEOUT"]
+    if state == "metaDL":
+        state_dict["stalled_time"] = time()
+        if TORRENT_TIMEOUT and time() - tor_info.added_on >= TORRENT_TIMEOUT:
+            if not state_dict["errored"]:
+                state_dict["errored"] = True
+                __emit(QbEvent.STALLED, tor_info)
+        else:
+            reannounce.append(tor_info.hash)
+    elif state == "downloading":
+        state_dict["stalled_time"] = time()
+        if not state_dict["metadata_done"]:
+            state_dict["metadata_done"] = True
+            __emit(QbEvent.METADATA_DONE, tor_info)
+    elif state == "stalledDL":
+        if (
+            not state_dict["rechecked"]
+            and not state_dict["streaming"]
+            and 0.99989999999999999 < tor_info.progress < 1
+        ):
+            msg = f"Force recheck - Name: {tor_info.name} Hash: "
+            msg += f"{tor_info.hash} Downloaded Bytes: {tor_info.downloaded} "
+            msg += f"Size: {tor_info.size} Total Size: {tor_info.total_size}"
+            LOGGER.warning(msg)
+            recheck.append(tor_info.hash)
+            state_dict["rechecked"] = True
+        elif (
+            TORRENT_TIMEOUT
+            and time() - state_dict["stalled_time"] >= TORRENT_TIMEOUT
+        ):
+            if not state_dict["errored"]:
+                state_dict["errored"] = True
+                __emit(QbEvent.STALLED, tor_info)
+        else:
+            reannounce.append(tor_info.hash)
+    elif state in ["missingFiles", "error"] and state_dict["streaming"]:
+        # streamed files are deleted after upload, the rest is still fine
+        LOGGER.warning(f"Resuming streamed torrent: {tor_info.name} - {state}")
+        resume.append(tor_info.hash)
+    elif state == "missingFiles":
+        recheck.append(tor_info.hash)
+    elif state == "error":
+        if not state_dict["errored"]:
+            state_dict["errored"] = True
+            __emit(QbEvent.ERROR, tor_info)
+    elif (
+        tor_info.completion_on != 0
+        and not state_dict["uploaded"]
+        and state not in ["checkingUP", "checkingDL", "checkingResumeData"]
+    ):
+        state_dict["uploaded"] = True
+        __emit(QbEvent.COMPLETED, tor_info)
+    elif state in ["pausedUP", "pausedDL"] and state_dict["seeding"]:
+        state_dict["seeding"] = False
+        __emit(QbEvent.SEED_FINISHED, tor_info)
+
+
 async def __qb_listener():
+    table = TorrentTable()
     while True:
+        try:
+            table.apply(
+                await sync_to_async(xnox_client.sync_maindata, rid=table.rid)
+            )
+        except Exception as e:
+            LOGGER.error(str(e))
+            await sleep(3)
+            continue
         async with qb_listener_lock:
+            if len(table) == 0:
+                QbInterval.clear()
+                break
+            reannounce = []
+            recheck = []
+            resume = []
+            for tag, state_dict in list(QbTorrents.items()):
+                if (tor_info := table.get(tag)) is None:
+                    continue
+                try:
+                    __check_torrent(
+                        tor_info, state_dict, reannounce, recheck, resume
+                    )
+                except Exception as e:
+                    LOGGER.error(str(e))
             try:
-                if len(await sync_to_async(xnox_client.torrents_info)) == 0:
-                    QbInterval.clear()
-                    break
-                for tor_info in await sync_to_async(xnox_client.torrents_info):
-                    tag = tor_info.tags
-                    if tag not in QbTorrents:
-                        continue
-                    state = tor_info.state
-                    if state == "metaDL":
-                        TORRENT_TIMEOUT = config_dict["TORRENT_TIMEOUT"]
-                        QbTorrents[tag]["stalled_time"] = time()
-                        if (
-                            TORRENT_TIMEOUT
-                            and time() - tor_info.added_on >= TORRENT_TIMEOUT
-                        ):
-                            __on_download_error("Dead Torrent!", tor_info)
-                        else:
-                            await sync_to_async(
-                                xnox_client.torrents_reannounce,
-                                torrent_hashes=tor_info.hash,
-                            )
-                    elif state == "downloading":
-                        QbTorrents[tag]["stalled_time"] = time()
-                        if (
-                            config_dict["STOP_DUPLICATE"]
-                            and not QbTorrents[tag]["stop_dup_check"]
-                        ):
-                            QbTorrents[tag]["stop_dup_check"] = True
-                            __stop_duplicate(tor_info)
-                        if not QbTorrents[tag]["size_checked"]:
-                            QbTorrents[tag]["size_checked"] = True
-                            __size_checked(tor_info)
-                    elif state == "stalledDL":
-                        TORRENT_TIMEOUT = config_dict["TORRENT_TIMEOUT"]
-                        if (
-                            not QbTorrents[tag]["rechecked"]
-                            and 0.99989999999999999 < tor_info.progress < 1
-                        ):
-                            msg = f"Force recheck - Name: {tor_info.name} Hash: "
-                            msg += f"{tor_info.hash} Downloaded Bytes: {tor_info.downloaded} "
-                            msg += f"Size: {tor_info.size} Total Size: {tor_info.total_size}"
-                            LOGGER.warning(msg)
-                            await sync_to_async(
-                                xnox_client.torrents_recheck,
-                                torrent_hashes=tor_info.hash,
-                            )
-                            QbTorrents[tag]["rechecked"] = True
-                        elif (
-                            TORRENT_TIMEOUT
-                            and time() - QbTorrents[tag]["stalled_time"]
-                            >= TORRENT_TIMEOUT
-                        ):
-                            __on_download_error("Dead Torrent!", tor_info)
-                        else:
-                            await sync_to_async(
-                                xnox_client.torrents_reannounce,
-                                torrent_hashes=tor_info.hash,
-                            )
-                    elif state == "missingFiles":
-                        await sync_to_async(
-                            xnox_client.torrents_recheck,
-                            torrent_hashes=tor_info.hash,
-                        )
-                    elif state == "error":
-                        __on_download_error(
-                            "No enough space for this torrent on device", tor_info
-                        )
-                    elif (
-                        tor_info.completion_on != 0
-                        and not QbTorrents[tag]["uploaded"]
-                        and state
-                        not in ["checkingUP", "checkingDL", "checkingResumeData"]
-                    ):
-                        QbTorrents[tag]["uploaded"] = True
-                        __on_download_complete(tor_info)
-                    elif (
-                        state in ["pausedUP", "pausedDL"]
-                        and QbTorrents[tag]["seeding"]
-                    ):
-                        QbTorrents[tag]["seeding"] = False
-                        __on_seed_finish(tor_info)
+                if reannounce:
+                    await sync_to_async(
+                        xnox_client.torrents_reannounce, torrent_hashes=reannounce
+                    )
+                if recheck:
+                    await sync_to_async(
+                        xnox_client.torrents_recheck, torrent_hashes=recheck
+                    )
+                if resume:
+                    await sync_to_async(
+                        xnox_client.torrents_resume, torrent_hashes=resume
+                    )
             except Exception as e:
                 LOGGER.error(str(e))
         await sleep(3)
@@ -208,11 +296,12 @@ async def on_download_start(tag):
     async with qb_listener_lock:
         QbTorrents[tag] = {
             "stalled_time": time(),
-            "stop_dup_check": False,
+            "metadata_done": False,
             "rechecked": False,
             "uploaded": False,
             "seeding": False,
-            "size_checked": False,
+            "errored": False,
+            "streaming": False,
         }
         if not QbInterval:
             periodic = bot_loop.create_task(__qb_listener())
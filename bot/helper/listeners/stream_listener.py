@@ -0,0 +1,241 @@
+import contextlib
+from os import path as ospath
+from os import walk
+from asyncio import Event, Queue, wait_for
+from asyncio import TimeoutError as WaitTimeoutError
+
+from natsort import natsorted
+from aiofiles.os import path as aiopath
+from aiofiles.os import remove as aioremove
+from aiofiles.os import listdir
+
+from bot import (
+    LOGGER,
+    MAX_SPLIT_SIZE,
+    IS_PREMIUM_USER,
+    QbTorrents,
+    bot_loop,
+    config_dict,
+    xnox_client,
+    download_dict,
+    qb_listener_lock,
+    download_dict_lock,
+)
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.disk_ledger import disk_ledger
+from bot.helper.ext_utils.files_utils import split_file
+from bot.helper.ext_utils.aria2_client import aria2_client
+from bot.helper.mirror_leech_utils.status_utils.qbit_status import QbittorrentStatus
+from bot.helper.mirror_leech_utils.status_utils.aria2_status import Aria2Status
+from bot.helper.mirror_leech_utils.upload_utils.telegramEngine import TgUploader
+from bot.helper.mirror_leech_utils.status_utils.telegram_status import TelegramStatus
+
+STREAM_POLL_INTERVAL = 5
+
+
+class StreamLeech:
+    def __init__(self, listener):
+        self.__listener = listener
+        self.__queue = Queue()
+        self.__handed = set()
+        self.__released = set()
+        self.__size = 0
+        self.__finished = Event()
+        self.__is_cancelled = False
+        self.__uploader = TgUploader(None, listener.dir, listener)
+        self.__poller = None
+        self.__upload_task = None
+
+    @staticmethod
+    def is_supported(listener):
+        if (
+            not config_dict["LEECH_STREAM"]
+            or not listener.is_leech
+            or listener.compress
+            or listener.extract
+            or listener.join
+            or listener.seed
+            or listener.same_dir
+        ):
+            return False
+        if (
+            IS_PREMIUM_USER
+            and not listener.isSuperGroup
+            and not config_dict["LEECH_DUMP_ID"]
+        ):
+            return False
+        return isinstance(
+            download_dict.get(listener.uid), (QbittorrentStatus, Aria2Status)
+        )
+
+    def start(self):
+        LOGGER.info(f"Streaming leech started for task: {self.__listener.uid}")
+        self.__upload_task = bot_loop.create_task(
+            self.__uploader.stream(self.__queue, self.__release)
+        )
+        self.__poller = bot_loop.create_task(self.__poll())
+
+    async def __poll(self):
+        async with qb_listener_lock:
+            if (state := QbTorrents.get(f"{self.__listener.uid}")) is not None:
+                state["streaming"] = True
+        while not self.__finished.is_set():
+            try:
+                files = await self.__files()
+                await self.__hand_over(
+                    [path for path, _, _, wanted, done in files if wanted and done]
+                )
+                await self.__purge(files)
+            except Exception as e:
+                LOGGER.error(f"{e}: Streaming leech, while checking completed files")
+            with contextlib.suppress(WaitTimeoutError):
+                await wait_for(self.__finished.wait(), STREAM_POLL_INTERVAL)
+
+    async def __files(self):
+        """(path, file id, piece range, wanted, finished) for each torrent file."""
+        download = download_dict.get(self.__listener.uid)
+        if isinstance(download, QbittorrentStatus):
+            ext_hash = await sync_to_async(download.hash)
+            files = await sync_to_async(
+                xnox_client.torrents_files, torrent_hash=ext_hash
+            )
+            return [
+                (
+                    ospath.join(self.__listener.dir, file_.name),
+                    file_.id,
+                    tuple(file_.piece_range),
+                    bool(file_.priority),
+                    file_.progress == 1,
+                )
+                for file_ in files
+            ]
+        if isinstance(download, Aria2Status):
+            gid = await sync_to_async(download.gid)
+            download = await aria2_client.get_download(gid)
+            piece = download.piece_length or 1
+            files, offset = [], 0
+            for file_ in download.files:
+                end = offset + max(file_.length, 1) - 1
+                if not str(file_.path).startswith("[METADATA]"):
+                    files.append(
+                        (
+                            str(file_.path),
+                            file_.index,
+                            (offset // piece, end // piece),
+                            file_.selected,
+                            bool(file_.length)
+                            and file_.completed_length == file_.length,
+                        )
+                    )
+                offset += file_.length
+            return files
+        return []
+
+    async def __deselect(self, file_id):
+        download = download_dict.get(self.__listener.uid)
+        # aria2 restarts the download on any select-file change, so its released
+        # files are only removed from disk by __purge
+        if isinstance(download, QbittorrentStatus):
+            await sync_to_async(
+                xnox_client.torrents_file_priority,
+                torrent_hash=await sync_to_async(download.hash),
+                file_ids=[file_id],
+                priority=0,
+            )
+
+    async def __purge(self, files):
+        """Delete released files once no unfinished file shares a piece with them."""
+        pending = [
+            piece_range
+            for _, _, piece_range, wanted, done in files
+            if wanted and not done
+        ]
+        for path, _, (first, last), _, _ in files:
+            if path not in self.__released or any(
+                low <= piece <= high
+                for low, high in pending
+                for piece in (first, last)
+            ):
+                continue
+            self.__released.discard(path)
+            with contextlib.suppress(FileNotFoundError):
+                await aioremove(path)
+
+    async def __release(self, path):
+        """Take path out of the download before deleting it."""
+        try:
+            files = await self.__files()
+        except Exception as e:
+            LOGGER.error(f"{e}: Streaming leech, while releasing {path}")
+            files = []
+        if (file_id := next((f[1] for f in files if f[0] == path), None)) is None:
+            if await aiopath.exists(path):
+                await aioremove(path)
+            return
+        self.__released.add(path)
+        await self.__deselect(file_id)
+        await self.__purge(await self.__files())
+
+    async def __hand_over(self, paths):
+        for path in paths:
+            if self.__is_cancelled:
+                return
+            if path in self.__handed or not await aiopath.isfile(path):
+                continue
+            self.__handed.add(path)
+            f_size = await aiopath.getsize(path)
+            self.__size += f_size
+            if f_size <= MAX_SPLIT_SIZE:
+                await self.__queue.put(path)
+                continue
+            dirpath, file_ = ospath.split(path)
+            base_name = ospath.splitext(file_)[0]
+            existing = set(await listdir(dirpath))
+            LOGGER.info(f"Splitting: {file_}")
+            await sync_to_async(disk_ledger.extend, self.__listener.uid, f_size)
+            res = await split_file(
+                path, f_size, file_, dirpath, MAX_SPLIT_SIZE, self.__listener
+            )
+            if not res:
+                return
+            await self.__release(path)
+            if res == "errored":
+                continue
+            for part in sorted(
+                name
+                for name in set(await listdir(dirpath)) - existing
+                if name.startswith((f"{base_name}.part", f"{file_}."))
+            ):
+                part_path = ospath.join(dirpath, part)
+                self.__handed.add(part_path)
+                await self.__queue.put(part_path)
+
+    async def finish(self, name, gid):
+        self.__finished.set()
+        await self.__poller
+        remaining = [
+            ospath.join(dirpath, file_)
+            for dirpath, _, files in sorted(
+                await sync_to_async(walk, self.__listener.dir)
+            )
+            for file_ in natsorted(files)
+            if not file_.endswith((".aria2", ".!qB"))
+        ]
+        await self.__hand_over(remaining)
+        self.__uploader.name = name
+        async with download_dict_lock:
+            download_dict[self.__listener.uid] = TelegramStatus(
+                self.__uploader, self.__size, self.__listener.message, gid, "up"
+            )
+        await self.__queue.put(None)
+        await self.__upload_task
+        for path in self.__released:
+            with contextlib.suppress(FileNotFoundError):
+                await aioremove(path)
+        self.__released.clear()
+
+    def cancel(self):
+        self.__is_cancelled = True
+        self.__finished.set()
+        self.__uploader.stop()
+        self.__queue.put_nowait(None)
@@ -3,6 +3,7 @@ from os import walk
 from html import escape
 from time import time
 from asyncio import Event, sleep, create_subprocess_exec
+from asyncio.subprocess import PIPE
 
 from requests import utils as rutils
 from aioshutil import move
@@ -16,7 +17,6 @@ from bot import (
     MAX_SPLIT_SIZE,
     GLOBAL_EXTENSION_FILTER,
     Interval,
-    aria2,
     queued_dl,
     queued_up,
     config_dict,
@@ -34,10 +34,12 @@ from bot.helper.ext_utils.bot_utils import (
     get_readable_file_size,
 )
 from bot.helper.ext_utils.exceptions import ExtractionArchiveError
+from bot.helper.ext_utils.disk_ledger import disk_ledger
 from bot.helper.ext_utils.files_utils import (
     is_archive,
     join_files,
     split_file,
+    archive_span,
     clean_target,
     process_file,
     get_base_name,
@@ -46,7 +48,11 @@ from bot.helper.ext_utils.files_utils import (
     is_archive_split,
     is_first_archive_split,
 )
+from bot.helper.ext_utils.aria2_client import aria2_client
 from bot.helper.ext_utils.task_manager import start_from_queued
+from bot.helper.ext_utils.task_scheduler import task_scheduler
+from bot.helper.listeners.stream_listener import StreamLeech
+from bot.helper.telegram_helper.chat_cache import chat_cache
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.message_utils import (
     delete_links,
@@ -69,6 +75,9 @@ from bot.helper.mirror_leech_utils.status_utils.rclone_status import RcloneStatu
 from bot.helper.mirror_leech_utils.status_utils.extract_status import ExtractStatus
 from bot.helper.mirror_leech_utils.upload_utils.telegramEngine import TgUploader
 from bot.helper.mirror_leech_utils.status_utils.telegram_status import TelegramStatus
+from bot.helper.mirror_leech_utils.status_utils.archive_progress import (
+    ArchiveProgress,
+)
 
 
 class MirrorLeechListener:
@@ -124,6 +133,7 @@ class MirrorLeechListener:
         self.index_link = index_link
         self.files_utils = files_utils
         self.attachment = attachment
+        self.streamer = None
 
     async def clean(self):
         try:
@@ -131,7 +141,7 @@ class MirrorLeechListener:
                 if Interval:
                     Interval[0].cancel()
                     Interval.clear()
-            await sync_to_async(aria2.purge)
+            await aria2_client.call("purgeDownloadResult")
             await delete_all_messages()
         except Exception:
             pass
@@ -145,6 +155,19 @@ class MirrorLeechListener:
         self.botpmmsg = await sendCustomMsg(
             self.message.from_user.id, "<b>Task started</b>"
         )
+        chat_cache.set_pm_reachable(
+            self.message.from_user.id, not isinstance(self.botpmmsg, str)
+        )
+        if self.streamer is None and StreamLeech.is_supported(self):
+            self.streamer = StreamLeech(self)
+            self.streamer.start()
+
+    async def __run_7z(self, cmd, progress):
+        self.suproc = await create_subprocess_exec(
+            cmd[0], "-bso0", "-bsp1", *cmd[1:], stdout=PIPE
+        )
+        await progress.follow(self.suproc.stdout)
+        return await self.suproc.wait()
 
     async def on_download_complete(self):
         multi_links = False
@@ -202,11 +225,18 @@ class MirrorLeechListener:
         dl_path = f"{self.dir}/{name}"
         up_path = ""
         size = await get_path_size(dl_path)
+        disk_ledger.settle(self.uid)
         async with queue_dict_lock:
             if self.uid in non_queued_dl:
                 non_queued_dl.remove(self.uid)
         await start_from_queued()
 
+        if self.streamer:
+            async with queue_dict_lock:
+                non_queued_up.add(self.uid)
+            await self.streamer.finish(name, gid)
+            return
+
         if self.join and await aiopath.isdir(dl_path):
             await join_files(dl_path)
 
@@ -216,8 +246,12 @@ class MirrorLeechListener:
                 if await aiopath.isfile(dl_path):
                     up_path = get_base_name(dl_path)
                 LOGGER.info(f"Extracting: {name}")
+                progress = ArchiveProgress(size)
+                await sync_to_async(disk_ledger.extend, self.uid, size)
                 async with download_dict_lock:
-                    download_dict[self.uid] = ExtractStatus(name, size, gid, self)
+                    download_dict[self.uid] = ExtractStatus(
+                        name, size, gid, self, progress
+                    )
                 if await aiopath.isdir(dl_path):
                     if self.seed:
                         self.newDir = f"{self.dir}10000"
@@ -256,8 +290,12 @@ class MirrorLeechListener:
                                     and self.suproc.returncode == -9
                                 ):
                                     return
-                                self.suproc = await create_subprocess_exec(*cmd)
-                                code = await self.suproc.wait()
+                                progress.begin(
+                                    await sync_to_async(
+                                        archive_span, dirpath, file_, files
+                                    )
+                                )
+                                code = await self.__run_7z(cmd, progress)
                                 if code == -9:
                                     return
                                 if code != 0:
@@ -291,8 +329,8 @@ class MirrorLeechListener:
                         del cmd[2]
                     if self.suproc == "cancelled":
                         return
-                    self.suproc = await create_subprocess_exec(*cmd)
-                    code = await self.suproc.wait()
+                    progress.begin(size)
+                    code = await self.__run_7z(cmd, progress)
                     if code == -9:
                         return
                     if code == 0:
@@ -321,8 +359,11 @@ class MirrorLeechListener:
                 up_path = f"{self.newDir}/{name}.zip"
             else:
                 up_path = f"{dl_path}.zip"
+            progress = ArchiveProgress(size)
+            progress.begin(size)
             async with download_dict_lock:
-                download_dict[self.uid] = ZipStatus(name, size, gid, self)
+                download_dict[self.uid] = ZipStatus(name, size, gid, self, progress)
+            await sync_to_async(disk_ledger.extend, self.uid, size)
             LEECH_SPLIT_SIZE = MAX_SPLIT_SIZE
             cmd = [
                 "7z",
@@ -347,8 +388,7 @@ class MirrorLeechListener:
                 LOGGER.info(f"Zip: orig_path: {dl_path}, zip_path: {up_path}")
             if self.suproc == "cancelled":
                 return
-            self.suproc = await create_subprocess_exec(*cmd)
-            code = await self.suproc.wait()
+            code = await self.__run_7z(cmd, progress)
             if code == -9:
                 return
             if not self.seed:
@@ -379,6 +419,7 @@ class MirrorLeechListener:
                                         up_name, size, gid, self
                                     )
                                 LOGGER.info(f"Splitting: {up_name}")
+                            await sync_to_async(disk_ledger.extend, self.uid, f_size)
                             res = await split_file(
                                 f_path,
                                 f_size,
@@ -408,6 +449,8 @@ class MirrorLeechListener:
         up_limit = config_dict["QUEUE_UPLOAD"]
         all_limit = config_dict["QUEUE_ALL"]
         added_to_queue = False
+        disk_ledger.settle(self.uid)
+        task_scheduler.resize(self.uid, size)
         async with queue_dict_lock:
             dl = len(non_queued_dl)
             up = len(non_queued_up)
@@ -523,6 +566,7 @@ class MirrorLeechListener:
                 async with queue_dict_lock:
                     if self.uid in non_queued_up:
                         non_queued_up.remove(self.uid)
+                    task_scheduler.release(self.uid)
                 await start_from_queued()
                 return
         else:
@@ -571,6 +615,7 @@ class MirrorLeechListener:
                 async with queue_dict_lock:
                     if self.uid in non_queued_up:
                         non_queued_up.remove(self.uid)
+                    task_scheduler.release(self.uid)
                 await start_from_queued()
                 return
 
@@ -587,11 +632,14 @@ class MirrorLeechListener:
         async with queue_dict_lock:
             if self.uid in non_queued_up:
                 non_queued_up.remove(self.uid)
+            task_scheduler.release(self.uid)
 
         await start_from_queued()
         await delete_links(self.message)
 
     async def onDownloadError(self, error, button=None):
+        if self.streamer:
+            self.streamer.cancel()
         async with download_dict_lock:
             if self.uid in download_dict:
                 del download_dict[self.uid]
@@ -628,6 +676,7 @@ class MirrorLeechListener:
                 non_queued_dl.remove(self.uid)
             if self.uid in non_queued_up:
                 non_queued_up.remove(self.uid)
+            task_scheduler.release(self.uid)
 
         await start_from_queued()
         await sleep(3)
@@ -669,6 +718,7 @@ class MirrorLeechListener:
                 non_queued_dl.remove(self.uid)
             if self.uid in non_queued_up:
                 non_queued_up.remove(self.uid)
+            task_scheduler.release(self.uid)
 
         await start_from_queued()
         await sleep(3)
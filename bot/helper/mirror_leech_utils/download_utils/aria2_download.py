@@ -3,7 +3,6 @@ from aiofiles.os import remove as aioremove
 
 from bot import (
     LOGGER,
-    aria2,
     config_dict,
     aria2_options,
     aria2c_global,
@@ -12,7 +11,8 @@ from bot import (
     queue_dict_lock,
     download_dict_lock,
 )
-from bot.helper.ext_utils.bot_utils import sync_to_async, bt_selection_buttons
+from bot.helper.ext_utils.bot_utils import bt_selection_buttons
+from bot.helper.ext_utils.aria2_client import aria2_client
 from bot.helper.ext_utils.task_manager import is_queued
 from bot.helper.telegram_helper.message_utils import send_message, sendStatusMessage
 from bot.helper.mirror_leech_utils.status_utils.aria2_status import Aria2Status
@@ -34,14 +34,14 @@ async def add_aria2c_download(
         a2c_opt["seed-time"] = seed_time
     if TORRENT_TIMEOUT := config_dict["TORRENT_TIMEOUT"]:
         a2c_opt["bt-stop-timeout"] = f"{TORRENT_TIMEOUT}"
-    added_to_queue, event = await is_queued(listener.uid)
+    added_to_queue, event = await is_queued(listener)
     if added_to_queue:
         if link.startswith("magnet:"):
             a2c_opt["pause-metadata"] = "true"
         else:
             a2c_opt["pause"] = "true"
     try:
-        download = (await sync_to_async(aria2.add, link, a2c_opt))[0]
+        download = await aria2_client.add(link, a2c_opt)
     except Exception as e:
         LOGGER.info(f"Aria2c Download Error: {e}")
         await send_message(listener.message, f"{e}")
@@ -58,7 +58,7 @@ async def add_aria2c_download(
     name = download.name
     async with download_dict_lock:
         download_dict[listener.uid] = Aria2Status(
-            gid, listener, queued=added_to_queue
+            gid, listener, queued=added_to_queue, download=download
         )
     if added_to_queue:
         LOGGER.info(f"Added to Queue/Download: {name}. Gid: {gid}")
@@ -75,7 +75,7 @@ async def add_aria2c_download(
         await sendStatusMessage(listener.message)
     elif listener.select and download.is_torrent and not download.is_metadata:
         if not added_to_queue:
-            await sync_to_async(aria2.client.force_pause, gid)
+            await aria2_client.call("forcePause", gid)
         s_buttons = bt_selection_buttons(gid)
         msg = "Your download paused. Choose files then press Done Selecting button to start downloading."
         await send_message(listener.message, msg, s_buttons)
@@ -90,7 +90,7 @@ async def add_aria2c_download(
             download.queued = False
             new_gid = download.gid()
 
-        await sync_to_async(aria2.client.unpause, new_gid)
+        await aria2_client.call("unpause", new_gid)
         LOGGER.info(f"Start Queued Download from Aria2c: {name}. Gid: {gid}")
 
         async with queue_dict_lock:
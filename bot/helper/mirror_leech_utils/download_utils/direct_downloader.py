@@ -9,7 +9,6 @@ from bot import (
     queue_dict_lock,
     download_dict_lock,
 )
-from bot.helper.ext_utils.bot_utils import sync_to_async
 from bot.helper.aeon_utils.nsfw_check import is_nsfw_data
 from bot.helper.ext_utils.task_manager import (
     is_queued,
@@ -52,7 +51,7 @@ async def add_direct_download(details, path, listener, foldername):
         return
 
     gid = token_hex(4)
-    added_to_queue, event = await is_queued(listener.uid)
+    added_to_queue, event = await is_queued(listener, size)
     if added_to_queue:
         LOGGER.info(f"Added to Queue/Download: {foldername}")
         async with download_dict_lock:
@@ -90,4 +89,4 @@ async def add_direct_download(details, path, listener, foldername):
         await sendStatusMessage(listener.message)
 
     await delete_links(listener.message)
-    await sync_to_async(directListener.download, contents)
+    await directListener.download(contents)
@@ -42,7 +42,7 @@ async def add_gd_download(link, path, listener, newname):
     if limit_exceeded := await limit_checker(size, listener, is_drive_link=True):
         await listener.onDownloadError(limit_exceeded)
         return
-    added_to_queue, event = await is_queued(listener.uid)
+    added_to_queue, event = await is_queued(listener, size)
     if added_to_queue:
         LOGGER.info(f"Added to Queue/Download: {name}")
         async with download_dict_lock:
@@ -31,7 +31,7 @@ async def add_qb_torrent(link, path, listener, ratio, seed_time):
         if await aiopath.exists(link):
             url = None
             tpath = link
-        added_to_queue, event = await is_queued(listener.uid)
+        added_to_queue, event = await is_queued(listener)
         op = await sync_to_async(
             xnox_client.torrents_add,
             url,
@@ -149,7 +149,7 @@ class TelegramDownloadHelper:
                     await self.__listener.onDownloadError(limit_exceeded)
                     await delete_links(self.__listener.message)
                     return
-                added_to_queue, event = await is_queued(self.__listener.uid)
+                added_to_queue, event = await is_queued(self.__listener, size)
                 if added_to_queue:
                     LOGGER.info(f"Added to Queue/Download: {name}")
                     async with download_dict_lock:
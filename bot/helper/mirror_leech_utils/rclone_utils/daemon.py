@@ -0,0 +1,198 @@
+import contextlib
+from time import time
+from socket import socket
+from asyncio import Lock, sleep, create_subprocess_exec
+from logging import getLogger
+from secrets import token_hex
+
+from aiohttp import BasicAuth, ClientSession, ClientTimeout
+from aiofiles.os import path as aiopath
+
+from bot import bot_loop
+from bot.helper.ext_utils.exceptions import RcloneRcError
+
+LOGGER = getLogger(__name__)
+
+MAIN_CONFIG = "rcl.conf"
+START_TIMEOUT = 15
+IDLE_TIMEOUT = 600
+JOB_POLL_INTERVAL = 1
+
+
+def free_port():
+    with socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RcloneDaemon:
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self.jobs = 0
+        self.last_used = time()
+        self.__proc = None
+        self.__url = ""
+        self.__auth = None
+        self.__mtime = 0
+        self.__session = None
+        self.__lock = Lock()
+
+    @property
+    def running(self):
+        return self.__proc is not None and self.__proc.returncode is None
+
+    async def __post(self, method, params):
+        if self.__session is None or self.__session.closed:
+            self.__session = ClientSession(timeout=ClientTimeout(total=300))
+        async with self.__session.post(
+            f"{self.__url}{method}", json=params, auth=self.__auth
+        ) as res:
+            data = await res.json(content_type=None)
+            if res.status != 200:
+                raise RcloneRcError(data.get("error", res.reason))
+            return data
+
+    async def __start(self, mtime):
+        port = free_port()
+        user, password = token_hex(8), token_hex(16)
+        self.__proc = await create_subprocess_exec(
+            "xone",
+            "rcd",
+            "--config",
+            self.config_path,
+            "--rc-addr",
+            f"127.0.0.1:{port}",
+            "--rc-user",
+            user,
+            "--rc-pass",
+            password,
+            "--log-file",
+            "rlog.txt",
+            "--log-level",
+            "DEBUG",
+        )
+        self.__url = f"http://127.0.0.1:{port}/"
+        self.__auth = BasicAuth(user, password)
+        self.__mtime = mtime
+        deadline = time() + START_TIMEOUT
+        while True:
+            try:
+                await self.__post("rc/noop", {})
+                break
+            except Exception as e:
+                if not self.running or time() > deadline:
+                    await self.stop()
+                    raise RcloneRcError(
+                        f"rclone rcd failed to start for {self.config_path}"
+                    ) from e
+                await sleep(0.2)
+        LOGGER.info(f"rclone rcd started for {self.config_path} on port {port}")
+
+    async def stop(self):
+        if self.running:
+            with contextlib.suppress(Exception):
+                self.__proc.kill()
+            await self.__proc.wait()
+        self.__proc = None
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    async def ensure(self):
+        async with self.__lock:
+            mtime = await aiopath.getmtime(self.config_path)
+            if self.running and (mtime == self.__mtime or self.jobs):
+                return
+            await self.stop()
+            await self.__start(mtime)
+
+    async def call(self, method, **params):
+        await self.ensure()
+        self.last_used = time()
+        self.jobs += 1
+        try:
+            return await self.__post(method, params)
+        finally:
+            self.jobs -= 1
+
+
+class RcloneJob:
+    def __init__(self, daemon, method, params):
+        self.__daemon = daemon
+        self.__method = method
+        self.__params = params
+        self.__stopped = False
+        self.id = None
+        self.stats = {}
+
+    async def run(self):
+        self.__daemon.jobs += 1
+        try:
+            job = await self.__daemon.call(
+                self.__method, **self.__params, _async=True
+            )
+            self.id = job["jobid"]
+            if self.__stopped:
+                await self.stop()
+            while True:
+                await sleep(JOB_POLL_INTERVAL)
+                status = await self.__daemon.call("job/status", jobid=self.id)
+                with contextlib.suppress(RcloneRcError):
+                    self.stats = await self.__daemon.call(
+                        "core/stats", group=f"job/{self.id}"
+                    )
+                if status["finished"]:
+                    return status["success"], status["error"]
+        except RcloneRcError as e:
+            return False, str(e)
+        finally:
+            self.__daemon.jobs -= 1
+            if self.id is not None:
+                with contextlib.suppress(Exception):
+                    await self.__daemon.call(
+                        "core/stats-delete", group=f"job/{self.id}"
+                    )
+
+    async def stop(self):
+        self.__stopped = True
+        if self.id is not None:
+            with contextlib.suppress(Exception):
+                await self.__daemon.call("job/stop", jobid=self.id)
+
+
+class RcloneDaemonPool:
+    """One warm rclone rcd per config file, started on first use."""
+
+    def __init__(self):
+        self.__daemons = {}
+
+    def __reap(self):
+        now = time()
+        for config_path, daemon in list(self.__daemons.items()):
+            if (
+                config_path != MAIN_CONFIG
+                and not daemon.jobs
+                and now - daemon.last_used > IDLE_TIMEOUT
+            ):
+                del self.__daemons[config_path]
+                bot_loop.create_task(daemon.stop())
+
+    def daemon(self, config_path):
+        self.__reap()
+        if config_path not in self.__daemons:
+            self.__daemons[config_path] = RcloneDaemon(config_path)
+        return self.__daemons[config_path]
+
+    async def call(self, config_path, method, **params):
+        return await self.daemon(config_path).call(method, **params)
+
+    def job(self, config_path, method, **params):
+        return RcloneJob(self.daemon(config_path), method, params)
+
+    async def shutdown(self):
+        for daemon in self.__daemons.values():
+            await daemon.stop()
+        self.__daemons.clear()
+
+
+rclone_daemon = RcloneDaemonPool()
@@ -1,4 +1,3 @@
-from json import loads
 from time import time
 from asyncio import Event, wait_for, wrap_future
 from functools import partial
@@ -11,15 +10,16 @@ from pyrogram.handlers import CallbackQueryHandler
 
 from bot import LOGGER, config_dict
 from bot.helper.ext_utils.bot_utils import (
-    cmd_exec,
     new_task,
     new_thread,
     get_readable_time,
     get_readable_file_size,
 )
 from bot.helper.ext_utils.db_handler import DbManager
+from bot.helper.ext_utils.exceptions import RcloneRcError
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.message_utils import edit_message, send_message
+from bot.helper.mirror_leech_utils.rclone_utils.list_cache import rclone_list_cache
 
 LIST_LIMIT = 6
 
@@ -154,6 +154,13 @@ class RcloneList:
             else:
                 await edit_message(self.__reply_to, msg, button)
 
+    def __prefetch(self, items):
+        parent = f"{self.remote}{self.path}/" if self.path else self.remote
+        rclone_list_cache.prefetch(
+            self.config_path,
+            [f"{parent}{item['Path']}" for item in items if item["IsDir"]],
+        )
+
     async def get_path_buttons(self):
         items_no = len(self.path_list)
         pages = (items_no + LIST_LIMIT - 1) // LIST_LIMIT
@@ -163,9 +170,9 @@ class RcloneList:
             self.iter_start = LIST_LIMIT * (pages - 1)
         page = (self.iter_start / LIST_LIMIT) + 1 if self.iter_start != 0 else 1
         buttons = ButtonMaker()
-        for index, idict in enumerate(
-            self.path_list[self.iter_start : LIST_LIMIT + self.iter_start]
-        ):
+        page_items = self.path_list[self.iter_start : LIST_LIMIT + self.iter_start]
+        self.__prefetch(page_items)
+        for index, idict in enumerate(page_items):
             orig_index = index + self.iter_start
             if idict["IsDir"]:
                 ptype = "fo"
@@ -224,29 +231,22 @@ class RcloneList:
             self.item_type == itype
         elif self.list_status == "rcu":
             self.item_type == "--dirs-only"
-        cmd = [
-            "xone",
-            "lsjson",
-            self.item_type,
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            self.config_path,
-            f"{self.remote}{self.path}",
-        ]
         if self.is_cancelled:
             return None
-        res, err, code = await cmd_exec(cmd)
-        if code not in [0, -9]:
+        try:
+            items = await rclone_list_cache.get(
+                self.config_path, f"{self.remote}{self.path}"
+            )
+        except RcloneRcError as e:
             LOGGER.error(
-                f"While rclone listing. Path: {self.remote}{self.path}. Stderr: {err}"
+                f"While rclone listing. Path: {self.remote}{self.path}. Error: {e}"
             )
-            self.remote = err[:4000]
+            self.remote = str(e)[:4000]
             self.path = ""
             self.event.set()
             return None
-        result = loads(res)
+        dirs_only = self.item_type == "--dirs-only"
+        result = [item for item in items if item["IsDir"] == dirs_only]
         if (
             len(result) == 0
             and itype != self.item_type
@@ -257,7 +257,7 @@ class RcloneList:
             )
             self.item_type = itype
             return await self.get_path(itype)
-        self.path_list = sorted(result, key=lambda x: x["Path"])
+        self.path_list = result
         self.iter_start = 0
         await self.get_path_buttons()
         return None
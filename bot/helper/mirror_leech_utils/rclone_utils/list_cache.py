@@ -0,0 +1,106 @@
+from time import time
+from asyncio import Semaphore, shield, current_task
+from collections import OrderedDict
+
+from aiofiles.os import path as aiopath
+
+from bot import LOGGER, bot_loop
+from bot.helper.mirror_leech_utils.rclone_utils.daemon import rclone_daemon
+
+CACHE_SIZE = 256
+CACHE_TTL = 300
+PREFETCH_WORKERS = 2
+
+
+def _prefix(path):
+    return path if path.endswith(":") else f"{path}/"
+
+
+def _related(cached, path):
+    return (
+        cached == path
+        or path.startswith(_prefix(cached))
+        or cached.startswith(_prefix(path))
+    )
+
+
+class RcloneListCache:
+    """Directory listings keyed by (config, remote path) for the rclone browser."""
+
+    def __init__(self):
+        self.__entries = OrderedDict()
+        self.__pending = {}
+        self.__prefetch_limit = Semaphore(PREFETCH_WORKERS)
+
+    def __get(self, key, mtime):
+        entry = self.__entries.get(key)
+        if entry is None:
+            return None
+        expires, config_mtime, items = entry
+        if expires < time() or config_mtime != mtime:
+            del self.__entries[key]
+            return None
+        self.__entries.move_to_end(key)
+        return items
+
+    def __set(self, key, mtime, items):
+        self.__entries[key] = (time() + CACHE_TTL, mtime, items)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > CACHE_SIZE:
+            self.__entries.popitem(last=False)
+
+    async def __fetch(self, key, mtime):
+        config_path, path = key
+        task = current_task()
+        try:
+            res = await rclone_daemon.call(
+                config_path,
+                "operations/list",
+                fs=path,
+                remote="",
+                opt={"noModTime": True, "noMimeType": True},
+            )
+            items = [
+                {"Path": item["Name"], "IsDir": item["IsDir"], "Size": item["Size"]}
+                for item in res["list"]
+            ]
+            items.sort(key=lambda x: x["Path"])
+            if self.__pending.get(key) is task:
+                self.__set(key, mtime, items)
+            return items
+        finally:
+            if self.__pending.get(key) is task:
+                del self.__pending[key]
+
+    async def get(self, config_path, path):
+        key = (config_path, path)
+        mtime = await aiopath.getmtime(config_path)
+        if (items := self.__get(key, mtime)) is not None:
+            return items
+        if (task := self.__pending.get(key)) is None:
+            task = bot_loop.create_task(self.__fetch(key, mtime))
+            self.__pending[key] = task
+        return await shield(task)
+
+    async def __prefetch_one(self, config_path, path):
+        async with self.__prefetch_limit:
+            try:
+                await self.get(config_path, path)
+            except Exception as e:
+                LOGGER.debug(f"Prefetch failed. Path: {path}. Error: {e}")
+
+    def prefetch(self, config_path, paths):
+        for path in paths:
+            key = (config_path, path)
+            if key in self.__entries or key in self.__pending:
+                continue
+            bot_loop.create_task(self.__prefetch_one(config_path, path))
+
+    def invalidate(self, path):
+        for key in [key for key in self.__entries if _related(key[1], path)]:
+            del self.__entries[key]
+        for key in [key for key in self.__pending if _related(key[1], path)]:
+            del self.__pending[key]
+
+
+rclone_list_cache = RcloneListCache()
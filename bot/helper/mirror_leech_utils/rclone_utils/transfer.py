@@ -1,6 +1,6 @@
 import contextlib
+from re import search as re_search
 from re import findall as re_findall
-from json import loads
 from random import randrange
 from asyncio import gather, create_subprocess_exec
 from logging import getLogger
@@ -12,16 +12,35 @@ from aiofiles.os import path as aiopath
 from aiofiles.os import mkdir, listdir
 
 from bot import GLOBAL_EXTENSION_FILTER, config_dict
-from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async
+from bot.helper.ext_utils.bot_utils import (
+    sync_to_async,
+    get_readable_time,
+    get_readable_file_size,
+)
+from bot.helper.ext_utils.exceptions import RcloneRcError
 from bot.helper.ext_utils.files_utils import get_mime_type, count_files_and_folders
+from bot.helper.mirror_leech_utils.rclone_utils.daemon import rclone_daemon
+from bot.helper.mirror_leech_utils.rclone_utils.list_cache import rclone_list_cache
 
 LOGGER = getLogger(__name__)
 
+RC_BACKEND_FLAGS = {
+    "--drive-acknowledge-abuse": "acknowledge_abuse",
+    "--drive-chunk-size": "chunk_size",
+    "--drive-upload-cutoff": "upload_cutoff",
+}
+RC_CONFIG_FLAGS = {
+    "--retries-sleep": ("RetriesInterval", str),
+    "--tpslimit": ("TPSLimit", float),
+    "--transfers": ("Transfers", int),
+}
+
 
 class RcloneTransferHelper:
     def __init__(self, listener=None, name=""):
         self.__listener = listener
         self.__proc = None
+        self.__job = None
         self.__transferred_size = "0 B"
         self.__eta = "-"
         self.__percentage = "0%"
@@ -35,24 +54,40 @@ class RcloneTransferHelper:
         self.__sa_number = 0
         self.name = name
 
+    def __rc_stats(self):
+        if self.__job is None or not (stats := self.__job.stats):
+            return
+        done, total = stats.get("bytes", 0), stats.get("totalBytes", 0)
+        self.__transferred_size = get_readable_file_size(done)
+        self.__size = get_readable_file_size(total)
+        self.__percentage = f"{round(done / total * 100, 2) if total else 0}%"
+        self.__speed = f"{get_readable_file_size(stats.get('speed', 0))}/s"
+        eta = stats.get("eta")
+        self.__eta = get_readable_time(eta) if eta is not None else "-"
+
     @property
     def transferred_size(self):
+        self.__rc_stats()
         return self.__transferred_size
 
     @property
     def percentage(self):
+        self.__rc_stats()
         return self.__percentage
 
     @property
     def speed(self):
+        self.__rc_stats()
         return self.__speed
 
     @property
     def eta(self):
+        self.__rc_stats()
         return self.__eta
 
     @property
     def size(self):
+        self.__rc_stats()
         return self.__size
 
     async def __progress(self):
@@ -110,47 +145,140 @@ class RcloneTransferHelper:
             await f.write(text)
         return sa_conf_file
 
-    async def __start_download(self, cmd, remote_type):
+    async def __run_cli(self, cmd):
         self.__proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
         _, return_code = await gather(self.__progress(), self.__proc.wait())
+        if self.__is_cancelled or return_code == -9:
+            return False, None
+        if return_code == 0:
+            return True, ""
+        return False, (await self.__proc.stderr.read()).decode().strip()
 
+    async def __run_rc(self, config_path, method, params):
+        self.__job = rclone_daemon.job(config_path, method, **params)
+        if self.__is_cancelled:
+            return False, None
+        success, error = await self.__job.run()
         if self.__is_cancelled:
-            return None
+            return False, None
+        return success, error
 
-        if return_code == 0:
-            await self.__listener.on_download_complete()
-            return None
-        if return_code != -9:
-            error = (await self.__proc.stderr.read()).decode().strip()
-            if (
-                not error
-                and remote_type == "drive"
-                and config_dict["USE_SERVICE_ACCOUNTS"]
-            ):
-                error = (
-                    "Mostly your service accounts don't have access to this drive!"
-                )
-            LOGGER.error(error)
+    @staticmethod
+    def __rc_options(extra):
+        backend, rc_config = {}, {}
+        for index, flag in enumerate(extra):
+            if not flag.startswith("--"):
+                continue
+            value = extra[index + 1] if index + 1 < len(extra) else None
+            if value is not None and value.startswith("--"):
+                value = None
+            if flag in RC_BACKEND_FLAGS:
+                backend[RC_BACKEND_FLAGS[flag]] = value or "true"
+            elif flag in RC_CONFIG_FLAGS:
+                key, cast = RC_CONFIG_FLAGS[flag]
+                rc_config[key] = cast(value)
+        return backend, rc_config
 
-            if (
-                self.__sa_number != 0
-                and remote_type == "drive"
-                and "RATE_LIMIT_EXCEEDED" in error
-                and config_dict["USE_SERVICE_ACCOUNTS"]
-            ):
-                if self.__sa_count < self.__sa_number:
-                    remote = self.__switchServiceAccount()
-                    cmd[6] = f"{remote}:{cmd[6].split(':', 1)[1]}"
-                    if self.__is_cancelled:
-                        return None
-                    return await self.__start_download(cmd, remote_type)
-                LOGGER.info(
-                    f"Reached maximum number of service accounts switching, which is {self.__sa_count}"
+    @staticmethod
+    def __split_path(path, remote_type):
+        if remote_type is None:
+            parent, name = path.rstrip("/").rsplit("/", 1)
+            return parent or "/", name
+        remote, rc_path = path.split(":", 1)
+        parent, _, name = rc_path.strip("/").rpartition("/")
+        return f"{remote}:{parent}", name
+
+    @staticmethod
+    def __with_backend(path, remote_type, backend):
+        if remote_type != "drive" or not backend:
+            return path
+        remote, rc_path = path.split(":", 1)
+        params = ",".join(f"{key}={value}" for key, value in backend.items())
+        return f"{remote},{params}:{rc_path}"
+
+    async def __transfer(
+        self,
+        config_path,
+        method,
+        source,
+        destination,
+        rc_flags,
+        extra,
+        types,
+        is_file,
+    ):
+        if rc_flags:
+            cmd = self.__getUpdatedCommand(
+                config_path, source, destination, rc_flags, method
+            )
+            cmd.extend(extra)
+            return await self.__run_cli(cmd)
+        if is_file is None:
+            try:
+                fs, rc_path = source.split(":", 1)
+                stat = await rclone_daemon.call(
+                    config_path,
+                    "operations/stat",
+                    fs=f"{fs}:",
+                    remote=rc_path.strip("/"),
+                    opt={"noModTime": True, "noMimeType": True},
                 )
+            except RcloneRcError as e:
+                return False, str(e)
+            is_file = bool(stat.get("item")) and not stat["item"]["IsDir"]
+        backend, rc_config = self.__rc_options(extra)
+        params = {
+            "_config": {
+                "UseListR": True,
+                "LowLevelRetries": 1,
+                "Metadata": True,
+                **rc_config,
+            },
+            "_filter": {
+                "ExcludeRule": ["*.{" + ",".join(GLOBAL_EXTENSION_FILTER) + "}"],
+                "IgnoreCase": True,
+            },
+        }
+        if is_file:
+            src_fs, name = self.__split_path(source, types[0])
+            params.update(
+                srcFs=self.__with_backend(src_fs, types[0], backend),
+                srcRemote=name,
+                dstFs=self.__with_backend(destination, types[1], backend),
+                dstRemote=name,
+            )
+            return await self.__run_rc(
+                config_path, f"operations/{method}file", params
+            )
+        params.update(
+            srcFs=self.__with_backend(source, types[0], backend),
+            dstFs=self.__with_backend(destination, types[1], backend),
+        )
+        return await self.__run_rc(config_path, f"sync/{method}", params)
 
-            await self.__listener.onDownloadError(error[:4000])
-            return None
-        return None
+    def __transfer_error(self, error, remote_type):
+        if (
+            not error
+            and remote_type == "drive"
+            and config_dict["USE_SERVICE_ACCOUNTS"]
+        ):
+            error = "Mostly your service accounts don't have access to this drive!"
+        LOGGER.error(error)
+        return error
+
+    def __can_switch(self, error, remote_type):
+        if (
+            self.__sa_number != 0
+            and remote_type == "drive"
+            and re_search(r"RATE_LIMIT_EXCEEDED|rateLimitExceeded", error)
+            and config_dict["USE_SERVICE_ACCOUNTS"]
+        ):
+            if self.__sa_count < self.__sa_number:
+                return not self.__is_cancelled
+            LOGGER.info(
+                f"Reached maximum number of service accounts switching, which is {self.__sa_count}"
+            )
+        return False
 
     async def download(self, remote, rc_path, config_path, path):
         self.__is_download = True
@@ -176,21 +304,37 @@ class RcloneTransferHelper:
                 remote = f"sa{self.__sa_index:03}"
                 LOGGER.info(f"Download with service account {remote}")
 
-        rc_flags = self.__listener.rc_flags or config_dict["RCLONE_FLAGS"]
-        cmd = self.__getUpdatedCommand(
-            config_path, f"{remote}:{rc_path}", path, rc_flags, "copy"
-        )
-
+        extra = []
         if (
             remote_type == "drive"
             and not config_dict["RCLONE_FLAGS"]
             and not self.__listener.rc_flags
         ):
-            cmd.append("--drive-acknowledge-abuse")
+            extra.append("--drive-acknowledge-abuse")
         elif remote_type != "drive":
-            cmd.extend(("--retries-sleep", "3s"))
-
-        await self.__start_download(cmd, remote_type)
+            extra.extend(("--retries-sleep", "3s"))
+
+        while True:
+            success, error = await self.__transfer(
+                config_path,
+                "copy",
+                f"{remote}:{rc_path}",
+                path,
+                self.__listener.rc_flags or config_dict["RCLONE_FLAGS"],
+                extra,
+                (remote_type, None),
+                None,
+            )
+            if self.__is_cancelled or error is None:
+                return
+            if success:
+                await self.__listener.on_download_complete()
+                return
+            error = self.__transfer_error(error, remote_type)
+            if not self.__can_switch(error, remote_type):
+                break
+            remote = self.__switchServiceAccount()
+        await self.__listener.onDownloadError(error[:4000])
 
     async def __get_gdrive_link(self, config_path, remote, rc_path, mime_type):
         if mime_type == "Folder":
@@ -204,73 +348,36 @@ class RcloneTransferHelper:
             epath = f"{remote}:{rc_path}{self.name}"
             destination = epath
 
-        cmd = [
-            "xone",
-            "lsjson",
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            config_path,
-            epath,
-        ]
-        res, err, code = await cmd_exec(cmd)
-
-        if code == 0:
-            result = loads(res)
-            fid = next((r["ID"] for r in result if r["Path"] == self.name), "err")
-            link = (
-                f"https://drive.google.com/drive/folders/{fid}"
-                if mime_type == "Folder"
-                else f"https://drive.google.com/uc?id={fid}&export=download"
+        try:
+            result = await rclone_daemon.call(
+                config_path,
+                "operations/list",
+                fs=epath,
+                remote="",
+                opt={"noModTime": True, "noMimeType": True},
             )
-        elif code != -9:
+        except RcloneRcError as e:
             LOGGER.error(
-                f"while getting drive link. Path: {destination}. Stderr: {err}"
+                f"while getting drive link. Path: {destination}. Stderr: {e}"
             )
-            link = ""
+            return "", destination
+        fid = next(
+            (r["ID"] for r in result["list"] if r["Path"] == self.name), "err"
+        )
+        link = (
+            f"https://drive.google.com/drive/folders/{fid}"
+            if mime_type == "Folder"
+            else f"https://drive.google.com/uc?id={fid}&export=download"
+        )
         return link, destination
 
-    async def __start_upload(self, cmd, remote_type):
-        self.__proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        _, return_code = await gather(self.__progress(), self.__proc.wait())
-
-        if self.__is_cancelled:
-            return False
-
-        if return_code == -9:
-            return False
-        if return_code != 0:
-            error = (await self.__proc.stderr.read()).decode().strip()
-            if (
-                not error
-                and remote_type == "drive"
-                and config_dict["USE_SERVICE_ACCOUNTS"]
-            ):
-                error = (
-                    "Mostly your service accounts don't have access to this drive!"
-                )
-            LOGGER.error(error)
-            if (
-                self.__sa_number != 0
-                and remote_type == "drive"
-                and "RATE_LIMIT_EXCEEDED" in error
-                and config_dict["USE_SERVICE_ACCOUNTS"]
-            ):
-                if self.__sa_count < self.__sa_number:
-                    remote = self.__switchServiceAccount()
-                    cmd[7] = f"{remote}:{cmd[7].split(':', 1)[1]}"
-                    return (
-                        False
-                        if self.__is_cancelled
-                        else await self.__start_upload(cmd, remote_type)
-                    )
-                LOGGER.info(
-                    f"Reached maximum number of service accounts switching, which is {self.__sa_count}"
-                )
-            await self.__listener.onUploadError(error[:4000])
-            return False
-        return True
+    @staticmethod
+    async def __get_link(config_path, destination):
+        remote, rc_path = destination.split(":", 1)
+        result = await rclone_daemon.call(
+            config_path, "operations/publiclink", fs=f"{remote}:", remote=rc_path
+        )
+        return result["url"]
 
     async def upload(self, path, size):
         self.__is_upload = True
@@ -321,25 +428,42 @@ class RcloneTransferHelper:
                 fremote = f"sa{self.__sa_index:03}"
                 LOGGER.info(f"Upload with service account {fremote}")
 
-        rc_flags = self.__listener.rc_flags or config_dict["RCLONE_FLAGS"]
         method = (
             "move" if not self.__listener.seed or self.__listener.newDir else "copy"
         )
-        cmd = self.__getUpdatedCommand(
-            fconfig_path, path, f"{fremote}:{rc_path}", rc_flags, method
-        )
+        extra = []
         if (
             remote_type == "drive"
             and not config_dict["RCLONE_FLAGS"]
             and not self.__listener.rc_flags
         ):
-            cmd.extend(("--drive-chunk-size", "64M", "--drive-upload-cutoff", "32M"))
+            extra.extend(
+                ("--drive-chunk-size", "64M", "--drive-upload-cutoff", "32M")
+            )
         elif remote_type != "drive":
-            cmd.extend(("--retries-sleep", "3s"))
-
-        result = await self.__start_upload(cmd, remote_type)
-        if not result:
-            return
+            extra.extend(("--retries-sleep", "3s"))
+
+        while True:
+            success, error = await self.__transfer(
+                fconfig_path,
+                method,
+                path,
+                f"{fremote}:{rc_path}",
+                self.__listener.rc_flags or config_dict["RCLONE_FLAGS"],
+                extra,
+                (None, remote_type),
+                mime_type != "Folder",
+            )
+            if self.__is_cancelled or error is None:
+                return
+            if success:
+                break
+            error = self.__transfer_error(error, remote_type)
+            if not self.__can_switch(error, remote_type):
+                await self.__listener.onUploadError(error[:4000])
+                return
+            fremote = self.__switchServiceAccount()
+        rclone_list_cache.invalidate(f"{oremote}:{rc_path}")
 
         if remote_type == "drive":
             link, destination = await self.__get_gdrive_link(
@@ -353,14 +477,11 @@ class RcloneTransferHelper:
             else:
                 destination = f"{oremote}:{self.name}"
 
-            cmd = ["xone", "link", "--config", oconfig_path, destination]
-            res, err, code = await cmd_exec(cmd)
-
-            if code == 0:
-                link = res
-            elif code != -9:
+            try:
+                link = await self.__get_link(oconfig_path, destination)
+            except RcloneRcError as e:
                 LOGGER.error(
-                    f"while getting link. Path: {destination} | Stderr: {err}"
+                    f"while getting link. Path: {destination} | Stderr: {e}"
                 )
                 link = ""
         if self.__is_cancelled:
@@ -389,32 +510,35 @@ class RcloneTransferHelper:
             dst_remote_opt["type"],
         )
 
-        cmd = self.__getUpdatedCommand(
-            config_path, f"{src_remote}:{src_path}", destination, rc_flags, "copy"
-        )
+        extra = []
         if not rc_flags:
             if src_remote_type == "drive" and dst_remote_type != "drive":
-                cmd.append("--drive-acknowledge-abuse")
+                extra.append("--drive-acknowledge-abuse")
             elif dst_remote_type == "drive" and src_remote_type != "drive":
-                cmd.extend(
+                extra.extend(
                     ("--drive-chunk-size", "64M", "--drive-upload-cutoff", "32M")
                 )
             elif src_remote_type == "drive":
-                cmd.extend(("--tpslimit", "3", "--transfers", "3"))
+                extra.extend(("--tpslimit", "3", "--transfers", "3"))
 
-        self.__proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        _, return_code = await gather(self.__progress(), self.__proc.wait())
-
-        if self.__is_cancelled:
-            return None, None
+        success, error = await self.__transfer(
+            config_path,
+            "copy",
+            f"{src_remote}:{src_path}",
+            destination,
+            rc_flags,
+            extra,
+            (src_remote_type, dst_remote_type),
+            mime_type != "Folder",
+        )
 
-        if return_code == -9:
+        if self.__is_cancelled or error is None:
             return None, None
-        if return_code != 0:
-            error = (await self.__proc.stderr.read()).decode().strip()
+        if not success:
             LOGGER.error(error)
             await self.__listener.onUploadError(error[:4000])
             return None, None
+        rclone_list_cache.invalidate(destination)
         if dst_remote_type == "drive":
             link, destination = await self.__get_gdrive_link(
                 config_path, dst_remote, dst_path, mime_type
@@ -423,19 +547,17 @@ class RcloneTransferHelper:
         if mime_type != "Folder":
             destination += f"/{self.name}" if dst_path else self.name
 
-        cmd = ["xone", "link", "--config", config_path, destination]
-        res, err, code = await cmd_exec(cmd)
-
-        if self.__is_cancelled:
+        try:
+            link = await self.__get_link(config_path, destination)
+        except RcloneRcError as e:
+            if self.__is_cancelled:
+                return None, None
+            LOGGER.error(f"while getting link. Path: {destination} | Stderr: {e}")
+            await self.__listener.onUploadError(str(e)[:4000])
             return None, None
-
-        if code == 0:
-            return res, destination
-        if code != -9:
-            LOGGER.error(f"while getting link. Path: {destination} | Stderr: {err}")
-            await self.__listener.onUploadError(err[:4000])
+        if self.__is_cancelled:
             return None, None
-        return None
+        return link, destination
 
     @staticmethod
     def __getUpdatedCommand(config_path, source, destination, rc_flags, method):
@@ -484,6 +606,8 @@ class RcloneTransferHelper:
         if self.__proc is not None:
             with contextlib.suppress(Exception):
                 self.__proc.kill()
+        if self.__job is not None:
+            await self.__job.stop()
         if self.__is_download:
             LOGGER.info(f"Cancelling Download: {self.name}")
             await self.__listener.onDownloadError("Stopped by user!")
@@ -0,0 +1,27 @@
+from re import compile as re_compile
+
+PERCENT_REGEX = re_compile(rb"(\d+)%")
+
+
+class ArchiveProgress:
+    """Byte estimate for a 7z run built from its -bsp1 percentage output."""
+
+    def __init__(self, total):
+        self.total = total
+        self.__done = 0
+        self.__span = 0
+        self.__percent = 0
+
+    def begin(self, span):
+        self.__done += self.__span
+        self.__span = span
+        self.__percent = 0
+
+    @property
+    def processed(self):
+        return min(self.total, self.__done + self.__span * self.__percent / 100)
+
+    async def follow(self, stream):
+        while chunk := await stream.read(4096):
+            if matches := PERCENT_REGEX.findall(chunk):
+                self.__percent = max(self.__percent, min(int(matches[-1]), 100))
@@ -1,25 +1,21 @@
+import contextlib
 from time import time
 
-from bot import LOGGER, aria2
-from bot.helper.ext_utils.bot_utils import (
-    MirrorStatus,
-    sync_to_async,
-    get_readable_time,
+from bot import LOGGER
+from bot.helper.ext_utils.bot_utils import MirrorStatus, get_readable_time
+from bot.helper.ext_utils.exceptions import Aria2RpcError
+from bot.helper.ext_utils.aria2_client import aria2_client
+from bot.helper.mirror_leech_utils.status_utils.status_snapshot import (
+    status_snapshot,
 )
 
 
-def get_download(gid):
-    try:
-        return aria2.get_download(gid)
-    except Exception as e:
-        LOGGER.error(f"{e}: Aria2c, Error while getting torrent info")
-        return None
-
-
 class Aria2Status:
-    def __init__(self, gid, listener, seeding=False, queued=False):
+    engine = "aria2"
+
+    def __init__(self, gid, listener, seeding=False, queued=False, download=None):
         self.__gid = gid
-        self.__download = get_download(gid)
+        self.__download = download or status_snapshot.aria2(gid)
         self.__listener = listener
         self.queued = queued
         self.start_time = 0
@@ -27,13 +23,19 @@ class Aria2Status:
         self.message = self.__listener.message
 
     def __update(self):
-        if self.__download is None:
-            self.__download = get_download(self.__gid)
-        else:
-            self.__download = self.__download.live
+        # a snapshot miss keeps the last known state
+        if (download := status_snapshot.aria2(self.__gid)) is not None:
+            self.__download = download
         if self.__download.followed_by_ids:
             self.__gid = self.__download.followed_by_ids[0]
-            self.__download = get_download(self.__gid)
+            self.__download = status_snapshot.aria2(self.__gid) or self.__download
+
+    def follow(self, gid):
+        self.__gid = gid
+        self.__download = status_snapshot.aria2(gid) or self.__download
+
+    def snapshot_key(self):
+        return self.__gid
 
     def progress(self):
         return self.__download.progress_string()
@@ -96,20 +98,21 @@ class Aria2Status:
 
     async def cancel_download(self):
         self.__update()
-        await sync_to_async(self.__update)
+        with contextlib.suppress(Aria2RpcError):
+            self.__download = await aria2_client.get_download(self.__gid)
         if self.__download.seeder and self.seeding:
             LOGGER.info(f"Cancelling Seed: {self.name()}")
             await self.__listener.onUploadError(
                 f"Seeding stopped with Ratio: {self.ratio()} and Time: {self.seeding_time()}"
             )
-            await sync_to_async(
-                aria2.remove, [self.__download], force=True, files=True
-            )
-        elif downloads := self.__download.followed_by:
+            await aria2_client.remove([self.__download], files=True)
+        elif followed_by_ids := self.__download.followed_by_ids:
             LOGGER.info(f"Cancelling Download: {self.name()}")
             await self.__listener.onDownloadError("Download cancelled by user!")
-            downloads.append(self.__download)
-            await sync_to_async(aria2.remove, downloads, force=True, files=True)
+            downloads = await aria2_client.get_downloads(followed_by_ids)
+            await aria2_client.remove(
+                [*downloads.values(), self.__download], files=True
+            )
         else:
             if self.queued:
                 LOGGER.info(f"Cancelling QueueDl: {self.name()}")
@@ -118,6 +121,4 @@ class Aria2Status:
                 LOGGER.info(f"Cancelling Download: {self.name()}")
                 msg = "Download stopped by user!"
             await self.__listener.onDownloadError(msg)
-            await sync_to_async(
-                aria2.remove, [self.__download], force=True, files=True
-            )
+            await aria2_client.remove([self.__download], files=True)
@@ -6,6 +6,8 @@ from bot.helper.ext_utils.bot_utils import (
 
 
 class DirectStatus:
+    engine = "aria2"
+
     def __init__(self, obj, gid, listener):
         self.__gid = gid
         self.__listener = listener
@@ -43,7 +45,7 @@ class DirectStatus:
             return "-"
 
     def status(self):
-        if self.__obj.task and self.__obj.task.is_waiting:
+        if self.__obj.is_waiting:
             return MirrorStatus.STATUS_QUEUEDL
         return MirrorStatus.STATUS_DOWNLOADING
 
@@ -3,20 +3,19 @@ from time import time
 from bot import LOGGER
 from bot.helper.ext_utils.bot_utils import (
     MirrorStatus,
-    async_to_sync,
     get_readable_time,
     get_readable_file_size,
 )
-from bot.helper.ext_utils.files_utils import get_path_size
 
 
 class ExtractStatus:
-    def __init__(self, name, size, gid, listener):
+    def __init__(self, name, size, gid, listener, progress):
         self.__name = name
         self.__size = size
         self.__gid = gid
         self.__listener = listener
         self.__uid = listener.uid
+        self.__progress = progress
         self.__start_time = time()
         self.message = listener.message
 
@@ -58,9 +57,7 @@ class ExtractStatus:
         return get_readable_file_size(self.processed_raw())
 
     def processed_raw(self):
-        if self.__listener.newDir:
-            return async_to_sync(get_path_size, self.__listener.newDir)
-        return async_to_sync(get_path_size, self.__listener.dir) - self.__size
+        return self.__progress.processed
 
     def download(self):
         return self
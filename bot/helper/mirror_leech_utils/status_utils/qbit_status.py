@@ -7,6 +7,9 @@ from bot.helper.ext_utils.bot_utils import (
     get_readable_time,
     get_readable_file_size,
 )
+from bot.helper.mirror_leech_utils.status_utils.status_snapshot import (
+    status_snapshot,
+)
 
 
 def get_download(client, tag):
@@ -18,6 +21,8 @@ def get_download(client, tag):
 
 
 class QbittorrentStatus:
+    engine = "qbit"
+
     def __init__(self, listener, seeding=False, queued=False):
         self.__client = xnox_client
         self.__listener = listener
@@ -27,10 +32,15 @@ class QbittorrentStatus:
         self.message = listener.message
 
     def __update(self):
-        new_info = get_download(self.__client, f"{self.__listener.uid}")
+        new_info = status_snapshot.qbit(f"{self.__listener.uid}")
+        if new_info is None:
+            new_info = get_download(self.__client, f"{self.__listener.uid}")
         if new_info is not None:
             self.__info = new_info
 
+    def snapshot_key(self):
+        return f"{self.__listener.uid}", getattr(self.__info, "hash", None)
+
     def progress(self):
         return f"{round(self.__info.progress*100, 2)}%"
 
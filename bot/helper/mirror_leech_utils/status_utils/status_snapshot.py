@@ -0,0 +1,88 @@
+from time import time
+
+from bot import LOGGER, xnox_client, download_dict
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.disk_ledger import disk_ledger
+from bot.helper.ext_utils.aria2_client import aria2_client
+
+SNAPSHOT_TTL = 3
+
+
+class StatusSnapshot:
+    def __init__(self):
+        self.__qbit = {}
+        self.__aria2 = {}
+        self.__taken_at = 0
+
+    @staticmethod
+    def __qbit_torrents(keys):
+        hashes = [hash_ for _, hash_ in keys if hash_]
+        if len(hashes) == len(keys):
+            return xnox_client.torrents_info(torrent_hashes=hashes)
+        # hashes of new tasks are unknown yet, one listing covers them by tag
+        tags = {tag for tag, _ in keys}
+        return [
+            tor_info
+            for tor_info in xnox_client.torrents_info()
+            if tor_info.tags in tags
+        ]
+
+    async def refresh(self):
+        qbit = {}
+        aria = {}
+        tasks = list(download_dict.values())
+        qbit_keys = [
+            task.snapshot_key()
+            for task in tasks
+            if getattr(task, "engine", None) == "qbit"
+        ]
+        if qbit_keys:
+            try:
+                for tor_info in await sync_to_async(self.__qbit_torrents, qbit_keys):
+                    qbit[tor_info.tags] = tor_info
+            except Exception as e:
+                LOGGER.error(f"{e}: Qbittorrent, while taking status snapshot")
+        aria2_gids = [
+            task.snapshot_key()
+            for task in tasks
+            if getattr(task, "engine", None) == "aria2"
+        ]
+        if aria2_gids:
+            try:
+                for download in await aria2_client.get_active():
+                    aria[download.gid] = download
+                # stopped downloads are not listed, magnets need them to follow
+                if missing := [gid for gid in aria2_gids if gid not in aria]:
+                    aria.update(await aria2_client.get_downloads(missing))
+            except Exception as e:
+                LOGGER.error(f"{e}: Aria2c, while taking status snapshot")
+        self.__qbit, self.__aria2 = qbit, aria
+        self.__taken_at = time()
+        self.__record_progress(tasks)
+
+    def __record_progress(self, tasks):
+        for task in tasks:
+            engine = getattr(task, "engine", None)
+            if engine == "qbit":
+                if tor_info := self.__qbit.get(task.snapshot_key()[0]):
+                    disk_ledger.progress(task.listener().uid, tor_info.completed)
+            elif engine == "aria2" and (
+                download := self.__aria2.get(task.snapshot_key())
+            ):
+                disk_ledger.progress(task.listener().uid, download.completed_length)
+
+    def is_fresh(self):
+        return time() - self.__taken_at < SNAPSHOT_TTL
+
+    def qbit(self, tag):
+        if not self.is_fresh():
+            return None
+        return self.__qbit.get(tag)
+
+    def aria2(self, gid):
+        if not self.is_fresh():
+            return None
+        return self.__aria2.get(gid)
+
+
+status_snapshot = StatusSnapshot()
@@ -0,0 +1,162 @@
+import contextlib
+from asyncio import Event, sleep, gather
+from logging import getLogger
+
+from pyrogram import raw, types
+from pyrogram.errors import (
+    FloodWait,
+    PeerIdInvalid,
+    ChannelInvalid,
+    MessageIdInvalid,
+    MessageNotModified,
+)
+
+from bot import bot_loop
+from bot.helper.telegram_helper.message_utils import delete_message
+
+LOGGER = getLogger(__name__)
+
+BATCH_SIZE = 100
+NEW_MESSAGE_UPDATES = (raw.types.UpdateNewMessage, raw.types.UpdateNewChannelMessage)
+
+
+class Destination:
+    def __init__(self, chat_id, name, placeholder=None, reply_to=None, chain=False):
+        self.chat_id = chat_id
+        self.name = name
+        self.placeholder = placeholder
+        self.reply_to = reply_to
+        self.chain = chain
+        self.pending = []
+        self.wakeup = Event()
+        self.worker = None
+
+
+class CopyFanout:
+    """Copies uploaded messages to extra chats in batches, off the upload path."""
+
+    def __init__(self, client):
+        self.__client = client
+        self.__destinations = []
+        self.__closed = False
+        self.__cancelled = False
+
+    def add(self, chat_id, name, placeholder=None, reply_to=None, chain=False):
+        """Copies reply to reply_to; with chain each batch replies to the last copy."""
+        dest = Destination(chat_id, name, placeholder, reply_to, chain)
+        dest.worker = bot_loop.create_task(self.__worker(dest))
+        self.__destinations.append(dest)
+
+    def put(self, messages):
+        if self.__closed or self.__cancelled:
+            return
+        for dest in self.__destinations:
+            dest.pending.append(list(messages))
+            dest.wakeup.set()
+
+    async def close(self):
+        self.__closed = True
+        for dest in self.__destinations:
+            dest.wakeup.set()
+        await gather(*(dest.worker for dest in self.__destinations))
+
+    def cancel(self):
+        self.__cancelled = True
+        for dest in self.__destinations:
+            dest.pending.clear()
+            dest.wakeup.set()
+
+    @staticmethod
+    def __next_batch(dest):
+        from_chat = dest.pending[0][0].chat.id
+        batch = []
+        while (
+            dest.pending
+            and dest.pending[0][0].chat.id == from_chat
+            and (not batch or len(batch) + len(dest.pending[0]) <= BATCH_SIZE)
+        ):
+            batch.extend(dest.pending.pop(0))
+        return batch
+
+    async def __worker(self, dest):
+        while True:
+            await dest.wakeup.wait()
+            dest.wakeup.clear()
+            while dest.pending and not self.__cancelled:
+                await self.__send(dest, self.__next_batch(dest))
+            if self.__closed or self.__cancelled:
+                return
+
+    async def __send(self, dest, batch):
+        try:
+            copies = await self.__forward(dest.chat_id, batch, dest.reply_to)
+        except FloodWait as f:
+            LOGGER.warning(f"Copy to {dest.name}: {f}")
+            await sleep(f.value * 1.2)
+            dest.pending.insert(0, batch)
+            return
+        except MessageIdInvalid:
+            if len(batch) > 1:
+                dest.pending[:0] = [[m] for m in batch]
+            return
+        except (ChannelInvalid, PeerIdInvalid) as e:
+            LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {dest.chat_id}")
+            dest.pending.clear()
+            return
+        except Exception as err:
+            if not self.__cancelled:
+                LOGGER.error(f"Failed To Send in {dest.name}:\n{err!s}")
+            return
+        if dest.placeholder is not None:
+            await delete_message(dest.placeholder)
+            dest.placeholder = None
+        if dest.chain and copies:
+            dest.reply_to = copies[-1][1].id
+        for source, copied in copies:
+            if source.reply_markup and copied.reply_markup != source.reply_markup:
+                await self.__edit_markup(copied, source.reply_markup)
+
+    async def __edit_markup(self, message, markup):
+        try:
+            with contextlib.suppress(MessageNotModified):
+                await message.edit_reply_markup(markup)
+        except FloodWait as f:
+            await sleep(f.value * 1.2)
+            with contextlib.suppress(Exception):
+                await message.edit_reply_markup(markup)
+        except Exception as err:
+            LOGGER.error(f"Failed to edit buttons in {message.chat.id}: {err}")
+
+    async def __forward(self, chat_id, batch, reply_to=None):
+        """(source, copy) pairs, matched through the random ids of the request."""
+        client = self.__client
+        random_ids = [client.rnd_id() for _ in batch]
+        r = await client.invoke(
+            raw.functions.messages.ForwardMessages(
+                to_peer=await client.resolve_peer(chat_id),
+                from_peer=await client.resolve_peer(batch[0].chat.id),
+                id=[m.id for m in batch],
+                random_id=random_ids,
+                drop_author=True,
+                reply_to=raw.types.InputReplyToMessage(reply_to_msg_id=reply_to)
+                if reply_to
+                else None,
+            )
+        )
+        users = {i.id: i for i in r.users}
+        chats = {i.id: i for i in r.chats}
+        new_ids = {
+            u.random_id: u.id
+            for u in r.updates
+            if isinstance(u, raw.types.UpdateMessageID)
+        }
+        copies = {
+            u.message.id: await types.Message._parse(client, u.message, users, chats)
+            for u in r.updates
+            if isinstance(u, NEW_MESSAGE_UPDATES)
+        }
+        return [
+            (source, copies[new_id])
+            for source, random_id in zip(batch, random_ids)
+            if (new_id := new_ids.get(random_id)) in copies
+        ]
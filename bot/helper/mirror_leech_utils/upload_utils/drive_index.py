@@ -0,0 +1,375 @@
+import sqlite3
+from os import path as ospath
+from time import time
+from logging import getLogger
+from threading import Lock, Thread
+
+LOGGER = getLogger(__name__)
+
+# resolved once at import so a later chdir can not move the index
+INDEX_DB = ospath.abspath("drive_index.db")
+INDEX_REFRESH = 10
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+FILE_FIELDS = "id, name, mimeType, size, parents, trashed, driveId, ownedByMe"
+
+
+class DriveIndex:
+    def __init__(self, path=INDEX_DB):
+        self.__path = path
+        self.__conn = None
+        self.__fts = True
+        self.__lock = Lock()
+        self.__refreshed = {}
+        self.__building = set()
+        self.__refreshing = set()
+        self.__roots = {}
+
+    def __connect(self):
+        if self.__conn is not None:
+            return self.__conn
+        conn = sqlite3.connect(self.__path, check_same_thread=False)
+        conn.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS drives (
+                drive_id TEXT PRIMARY KEY, page_token TEXT
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                id TEXT, drive_id TEXT, name TEXT, mime_type TEXT,
+                size INTEGER, parent TEXT, PRIMARY KEY (drive_id, id)
+            );
+            CREATE INDEX IF NOT EXISTS files_name ON files (drive_id, name);
+            CREATE INDEX IF NOT EXISTS files_parent ON files (drive_id, parent);
+            """
+        )
+        try:
+            conn.executescript(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+                    name, content='files', content_rowid='rowid'
+                );
+                CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+                    INSERT INTO files_fts (rowid, name) VALUES (new.rowid, new.name);
+                END;
+                CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+                    INSERT INTO files_fts (files_fts, rowid, name)
+                    VALUES ('delete', old.rowid, old.name);
+                END;
+                CREATE TRIGGER IF NOT EXISTS files_au AFTER UPDATE ON files BEGIN
+                    INSERT INTO files_fts (files_fts, rowid, name)
+                    VALUES ('delete', old.rowid, old.name);
+                    INSERT INTO files_fts (rowid, name) VALUES (new.rowid, new.name);
+                END;
+                """
+            )
+        except sqlite3.OperationalError as e:
+            LOGGER.warning(f"{e}: Drive index will search names without FTS5")
+            self.__fts = False
+        self.__conn = conn
+        return conn
+
+    @staticmethod
+    def __scope(dir_id):
+        if dir_id == "root":
+            return "root"
+        return "folder" if len(dir_id) > 23 else "drive"
+
+    def __belongs(self, dir_id, file):
+        scope = self.__scope(dir_id)
+        if file.get("trashed"):
+            return False
+        if scope == "drive":
+            return file.get("driveId") == dir_id
+        if scope == "folder":
+            return dir_id in file.get("parents", [])
+        return bool(file.get("ownedByMe")) and not file.get("driveId")
+
+    def __upsert(self, conn, dir_id, file):
+        size = file.get("size")
+        conn.execute(
+            "INSERT INTO files (id, drive_id, name, mime_type, size, parent) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (drive_id, id) DO UPDATE SET "
+            "name = excluded.name, mime_type = excluded.mime_type, "
+            "size = excluded.size, parent = excluded.parent",
+            (
+                file["id"],
+                dir_id,
+                file.get("name", ""),
+                file.get("mimeType", ""),
+                None if size is None else int(size),
+                (file.get("parents") or [None])[0],
+            ),
+        )
+
+    def __change_args(self, dir_id):
+        if self.__scope(dir_id) == "drive":
+            return {"driveId": dir_id, "supportsAllDrives": True}
+        if self.__scope(dir_id) == "root":
+            return {}
+        return {"supportsAllDrives": True}
+
+    def __build(self, service, conn, dir_id):
+        LOGGER.info(f"Building Drive index for: {dir_id}")
+        if self.__scope(dir_id) == "root":
+            self.__resolve_root(service)
+        start_token = (
+            service.changes()
+            .getStartPageToken(**self.__change_args(dir_id))
+            .execute()["startPageToken"]
+        )
+        scope = self.__scope(dir_id)
+        if scope == "drive":
+            kwargs = {
+                "driveId": dir_id,
+                "corpora": "drive",
+                "includeItemsFromAllDrives": True,
+                "supportsAllDrives": True,
+                "q": "trashed = false",
+            }
+        elif scope == "folder":
+            kwargs = {
+                "includeItemsFromAllDrives": True,
+                "supportsAllDrives": True,
+                "q": f"'{dir_id}' in parents and trashed = false",
+            }
+        else:
+            kwargs = {"q": "'me' in owners and trashed = false"}
+        conn.execute("DELETE FROM files WHERE drive_id = ?", (dir_id,))
+        conn.commit()
+        page_token = None
+        while True:
+            response = (
+                service.files()
+                .list(
+                    spaces="drive",
+                    pageSize=1000,
+                    fields=f"nextPageToken, files({FILE_FIELDS})",
+                    pageToken=page_token,
+                    **kwargs,
+                )
+                .execute()
+            )
+            for file in response.get("files", []):
+                self.__upsert(conn, dir_id, file)
+            conn.commit()
+            page_token = response.get("nextPageToken")
+            if page_token is None:
+                break
+        conn.execute(
+            "INSERT OR REPLACE INTO drives (drive_id, page_token) VALUES (?, ?)",
+            (dir_id, start_token),
+        )
+        conn.commit()
+        LOGGER.info(f"Drive index built for: {dir_id}")
+
+    def __build_in_background(self, service, dir_id):
+        conn = None
+        try:
+            conn = sqlite3.connect(self.__path)
+            self.__build(service, conn, dir_id)
+        except Exception as e:
+            LOGGER.error(f"{e}: Drive index build failed for {dir_id}")
+        finally:
+            if conn is not None:
+                conn.close()
+            with self.__lock:
+                self.__building.discard(dir_id)
+
+    def __resolve_root(self, service):
+        if "root" not in self.__roots:
+            self.__roots["root"] = (
+                service.files().get(fileId="root", fields="id").execute()["id"]
+            )
+
+    def __fetch_changes(self, service, dir_id, page_token):
+        args = self.__change_args(dir_id)
+        if args:
+            args["includeItemsFromAllDrives"] = True
+        else:
+            args["restrictToMyDrive"] = True
+        changes = []
+        new_token = None
+        while page_token is not None:
+            response = (
+                service.changes()
+                .list(
+                    pageToken=page_token,
+                    pageSize=1000,
+                    spaces="drive",
+                    fields="nextPageToken, newStartPageToken, changes(fileId, "
+                    f"removed, file({FILE_FIELDS}))",
+                    **args,
+                )
+                .execute()
+            )
+            changes.extend(response.get("changes", []))
+            new_token = response.get("newStartPageToken") or new_token
+            page_token = response.get("nextPageToken")
+        return changes, new_token
+
+    def __apply_changes(self, conn, dir_id, changes, new_token):
+        for change in changes:
+            file = change.get("file")
+            if change.get("removed") or file is None:
+                conn.execute(
+                    "DELETE FROM files WHERE drive_id = ? AND id = ?",
+                    (dir_id, change["fileId"]),
+                )
+            elif self.__belongs(dir_id, file):
+                self.__upsert(conn, dir_id, file)
+            else:
+                conn.execute(
+                    "DELETE FROM files WHERE drive_id = ? AND id = ?",
+                    (dir_id, file["id"]),
+                )
+        if new_token:
+            conn.execute(
+                "UPDATE drives SET page_token = ? WHERE drive_id = ?",
+                (new_token, dir_id),
+            )
+        conn.commit()
+
+    def __due(self, service, conn, dir_id):
+        """Page token to refresh from, None when fresh; False while building."""
+        row = conn.execute(
+            "SELECT page_token FROM drives WHERE drive_id = ?", (dir_id,)
+        ).fetchone()
+        if row is None:
+            if dir_id not in self.__building:
+                self.__building.add(dir_id)
+                Thread(
+                    target=self.__build_in_background,
+                    args=(service, dir_id),
+                    daemon=True,
+                ).start()
+            return False
+        if (
+            dir_id in self.__refreshing
+            or time() - self.__refreshed.get(dir_id, 0) < INDEX_REFRESH
+        ):
+            return None
+        self.__refreshing.add(dir_id)
+        return row[0]
+
+    def __refresh(self, service, dir_id):
+        """Catch up with drive changes; False while the index is still built."""
+        with self.__lock:
+            conn = self.__connect()
+            if (page_token := self.__due(service, conn, dir_id)) is False:
+                return False
+        if page_token is None:
+            return True
+        try:
+            # network calls run unlocked, only applying the result is locked
+            if self.__scope(dir_id) == "root":
+                self.__resolve_root(service)
+            changes, new_token = self.__fetch_changes(service, dir_id, page_token)
+            with self.__lock:
+                self.__apply_changes(conn, dir_id, changes, new_token)
+                self.__refreshed[dir_id] = time()
+        finally:
+            with self.__lock:
+                self.__refreshing.discard(dir_id)
+        return True
+
+    def record(self, dir_id, file):
+        """Index an item the bot uploaded into dir_id without a drive refresh."""
+        with self.__lock:
+            if self.__conn is None or (
+                self.__conn.execute(
+                    "SELECT 1 FROM drives WHERE drive_id = ?", (dir_id,)
+                ).fetchone()
+                is None
+            ):
+                return
+            self.__upsert(
+                self.__conn,
+                dir_id,
+                {**file, "parents": [self.__roots.get(dir_id, dir_id)]},
+            )
+            self.__conn.commit()
+
+    def __match(self, file_name):
+        if self.__fts:
+            tokens = [
+                '"{}"*'.format(token.replace('"', '""'))
+                for token in file_name.split()
+            ]
+            return (
+                "rowid IN (SELECT rowid FROM files_fts WHERE files_fts MATCH ?)",
+                [" AND ".join(tokens)],
+            )
+        clauses = " AND ".join("name LIKE ?" for _ in file_name.split())
+        return clauses, [f"%{token}%" for token in file_name.split()]
+
+    def search(self, service, dir_id, file_name, stop_dup, is_recursive, item_type):
+        if not file_name.strip():
+            return None
+        try:
+            if not self.__refresh(service, dir_id):
+                return None
+        except Exception as e:
+            LOGGER.error(f"{e}: Drive index unavailable for {dir_id}")
+            return None
+        with self.__lock:
+            conn = self.__connect()
+            query = "SELECT id, name, mime_type, size, parent FROM files WHERE "
+            query += "drive_id = ?"
+            args = [dir_id]
+            if not is_recursive:
+                query += " AND parent = ?"
+                args.append(self.__roots.get(dir_id, dir_id))
+            if stop_dup:
+                query += " AND name = ?"
+                args.append(file_name)
+            else:
+                clause, params = self.__match(file_name)
+                query += f" AND {clause}"
+                args.extend(params)
+                if item_type == "files":
+                    query += " AND mime_type != ?"
+                    args.append(FOLDER_MIME_TYPE)
+                elif item_type == "folders":
+                    query += " AND mime_type = ?"
+                    args.append(FOLDER_MIME_TYPE)
+            query += " ORDER BY mime_type != ?, name LIMIT ?"
+            args.extend([FOLDER_MIME_TYPE, 200 if dir_id == "root" else 150])
+            rows = conn.execute(query, args).fetchall()
+        files = []
+        for file_id, name, mime_type, size, parent in rows:
+            file = {"id": file_id, "name": name, "mimeType": mime_type}
+            if size is not None:
+                file["size"] = str(size)
+            if parent is not None:
+                file["parents"] = [parent]
+            files.append(file)
+        return {"files": files}
+
+    def path(self, dir_id, file):
+        with self.__lock:
+            if self.__conn is None:
+                return None
+            names = []
+            while file.get("id") != dir_id:
+                names.append(file.get("name"))
+                if not (parents := file.get("parents")):
+                    return None
+                row = self.__conn.execute(
+                    "SELECT id, name, parent FROM files WHERE drive_id = ? "
+                    "AND id = ?",
+                    (dir_id, parents[0]),
+                ).fetchone()
+                if row is None:
+                    if parents[0] == dir_id or self.__scope(dir_id) == "root":
+                        break
+                    return None
+                file = {
+                    "id": row[0],
+                    "name": row[1],
+                    "parents": [row[2]] if row[2] else [],
+                }
+        names.reverse()
+        return names
+
+
+drive_index = DriveIndex()
@@ -0,0 +1,129 @@
+from os import listdir
+from json import loads
+from queue import Empty, LifoQueue
+from pickle import load as pload
+from logging import getLogger
+from itertools import count
+from threading import Lock, BoundedSemaphore
+
+from httplib2 import Http
+from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+LOGGER = getLogger(__name__)
+
+OAUTH_SCOPE = ["https://www.googleapis.com/auth/drive"]
+TOKEN_FILE = "token.pickle"
+POOL_SIZE = 4
+
+
+class PooledHttp:
+    """Thread-safe http for one account; each request borrows a pooled client."""
+
+    def __init__(self, credentials, size=POOL_SIZE):
+        self.__credentials = credentials
+        self.__slots = BoundedSemaphore(size)
+        self.__idle = LifoQueue()
+        self.__primary = self.__new()
+
+    def __new(self):
+        http = Http()
+        if self.__credentials is not None:
+            http = AuthorizedHttp(self.__credentials, http=http)
+        return http
+
+    def request(self, *args, **kwargs):
+        with self.__slots:
+            try:
+                http = self.__idle.get_nowait()
+            except Empty:
+                http = self.__new()
+            try:
+                return http.request(*args, **kwargs)
+            finally:
+                self.__idle.put(http)
+
+    def close(self):
+        while not self.__idle.empty():
+            self.__idle.get_nowait().close()
+
+    def __getattr__(self, name):
+        return getattr(self.__primary, name)
+
+
+class DriveServicePool:
+    def __init__(self):
+        self.__lock = Lock()
+        self.__document = None
+        self.__credentials = {}
+        self.__clients = {}
+        self.__accounts = None
+        self.__next_account = count()
+
+    def __discovery(self):
+        with self.__lock:
+            if self.__document is None:
+                if (document := get_static_doc("drive", "v3")) is None:
+                    return None
+                self.__document = loads(document)
+            return self.__document
+
+    def __load_credentials(self, account):
+        if account is None:
+            return None
+        if account == TOKEN_FILE:
+            with open(TOKEN_FILE, "rb") as f:
+                return pload(f)
+        return service_account.Credentials.from_service_account_file(
+            f"accounts/{account}", scopes=OAUTH_SCOPE
+        )
+
+    def credentials(self, account):
+        with self.__lock:
+            if account not in self.__credentials:
+                self.__credentials[account] = self.__load_credentials(account)
+            return self.__credentials[account]
+
+    def service_accounts(self):
+        with self.__lock:
+            if self.__accounts is None:
+                self.__accounts = listdir("accounts")
+            return self.__accounts
+
+    def next_index(self, sa_number):
+        with self.__lock:
+            return next(self.__next_account) % sa_number
+
+    def service(self, account):
+        with self.__lock:
+            if (client := self.__clients.get(account)) is not None:
+                return client
+        http = PooledHttp(self.credentials(account))
+        if (document := self.__discovery()) is not None:
+            client = build_from_document(document, http=http)
+        else:
+            LOGGER.warning("Static drive v3 discovery document missing, fetching it")
+            client = build(
+                "drive",
+                "v3",
+                http=http,
+                cache_discovery=False,
+                static_discovery=False,
+            )
+        with self.__lock:
+            return self.__clients.setdefault(account, client)
+
+    def clear(self):
+        with self.__lock:
+            self.__credentials.clear()
+            clients = list(self.__clients.values())
+            self.__clients.clear()
+            self.__accounts = None
+        for client in clients:
+            client.close()
+        LOGGER.info("Drive service pool cleared")
+
+
+drive_service = DriveServicePool()
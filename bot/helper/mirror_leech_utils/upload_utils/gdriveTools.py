@@ -1,15 +1,20 @@
 import contextlib
 from io import FileIO
 from os import path as ospath
+from os import walk, listdir, makedirs
 from os import remove as osremove
-from os import listdir, makedirs
 from re import search as re_search
 from time import time
-from pickle import load as pload
-from random import randrange
+from queue import SimpleQueue
 from logging import ERROR, getLogger
 from urllib.parse import quote as rquote
 from urllib.parse import parse_qs, urlparse
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait,
+    as_completed,
+)
 
 from tenacity import (
     RetryError,
@@ -18,10 +23,8 @@ from tenacity import (
     stop_after_attempt,
     retry_if_exception_type,
 )
-from google.oauth2 import service_account
 from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
 from googleapiclient.errors import HttpError
-from googleapiclient.discovery import build
 
 from bot import GLOBAL_EXTENSION_FILTER, config_dict, list_drives_dict
 from bot.helper.aeon_utils.metadata import add_attachment
@@ -32,14 +35,18 @@ from bot.helper.ext_utils.bot_utils import (
     get_readable_file_size,
 )
 from bot.helper.ext_utils.files_utils import process_file, get_mime_type
+from bot.helper.mirror_leech_utils.upload_utils.drive_index import drive_index
+from bot.helper.mirror_leech_utils.upload_utils.drive_service import drive_service
 
 LOGGER = getLogger(__name__)
 getLogger("googleapiclient.discovery").setLevel(ERROR)
 
+TREE_WALK_WORKERS = 8
+BATCH_SIZE = 100
+
 
 class GoogleDriveHelper:
     def __init__(self, name=None, path=None, listener=None):
-        self.__OAUTH_SCOPE = ["https://www.googleapis.com/auth/drive"]
         self.__G_DRIVE_DIR_MIME_TYPE = "application/vnd.google-apps.folder"
         self.__G_DRIVE_BASE_DOWNLOAD_URL = (
             "https://drive.google.com/uc?id={}&export=download"
@@ -69,6 +76,7 @@ class GoogleDriveHelper:
         self.__sa_count = 1
         self.__sa_number = 100
         self.__service = self.__authorize()
+        self.__workers = []
         self.__file_processed_bytes = 0
         self.__processed_bytes = 0
         self.name = name
@@ -76,44 +84,41 @@ class GoogleDriveHelper:
     @property
     def speed(self):
         try:
-            return self.__processed_bytes / self.__total_time
+            return self.processed_bytes / self.__total_time
         except Exception:
             return 0
 
     @property
     def processed_bytes(self):
-        return self.__processed_bytes
+        return self.__processed_bytes + sum(
+            worker.processed_bytes for worker in self.__workers
+        )
 
-    def __authorize(self):
-        credentials = None
+    def __authorize(self, sa_index=None):
+        account = None
         if config_dict["USE_SERVICE_ACCOUNTS"]:
-            json_files = listdir("accounts")
+            json_files = drive_service.service_accounts()
             self.__sa_number = len(json_files)
-            self.__sa_index = randrange(self.__sa_number)
-            LOGGER.info(
-                f"Authorizing with {json_files[self.__sa_index]} service account"
-            )
-            credentials = service_account.Credentials.from_service_account_file(
-                f"accounts/{json_files[self.__sa_index]}", scopes=self.__OAUTH_SCOPE
+            self.__sa_index = (
+                drive_service.next_index(self.__sa_number)
+                if sa_index is None
+                else sa_index % self.__sa_number
             )
+            account = json_files[self.__sa_index]
+            LOGGER.info(f"Authorizing with {account} service account")
         elif ospath.exists("token.pickle"):
             LOGGER.info("Authorize with token.pickle")
-            with open("token.pickle", "rb") as f:
-                credentials = pload(f)
+            account = "token.pickle"
         else:
             LOGGER.error("token.pickle not found!")
-        return build("drive", "v3", credentials=credentials, cache_discovery=False)
+        return drive_service.service(account)
 
     def __alt_authorize(self):
         if not self.__alt_auth:
             self.__alt_auth = True
             if ospath.exists("token.pickle"):
                 LOGGER.info("Authorize with token.pickle")
-                with open("token.pickle", "rb") as f:
-                    credentials = pload(f)
-                return build(
-                    "drive", "v3", credentials=credentials, cache_discovery=False
-                )
+                return drive_service.service("token.pickle")
             LOGGER.error("token.pickle not found!")
         return None
 
@@ -124,7 +129,7 @@ class GoogleDriveHelper:
             self.__sa_index += 1
         self.__sa_count += 1
         LOGGER.info(f"Switching to {self.__sa_index} index")
-        self.__service = self.__authorize()
+        self.__service = self.__authorize(self.__sa_index)
 
     @staticmethod
     def getIdFromUrl(link):
@@ -186,7 +191,7 @@ class GoogleDriveHelper:
                     includeItemsFromAllDrives=True,
                     q=f"'{folder_id}' in parents and trashed = false",
                     spaces="drive",
-                    pageSize=200,
+                    pageSize=1000,
                     fields="nextPageToken, files(id, name, mimeType, size, shortcutDetails)",
                     orderBy="folder, name",
                     pageToken=page_token,
@@ -210,6 +215,10 @@ class GoogleDriveHelper:
             )
             self.__processed_bytes += chunk_size
             self.__total_time += self.__update_interval
+        elif any(worker.__status is not None for worker in self.__workers):
+            self.__total_time += self.__update_interval
+        for worker in self.__workers:
+            await worker.__progress()
 
     def deletefile(self, link: str):
         try:
@@ -264,7 +273,13 @@ class GoogleDriveHelper:
                 dir_id = self.__create_directory(
                     ospath.basename(ospath.abspath(file_name)), gdrive_id
                 )
-                result = self.__upload_dir(item_path, dir_id)
+                workers = config_dict["GDRIVE_UPLOAD_WORKERS"]
+                if workers and workers > 1:
+                    result = self.__upload_dir_concurrently(
+                        item_path, dir_id, workers
+                    )
+                else:
+                    result = self.__upload_dir(item_path, dir_id)
                 if result is None:
                     raise Exception("Upload has been manually cancelled!")
                 link = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(dir_id)
@@ -322,6 +337,95 @@ class GoogleDriveHelper:
                 break
         return new_id
 
+    def __fork(self, sa_index):
+        worker = GoogleDriveHelper(self.name, self.__path, self.__listener)
+        if self.__alt_auth:
+            worker.__service = worker.__alt_authorize()
+        elif config_dict["USE_SERVICE_ACCOUNTS"]:
+            worker.__service = worker.__authorize(sa_index)
+        return worker
+
+    def __run_pool(self, tasks, workers=TREE_WALK_WORKERS):
+        helpers = SimpleQueue()
+        self.__workers = [
+            self.__fork(self.__sa_index + index + 1) for index in range(workers)
+        ]
+        for worker in self.__workers:
+            helpers.put(worker)
+
+        def run(func, *args):
+            helper = helpers.get()
+            try:
+                return func(helper, *args)
+            finally:
+                helpers.put(helper)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {executor.submit(run, *task) for task in tasks}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if (err := future.exception()) is not None:
+                        for worker in self.__workers:
+                            worker.__is_cancelled = True
+                        raise err
+                    if not self.__is_cancelled:
+                        pending |= {
+                            executor.submit(run, *task)
+                            for task in future.result() or []
+                        }
+
+    def __upload_worker(self, jobs):
+        while not self.__is_cancelled and (job := jobs.get()) is not None:
+            file_path, file_name, dest_id = job
+            mime_type = get_mime_type(file_path)
+            self.__upload_file(file_path, file_name, mime_type, dest_id)
+            self.__total_files += 1
+
+    def __upload_dir_concurrently(self, input_directory, dest_id, workers):
+        folder_ids = {input_directory: dest_id}
+        jobs = SimpleQueue()
+        for dirpath, dirnames, filenames in walk(input_directory):
+            for dirname in dirnames:
+                folder_ids[ospath.join(dirpath, dirname)] = self.__create_directory(
+                    dirname, folder_ids[dirpath]
+                )
+                self.__total_folders += 1
+                if self.__is_cancelled:
+                    return None
+            for file_name in filenames:
+                file_path = ospath.join(dirpath, file_name)
+                if file_name.lower().endswith(tuple(GLOBAL_EXTENSION_FILTER)):
+                    osremove(file_path)
+                    continue
+                jobs.put((file_path, file_name, folder_ids[dirpath]))
+        if jobs.empty():
+            return dest_id
+        self.__workers = [
+            self.__fork(self.__sa_index + index + 1)
+            for index in range(min(workers, jobs.qsize()))
+        ]
+        LOGGER.info(
+            f"Uploading {jobs.qsize()} files with {len(self.__workers)} workers"
+        )
+        for _ in self.__workers:
+            jobs.put(None)
+        with ThreadPoolExecutor(max_workers=len(self.__workers)) as executor:
+            futures = [
+                executor.submit(worker.__upload_worker, jobs)
+                for worker in self.__workers
+            ]
+            for future in as_completed(futures):
+                if (err := future.exception()) is not None:
+                    for worker in self.__workers:
+                        worker.__is_cancelled = True
+                    raise err
+        for worker in self.__workers:
+            self.__total_files += worker.__total_files
+        if self.__is_cancelled:
+            return None
+        return dest_id
+
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
@@ -343,6 +447,7 @@ class GoogleDriveHelper:
             .create(body=file_metadata, supportsAllDrives=True)
             .execute()
         )
+        drive_index.record(dest_id, file)
         file_id = file.get("id")
         LOGGER.info(
             f'Created G-Drive Folder:\nName: {file.get("name")}\nID: {file_id}'
@@ -380,6 +485,7 @@ class GoogleDriveHelper:
                 )
                 .execute()
             )
+            drive_index.record(dest_id, {**response, "size": 0})
             drive_file = (
                 self.__service.files()
                 .get(fileId=response["id"], supportsAllDrives=True)
@@ -431,6 +537,7 @@ class GoogleDriveHelper:
                     raise err
         if self.__is_cancelled:
             return None
+        drive_index.record(dest_id, {**response, "size": ospath.getsize(file_path)})
         if not self.__listener.seed or self.__listener.newDir:
             with contextlib.suppress(Exception):
                 osremove(file_path)
@@ -462,16 +569,27 @@ class GoogleDriveHelper:
             mime_type = meta.get("mimeType")
             if mime_type == self.__G_DRIVE_DIR_MIME_TYPE:
                 dir_id = self.__create_directory(meta.get("name"), gdrive_id)
-                self.__cloneFolder(
-                    meta.get("name"), meta.get("name"), meta.get("id"), dir_id
+                self.__run_pool(
+                    [
+                        (
+                            GoogleDriveHelper.__cloneFolder,
+                            self,
+                            meta.get("name"),
+                            meta.get("id"),
+                            dir_id,
+                        )
+                    ]
                 )
+                for worker in self.__workers:
+                    self.__total_files += worker.__total_files
+                    self.__total_folders += worker.__total_folders
                 durl = self.__G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(dir_id)
                 if self.__is_cancelled:
                     LOGGER.info("Deleting cloned data from Drive...")
                     self.deletefile(durl)
                     return None, None, None, None, None
                 mime_type = "Folder"
-                size = self.__processed_bytes
+                size = self.processed_bytes
             else:
                 file = self.__copyFile(meta.get("id"), gdrive_id, meta.get("name"))
                 msg += f'<b>Name: </b><code>{file.get("name")}</code>'
@@ -500,29 +618,36 @@ class GoogleDriveHelper:
             async_to_sync(self.__listener.onUploadError, msg)
             return None, None, None, None, None
 
-    def __cloneFolder(self, name, local_path, folder_id, dest_id):
+    def __cloneFolder(self, parent, local_path, folder_id, dest_id):
         LOGGER.info(f"Syncing: {local_path}")
-        files = self.getFilesByFolderId(folder_id)
-        if len(files) == 0:
-            return dest_id
-        for file in files:
+        tasks = []
+        for file in self.getFilesByFolderId(folder_id):
+            if self.__is_cancelled:
+                break
             if file.get("mimeType") == self.__G_DRIVE_DIR_MIME_TYPE:
                 self.__total_folders += 1
                 file_path = ospath.join(local_path, file.get("name"))
                 current_dir_id = self.__create_directory(file.get("name"), dest_id)
-                self.__cloneFolder(
-                    file.get("name"), file_path, file.get("id"), current_dir_id
+                tasks.append(
+                    (
+                        GoogleDriveHelper.__cloneFolder,
+                        parent,
+                        file_path,
+                        file.get("id"),
+                        current_dir_id,
+                    )
                 )
             elif (
                 not file.get("name").lower().endswith(tuple(GLOBAL_EXTENSION_FILTER))
             ):
-                self.__total_files += 1
-                self.__copyFile(file.get("id"), dest_id, file.get("name"))
-                self.__processed_bytes += int(file.get("size", 0))
-                self.__total_time = int(time() - self.__start_time)
-            if self.__is_cancelled:
-                break
-        return None
+                tasks.append((GoogleDriveHelper.__clone_file, parent, file, dest_id))
+        return tasks
+
+    def __clone_file(self, parent, file, dest_id):
+        self.__total_files += 1
+        self.__copyFile(file.get("id"), dest_id, file.get("name"))
+        self.__processed_bytes += int(file.get("size", 0))
+        parent.__total_time = int(time() - parent.__start_time)
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
@@ -574,6 +699,10 @@ class GoogleDriveHelper:
         return estr.strip()
 
     def __get_recursive_list(self, file, rootid):
+        if config_dict["USE_DRIVE_INDEX"] and (
+            names := drive_index.path(rootid, file)
+        ):
+            return names
         rtnlist = []
         if rootid == "root":
             rootid = (
@@ -683,6 +812,7 @@ class GoogleDriveHelper:
         self, fileName, stopDup=False, noMulti=False, isRecursive=True, itemType=""
     ):
         msg = ""
+        raw_name = str(fileName).strip()
         fileName = self.__escapes(str(fileName))
         contents_no = 0
         telegraph_content = []
@@ -695,9 +825,15 @@ class GoogleDriveHelper:
             dir_id = drives_dict["drive_id"]
             index_url = drives_dict["index_link"]
             isRecur = False if isRecursive and len(dir_id) > 23 else isRecursive
-            response = self.__drive_query(
-                dir_id, fileName, stopDup, isRecur, itemType
-            )
+            response = None
+            if config_dict["USE_DRIVE_INDEX"]:
+                response = drive_index.search(
+                    self.__service, dir_id, raw_name, stopDup, isRecur, itemType
+                )
+            if response is None:
+                response = self.__drive_query(
+                    dir_id, fileName, stopDup, isRecur, itemType
+                )
             if not response["files"]:
                 if noMulti:
                     break
@@ -796,7 +932,11 @@ class GoogleDriveHelper:
         LOGGER.info(f"Counting: {name}")
         mime_type = meta.get("mimeType")
         if mime_type == self.__G_DRIVE_DIR_MIME_TYPE:
-            self.__gDrive_directory(meta)
+            self.__run_pool([(GoogleDriveHelper.__gDrive_directory, meta)])
+            for worker in self.__workers:
+                self.__total_bytes += worker.__total_bytes
+                self.__total_files += worker.__total_files
+                self.__total_folders += worker.__total_folders
             mime_type = "Folder"
         else:
             if mime_type is None:
@@ -815,24 +955,44 @@ class GoogleDriveHelper:
         size = int(filee.get("size", 0))
         self.__total_bytes += size
 
+    def __resolve_shortcuts(self, shortcuts):
+        resolved = []
+
+        def callback(_, response, exception):
+            if exception is not None:
+                LOGGER.error(f"Unable to resolve shortcut: {exception}")
+            else:
+                resolved.append(response)
+
+        for index in range(0, len(shortcuts), BATCH_SIZE):
+            batch = self.__service.new_batch_http_request(callback=callback)
+            for shortcut in shortcuts[index : index + BATCH_SIZE]:
+                batch.add(
+                    self.__service.files().get(
+                        fileId=shortcut["shortcutDetails"]["targetId"],
+                        supportsAllDrives=True,
+                        fields="name, id, mimeType, size",
+                    )
+                )
+            batch.execute()
+        return resolved
+
     def __gDrive_directory(self, drive_folder):
         files = self.getFilesByFolderId(drive_folder["id"])
-        if len(files) == 0:
-            return
+        shortcuts = [filee for filee in files if filee.get("shortcutDetails")]
+        if shortcuts:
+            files = [
+                filee for filee in files if not filee.get("shortcutDetails")
+            ] + self.__resolve_shortcuts(shortcuts)
+        tasks = []
         for filee in files:
-            shortcut_details = filee.get("shortcutDetails")
-            if shortcut_details is not None:
-                mime_type = shortcut_details["targetMimeType"]
-                file_id = shortcut_details["targetId"]
-                filee = self.__getFileMetadata(file_id)
-            else:
-                mime_type = filee.get("mimeType")
-            if mime_type == self.__G_DRIVE_DIR_MIME_TYPE:
+            if filee.get("mimeType") == self.__G_DRIVE_DIR_MIME_TYPE:
                 self.__total_folders += 1
-                self.__gDrive_directory(filee)
+                tasks.append((GoogleDriveHelper.__gDrive_directory, filee))
             else:
                 self.__total_files += 1
                 self.__gDrive_file(filee)
+        return tasks
 
     def download(self, link):
         self.__is_downloading = True
@@ -958,6 +1118,8 @@ class GoogleDriveHelper:
 
     async def cancel_download(self):
         self.__is_cancelled = True
+        for worker in self.__workers:
+            worker.__is_cancelled = True
         if self.__is_downloading:
             LOGGER.info(f"Cancelling Download: {self.name}")
             await self.__listener.onDownloadError("Download stopped by user!")
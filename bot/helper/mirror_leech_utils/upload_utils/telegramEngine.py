@@ -1,9 +1,8 @@
-import contextlib
 from os import path as ospath
 from os import walk
 from re import match as re_match
 from time import time
-from asyncio import sleep
+from asyncio import Condition, sleep, gather
 from logging import ERROR, getLogger
 from traceback import format_exc
 
@@ -22,12 +21,7 @@ from aiofiles.os import mkdir, makedirs
 from aiofiles.os import remove as aioremove
 from aiofiles.os import rename as aiorename
 from pyrogram.types import InputMediaVideo, InputMediaDocument
-from pyrogram.errors import (
-    FloodWait,
-    PeerIdInvalid,
-    ChannelInvalid,
-    MessageNotModified,
-)
+from pyrogram.errors import FloodWait
 
 from bot import (
     IS_PREMIUM_USER,
@@ -37,6 +31,7 @@ from bot import (
     user_data,
     config_dict,
 )
+from bot.helper.ext_utils.cpu_pool import convert_to_jpeg
 from bot.helper.aeon_utils.metadata import add_attachment
 from bot.helper.ext_utils.bot_utils import (
     is_mkv,
@@ -64,11 +59,32 @@ from bot.helper.telegram_helper.message_utils import (
     sendMultiMessage,
     get_tg_link_content,
 )
+from bot.helper.mirror_leech_utils.upload_utils.copy_fanout import CopyFanout
 
 LOGGER = getLogger(__name__)
 getLogger("pyrogram").setLevel(ERROR)
 
 
+class PostOrder:
+    """Lets concurrent upload workers post their messages in file order."""
+
+    def __init__(self):
+        self.__done = set()
+        self.__next = 0
+        self.__changed = Condition()
+
+    async def wait(self, index):
+        async with self.__changed:
+            await self.__changed.wait_for(lambda: self.__next >= index)
+
+    async def release(self, index):
+        async with self.__changed:
+            self.__done.add(index)
+            while self.__next in self.__done:
+                self.__next += 1
+            self.__changed.notify_all()
+
+
 class TgUploader:
     def __init__(self, name=None, path=None, listener=None):
         self.name = name
@@ -98,6 +114,13 @@ class TgUploader:
         self.__leechmsg = {}
         self.__files_utils = self.__listener.files_utils
         self.__thumb = f"Thumbnails/{listener.message.from_user.id}.jpg"
+        self.__workers = []
+        self.__is_worker = False
+        self.__flood_until = {}
+        self.__fanout = None
+        self.__order = None
+        self.__index = 0
+        self.__release = None
 
     async def get_custom_thumb(self, thumb):
         if is_telegram_link(thumb):
@@ -121,9 +144,7 @@ class TgUploader:
             if not await aiopath.isdir(path):
                 await mkdir(path)
             des_dir = ospath.join(path, f"{time()}.jpg")
-            await sync_to_async(
-                Image.open(photo_dir).convert("RGB").save, des_dir, "JPEG"
-            )
+            await sync_to_async(convert_to_jpeg, photo_dir, des_dir, kind="cpu")
             await aioremove(photo_dir)
             return des_dir
         return None
@@ -147,59 +168,27 @@ class TgUploader:
             LOGGER.error(f"MediaInfo Error: {e!s}")
         return buttons.column(1) if self.__has_buttons else None
 
-    async def __copy_file(self):
-        try:
-            if self.__bot_pm and (self.__leechmsg or self.__listener.isSuperGroup):
-                destination = "Bot PM"
-                copied = await bot.copy_message(
-                    chat_id=self.__user_id,
-                    from_chat_id=self.__sent_msg.chat.id,
-                    message_id=self.__sent_msg.id,
-                    reply_to_message_id=self.__listener.botpmmsg.id
-                    if self.__listener.botpmmsg
-                    else None,
-                )
-                if self.__has_buttons:
-                    rply = self.__sent_msg.reply_markup
-                    with contextlib.suppress(MessageNotModified):
-                        await copied.edit_reply_markup(rply)
-            if len(self.__leechmsg) > 1:
-                for chat_id, msg in list(self.__leechmsg.items())[1:]:
-                    destination = f"Leech Log: {chat_id}"
-                    self.__leechmsg[chat_id] = await bot.copy_message(
-                        chat_id=chat_id,
-                        from_chat_id=self.__sent_msg.chat.id,
-                        message_id=self.__sent_msg.id,
-                        reply_to_message_id=msg.id,
-                    )
-                    if msg.text:
-                        await delete_message(msg)
-                    if self.__has_buttons:
-                        with contextlib.suppress(MessageNotModified):
-                            await self.__leechmsg[chat_id].edit_reply_markup(
-                                self.__sent_msg.reply_markup
-                            )
-
-            if self.__ldump:
-                destination = "User Dump"
-                for channel_id in self.__ldump.split():
-                    chat = await chat_info(channel_id)
-                    try:
-                        dump_copy = await bot.copy_message(
-                            chat_id=chat.id,
-                            from_chat_id=self.__sent_msg.chat.id,
-                            message_id=self.__sent_msg.id,
-                        )
-                        if self.__has_buttons:
-                            rply = self.__sent_msg.reply_markup
-                            with contextlib.suppress(MessageNotModified):
-                                await dump_copy.edit_reply_markup(rply)
-                    except (ChannelInvalid, PeerIdInvalid) as e:
-                        LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {channel_id}")
-                        continue
-        except Exception as err:
-            if not self.__is_cancelled:
-                LOGGER.error(f"Failed To Send in {destination}:\n{err!s}")
+    async def __setup_fanout(self):
+        self.__fanout = CopyFanout(bot)
+        if self.__bot_pm and (self.__leechmsg or self.__listener.isSuperGroup):
+            self.__fanout.add(
+                self.__user_id,
+                "Bot PM",
+                reply_to=getattr(self.__listener.botpmmsg, "id", None),
+            )
+        for chat_id, msg in list(self.__leechmsg.items())[1:]:
+            self.__fanout.add(
+                chat_id,
+                f"Leech Log: {chat_id}",
+                msg if msg.text else None,
+                reply_to=msg.id,
+                chain=True,
+            )
+        for channel_id in self.__ldump.split():
+            if chat := await chat_info(channel_id):
+                self.__fanout.add(chat.id, f"User Dump: {channel_id}")
+            else:
+                LOGGER.error(f"Unable to resolve dump chat {channel_id}")
 
     async def __upload_progress(self, current, total):
         if self.__is_cancelled:
@@ -209,6 +198,9 @@ class TgUploader:
         chunk_size = current - self.__last_uploaded
         self.__last_uploaded = current
         self.__processed_bytes += chunk_size
+        if self.__order is not None and current >= total:
+            # the last part is in flight, hold the send until earlier files posted
+            await self.__order.wait(self.__index)
 
     async def __user_settings(self):
         user_dict = user_data.get(self.__user_id, {})
@@ -252,16 +244,27 @@ class TgUploader:
             self.__sent_msg = self.__listener.message
         return True
 
+    def __keep_source(self, dirpath):
+        if self.__release is not None:
+            return True
+        return (
+            self.__listener.seed
+            and not self.__listener.newDir
+            and not dirpath.endswith("/splited_files")
+        )
+
+    async def __discard(self, path):
+        if self.__release is None:
+            await aioremove(path)
+        else:
+            await self.__release(path)
+
     async def __prepare_file(self, prefile_, dirpath):
         file_, cap_mono = await process_file(prefile_, self.__user_id, dirpath)
         if (atc := self.__listener.attachment) and is_mkv(prefile_):
             file_ = await add_attachment(prefile_, dirpath, atc)
         if prefile_ != file_:
-            if (
-                self.__listener.seed
-                and not self.__listener.newDir
-                and not dirpath.endswith("/splited_files")
-            ):
+            if self.__keep_source(dirpath):
                 dirpath = f"{dirpath}/copied"
                 await makedirs(dirpath, exist_ok=True)
                 new_path = ospath.join(dirpath, file_)
@@ -286,11 +289,7 @@ class TgUploader:
             extn = len(ext)
             remain = 64 - extn
             name = name[:remain]
-            if (
-                self.__listener.seed
-                and not self.__listener.newDir
-                and not dirpath.endswith("/splited_files")
-            ):
+            if self.__keep_source(dirpath):
                 dirpath = f"{dirpath}/copied"
                 await makedirs(dirpath, exist_ok=True)
                 new_path = ospath.join(dirpath, f"{name}{ext}")
@@ -301,9 +300,9 @@ class TgUploader:
                 self.__up_path = new_path
         return cap_mono, file_
 
-    def __get_input_media(self, subkey, key):
+    def __get_input_media(self, msgs, key):
         rlist = []
-        for msg in self.__media_dict[key][subkey]:
+        for msg in msgs:
             if key == "videos":
                 input_media = InputMediaVideo(
                     media=msg.video.file_id, caption=msg.caption
@@ -323,7 +322,7 @@ class TgUploader:
 
     async def __send_media_group(self, subkey, key, msgs):
         msgs_list = await msgs[0].reply_to_message.reply_media_group(
-            media=self.__get_input_media(subkey, key),
+            media=self.__get_input_media(msgs, key),
             quote=True,
             disable_notification=True,
         )
@@ -331,126 +330,188 @@ class TgUploader:
             if msg.link in self.__msgs_dict:
                 del self.__msgs_dict[msg.link]
             await delete_message(msg)
-        del self.__media_dict[key][subkey]
+        self.__media_dict[key].pop(subkey, None)
         if self.__listener.isSuperGroup or config_dict["LEECH_DUMP_ID"]:
             for m in msgs_list:
                 self.__msgs_dict[m.link] = m.caption
         self.__sent_msg = msgs_list[-1]
+        self.__fanout.put(msgs_list)
+
+    async def __flush_group(self, subkey, key, msgs):
+        # group members are only copied once their group is final
+        if len(msgs) > 1:
+            await self.__send_media_group(subkey, key, msgs)
+        else:
+            self.__media_dict[key].pop(subkey, None)
+            self.__fanout.put(msgs)
+
+    async def __upload_path(self, dirpath, file_, o_files, m_size):
+        self.__up_path = src_path = ospath.join(dirpath, file_)
+        if file_.lower().endswith(tuple(GLOBAL_EXTENSION_FILTER)):
+            await self.__discard(self.__up_path)
+            return None
         try:
-            if self.__bot_pm and (self.__leechmsg or self.__listener.isSuperGroup):
-                destination = "Bot PM"
-                await bot.copy_media_group(
-                    chat_id=self.__user_id,
-                    from_chat_id=self.__sent_msg.chat.id,
-                    message_id=self.__sent_msg.id,
+            f_size = await aiopath.getsize(self.__up_path)
+            if self.__listener.seed and file_ in o_files and f_size in m_size:
+                return None
+            self.__total_files += 1
+            if f_size == 0:
+                LOGGER.error(
+                    f"{self.__up_path} size is zero, telegram don't upload zero size files"
                 )
-            if self.__ldump:
-                destination = "Dump"
-                for channel_id in self.__ldump.split():
-                    dump_chat = await chat_info(channel_id)
-                    try:
-                        await bot.copy_media_group(
-                            chat_id=dump_chat.id,
-                            from_chat_id=self.__sent_msg.chat.id,
-                            message_id=self.__sent_msg.id,
-                        )
-                    except (ChannelInvalid, PeerIdInvalid) as e:
-                        LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {channel_id}")
-                        continue
+                self.__corrupted += 1
+                return None
+            if self.__is_cancelled:
+                return None
+            self.__prm_media = f_size > 2097152000
+            cap_mono, file_ = await self.__prepare_file(file_, dirpath)
+            if self.__last_msg_in_group and not self.__is_worker:
+                group_lists = [x for v in self.__media_dict.values() for x in v]
+                if (
+                    match := re_match(
+                        r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+)", self.__up_path
+                    )
+                ) and match.group(0) not in group_lists:
+                    for key, value in list(self.__media_dict.items()):
+                        for subkey, msgs in list(value.items()):
+                            await self.__flush_group(subkey, key, msgs)
+            self.__last_msg_in_group = False
+            self.__last_uploaded = 0
+            await self.__switching_client()
+            if (wait := self.__flood_until.get(self.__client.name, 0) - time()) > 0:
+                await sleep(wait)
+            await self.__upload_file(cap_mono, file_)
+            if self.__is_cancelled or self.__is_corrupted:
+                return None
+            return file_
         except Exception as err:
-            if not self.__is_cancelled:
-                LOGGER.error(f"Failed To Send in {destination}:\n{err!s}")
+            if isinstance(err, RetryError):
+                LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
+            else:
+                LOGGER.error(f"{format_exc()}. Path: {self.__up_path}")
+            return None
+        finally:
+            if self.__release is not None:
+                if not self.__is_cancelled:
+                    if self.__up_path != src_path and await aiopath.exists(
+                        self.__up_path
+                    ):
+                        await aioremove(self.__up_path)
+                    await self.__release(src_path)
+            elif (
+                not self.__is_cancelled
+                and await aiopath.exists(self.__up_path)
+                and (
+                    not self.__listener.seed
+                    or self.__listener.newDir
+                    or dirpath.endswith("/splited_files")
+                    or "/copied/" in self.__up_path
+                )
+            ):
+                await aioremove(self.__up_path)
 
-    async def upload(self, o_files, m_size, size):
-        await self.__user_settings()
-        res = await self.__msg_to_reply()
-        if not res:
+    def __fork(self):
+        worker = TgUploader(self.name, self.__path, self.__listener)
+        worker.__is_worker = True
+        worker.__start_time = self.__start_time
+        worker.__as_doc = self.__as_doc
+        worker.__media_group = self.__media_group
+        worker.__bot_pm = self.__bot_pm
+        worker.__mediainfo = self.__mediainfo
+        worker.__ldump = self.__ldump
+        worker.__has_buttons = self.__has_buttons
+        worker.__thumb = self.__thumb
+        worker.__leechmsg = self.__leechmsg
+        worker.__media_dict = self.__media_dict
+        worker.__flood_until = self.__flood_until
+        worker.__fanout = self.__fanout
+        worker.__order = self.__order
+        return worker
+
+    async def __upload_worker(self, files, reply_to, results, o_files, m_size):
+        for index, (dirpath, file_) in files:
+            try:
+                if self.__is_cancelled:
+                    return
+                self.__index = index
+                self.__sent_msg = reply_to
+                if file_ := await self.__upload_path(
+                    dirpath, file_, o_files, m_size
+                ):
+                    results[index] = (self.__sent_msg.link, file_)
+            finally:
+                await self.__order.release(index)
+
+    async def __upload_concurrently(self, workers, o_files, m_size):
+        paths = [
+            (dirpath, file_)
+            for dirpath, _, files in sorted(await sync_to_async(walk, self.__path))
+            if not dirpath.endswith("/yt-dlp-thumb")
+            for file_ in natsorted(files)
+        ]
+        LOGGER.info(f"Uploading {len(paths)} files with {workers} workers")
+        files = iter(enumerate(paths))
+        results = {}
+        self.__order = PostOrder()
+        self.__workers = [self.__fork() for _ in range(min(workers, len(paths)))]
+        await gather(
+            *(
+                worker.__upload_worker(
+                    files, self.__sent_msg, results, o_files, m_size
+                )
+                for worker in self.__workers
+            )
+        )
+        for worker in self.__workers:
+            self.__total_files += worker.__total_files
+            self.__corrupted += worker.__corrupted
+        if self.__is_cancelled:
             return
-        isDeleted = False
+        if values_list := list(self.__leechmsg.values()):
+            await delete_message(values_list[0])
+        if self.__listener.isSuperGroup or config_dict["LEECH_DUMP_ID"]:
+            for index in sorted(results):
+                link, file_ = results[index]
+                self.__msgs_dict[link] = file_
+        for key, value in list(self.__media_dict.items()):
+            for subkey, group in list(value.items()):
+                msgs = natsorted(
+                    group, key=lambda m: (m.video or m.document).file_name or ""
+                )
+                for i in range(0, len(msgs), 10):
+                    await self.__flush_group(subkey, key, msgs[i : i + 10])
+
+    async def __walk_paths(self):
         for dirpath, _, files in sorted(await sync_to_async(walk, self.__path)):
             if dirpath.endswith("/yt-dlp-thumb"):
                 continue
             for file_ in natsorted(files):
-                self.__up_path = ospath.join(dirpath, file_)
-                if file_.lower().endswith(tuple(GLOBAL_EXTENSION_FILTER)):
-                    await aioremove(self.__up_path)
-                    continue
-                try:
-                    f_size = await aiopath.getsize(self.__up_path)
-                    if (
-                        self.__listener.seed
-                        and file_ in o_files
-                        and f_size in m_size
-                    ):
-                        continue
-                    self.__total_files += 1
-                    if f_size == 0:
-                        LOGGER.error(
-                            f"{self.__up_path} size is zero, telegram don't upload zero size files"
-                        )
-                        self.__corrupted += 1
-                        continue
-                    if self.__is_cancelled:
-                        return
-                    self.__prm_media = f_size > 2097152000
-                    cap_mono, file_ = await self.__prepare_file(file_, dirpath)
-                    if self.__last_msg_in_group:
-                        group_lists = [
-                            x for v in self.__media_dict.values() for x in v
-                        ]
-                        if (
-                            match := re_match(
-                                r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+)", self.__up_path
-                            )
-                        ) and match.group(0) not in group_lists:
-                            for key, value in list(self.__media_dict.items()):
-                                for subkey, msgs in list(value.items()):
-                                    if len(msgs) > 1:
-                                        await self.__send_media_group(
-                                            subkey, key, msgs
-                                        )
-                    self.__last_msg_in_group = False
-                    self.__last_uploaded = 0
-                    await self.__switching_client()
-                    await self.__upload_file(cap_mono, file_)
-                    if not isDeleted:
-                        values_list = list(self.__leechmsg.values())
-                        if values_list:
-                            await delete_message(values_list[0])
-                        isDeleted = True
-                    if self.__is_cancelled:
-                        return
-                    if not self.__is_corrupted and (
-                        self.__listener.isSuperGroup or config_dict["LEECH_DUMP_ID"]
-                    ):
-                        self.__msgs_dict[self.__sent_msg.link] = file_
-                    await sleep(1)
-                except Exception as err:
-                    if isinstance(err, RetryError):
-                        LOGGER.info(
-                            f"Total Attempts: {err.last_attempt.attempt_number}"
-                        )
-                    else:
-                        LOGGER.error(f"{format_exc()}. Path: {self.__up_path}")
-                    if self.__is_cancelled:
-                        return
-                    continue
-                finally:
-                    if (
-                        not self.__is_cancelled
-                        and await aiopath.exists(self.__up_path)
-                        and (
-                            not self.__listener.seed
-                            or self.__listener.newDir
-                            or dirpath.endswith("/splited_files")
-                            or "/copied/" in self.__up_path
-                        )
-                    ):
-                        await aioremove(self.__up_path)
+                yield dirpath, file_
+
+    async def __upload_serially(self, paths, o_files, m_size):
+        isDeleted = False
+        async for dirpath, file_ in paths:
+            file_ = await self.__upload_path(dirpath, file_, o_files, m_size)
+            if self.__is_cancelled:
+                return
+            if file_ is None:
+                continue
+            if not isDeleted:
+                values_list = list(self.__leechmsg.values())
+                if values_list:
+                    await delete_message(values_list[0])
+                isDeleted = True
+            if self.__listener.isSuperGroup or config_dict["LEECH_DUMP_ID"]:
+                self.__msgs_dict[self.__sent_msg.link] = file_
+            await sleep(1)
+
+    async def __finish(self, size):
+        if self.__is_cancelled:
+            return
         for key, value in list(self.__media_dict.items()):
             for subkey, msgs in list(value.items()):
-                if len(msgs) > 1:
-                    await self.__send_media_group(subkey, key, msgs)
+                await self.__flush_group(subkey, key, msgs)
+        await self.__fanout.close()
         if self.__is_cancelled:
             return
         if self.__listener.seed and not self.__listener.newDir:
@@ -475,6 +536,42 @@ class TgUploader:
             self.name,
         )
 
+    async def upload(self, o_files, m_size, size):
+        await self.__user_settings()
+        res = await self.__msg_to_reply()
+        if not res:
+            return
+        await self.__setup_fanout()
+        workers = config_dict["LEECH_UPLOAD_WORKERS"]
+        if workers and workers > 1:
+            await self.__upload_concurrently(workers, o_files, m_size)
+        else:
+            await self.__upload_serially(self.__walk_paths(), o_files, m_size)
+        await self.__finish(size)
+
+    async def stream(self, queue, release):
+        """Upload paths from queue until None; release(path) replaces deletion."""
+        self.__release = release
+        await self.__user_settings()
+        res = await self.__msg_to_reply()
+        if not res:
+            return
+        await self.__setup_fanout()
+        size = 0
+
+        async def queued_paths():
+            nonlocal size
+            while (up_path := await queue.get()) is not None:
+                if self.__is_cancelled:
+                    return
+                if not await aiopath.exists(up_path):
+                    continue
+                size += await aiopath.getsize(up_path)
+                yield ospath.split(up_path)
+
+        await self.__upload_serially(queued_paths(), [], [])
+        await self.__finish(size)
+
     @retry(
         wait=wait_exponential(multiplier=2, min=4, max=8),
         stop=stop_after_attempt(3),
@@ -549,11 +646,7 @@ class TgUploader:
                     height = 320
                 if not self.__up_path.upper().endswith(("MKV", "MP4")):
                     dirpath, file_ = self.__up_path.rsplit("/", 1)
-                    if (
-                        self.__listener.seed
-                        and not self.__listener.newDir
-                        and not dirpath.endswith("/splited_files")
-                    ):
+                    if self.__keep_source(dirpath):
                         dirpath = f"{dirpath}/copied"
                         await makedirs(dirpath, exist_ok=True)
                         new_path = ospath.join(
@@ -628,6 +721,7 @@ class TgUploader:
                     reply_markup=await self.__buttons(self.__up_path),
                 )
 
+            grouped = False
             if (
                 not self.__is_cancelled
                 and self.__media_group
@@ -638,16 +732,18 @@ class TgUploader:
                     r".+(?=\.0*\d+$)|.+(?=\.part\d+\..+)", self.__up_path
                 ):
                     pname = match.group(0)
+                    grouped = True
                     if pname in self.__media_dict[key]:
                         self.__media_dict[key][pname].append(self.__sent_msg)
                     else:
                         self.__media_dict[key][pname] = [self.__sent_msg]
                     msgs = self.__media_dict[key][pname]
-                    if len(msgs) == 10:
+                    if len(msgs) == 10 and not self.__is_worker:
                         await self.__send_media_group(pname, key, msgs)
                     else:
                         self.__last_msg_in_group = True
-            await self.__copy_file()
+            if not grouped:
+                self.__fanout.put([self.__sent_msg])
 
             if (
                 self.__thumb is None
@@ -657,7 +753,9 @@ class TgUploader:
                 await aioremove(thumb)
         except FloodWait as f:
             LOGGER.warning(str(f))
+            self.__flood_until[self.__client.name] = time() + f.value
             await sleep(f.value)
+            raise
         except Exception as err:
             if (
                 self.__thumb is None
@@ -674,15 +772,28 @@ class TgUploader:
     @property
     def speed(self):
         try:
-            return self.__processed_bytes / (time() - self.__start_time)
+            return self.processed_bytes / (time() - self.__start_time)
         except Exception:
             return 0
 
     @property
     def processed_bytes(self):
-        return self.__processed_bytes
+        return self.__processed_bytes + sum(
+            worker.processed_bytes for worker in self.__workers
+        )
+
+    def stop(self):
+        self.__is_cancelled = True
+        for worker in self.__workers:
+            worker.__is_cancelled = True
+        if self.__fanout is not None:
+            self.__fanout.cancel()
 
     async def cancel_download(self):
         self.__is_cancelled = True
+        for worker in self.__workers:
+            worker.__is_cancelled = True
+        if self.__fanout is not None:
+            self.__fanout.cancel()
         LOGGER.info(f"Cancelling Upload: {self.name}")
         await self.__listener.onUploadError("Cancelled by user!")
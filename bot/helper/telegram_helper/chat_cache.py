@@ -0,0 +1,111 @@
+from time import time
+from collections import OrderedDict
+
+from pyrogram.enums import ChatMemberStatus
+from pyrogram.errors import PeerIdInvalid, UserNotParticipant
+
+from bot import LOGGER, bot
+
+CACHE_SIZE = 4096
+CHAT_TTL = 3600
+MEMBER_TTL = 600
+PM_TTL = 86400
+NEGATIVE_TTL = 60
+MISSING = object()
+GONE = (ChatMemberStatus.LEFT, ChatMemberStatus.BANNED)
+
+
+class TTLCache:
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.__maxsize = maxsize
+        self.__entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.__entries.get(key)
+        if entry is None:
+            return MISSING
+        if entry[0] < time():
+            del self.__entries[key]
+            return MISSING
+        self.__entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key, value, ttl):
+        self.__entries[key] = (time() + ttl, value)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__maxsize:
+            self.__entries.popitem(last=False)
+
+    def pop(self, key):
+        self.__entries.pop(key, None)
+
+    def discard(self, match):
+        for key in [key for key in self.__entries if match(key)]:
+            del self.__entries[key]
+
+    def clear(self):
+        self.__entries.clear()
+
+
+class ChatCache:
+    def __init__(self):
+        self.__chats = TTLCache()
+        self.__members = TTLCache()
+        self.__pm = TTLCache()
+
+    async def get_chat(self, chat_id):
+        if (chat := self.__chats.get(chat_id)) is not MISSING:
+            return chat
+        try:
+            chat = await bot.get_chat(chat_id)
+        except PeerIdInvalid as e:
+            LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {chat_id}")
+            self.__chats.set(chat_id, None, NEGATIVE_TTL)
+            return None
+        self.__chats.set(chat_id, chat, CHAT_TTL)
+        if chat.username:
+            self.__chats.set(chat.username, chat, CHAT_TTL)
+        self.__chats.set(chat.id, chat, CHAT_TTL)
+        return chat
+
+    async def get_member(self, chat_id, user_id):
+        key = (chat_id, user_id)
+        if (member := self.__members.get(key)) is not MISSING:
+            return member
+        try:
+            member = await bot.get_chat_member(chat_id, user_id)
+        except UserNotParticipant:
+            self.__members.set(key, None, NEGATIVE_TTL)
+            return None
+        self.__members.set(key, member, MEMBER_TTL)
+        return member
+
+    def pm_reachable(self, user_id):
+        reachable = self.__pm.get(user_id)
+        return None if reachable is MISSING else reachable
+
+    def set_pm_reachable(self, user_id, reachable=True):
+        self.__pm.set(user_id, reachable, PM_TTL if reachable else NEGATIVE_TTL)
+
+    async def on_member_updated(self, _, update):
+        chat_id = update.chat.id
+        new = update.new_chat_member
+        if (member := new or update.old_chat_member) is None or not member.user:
+            return
+        if member.user.is_self:
+            self.__chats.discard(lambda key: key in (chat_id, update.chat.username))
+            self.__members.discard(lambda key: key[0] == chat_id)
+            return
+        key = (chat_id, member.user.id)
+        if new is None or new.status in GONE:
+            self.__members.set(key, None, NEGATIVE_TTL)
+        else:
+            self.__members.set(key, new, MEMBER_TTL)
+
+    def clear(self):
+        self.__chats.clear()
+        self.__members.clear()
+        self.__pm.clear()
+
+
+chat_cache = ChatCache()
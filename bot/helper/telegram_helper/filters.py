@@ -2,7 +2,7 @@ from pyrogram.enums import ChatType
 from pyrogram.filters import create
 
 from bot import OWNER_ID, user_data
-from bot.helper.telegram_helper.message_utils import chat_info
+from bot.helper.telegram_helper.chat_cache import chat_cache
 
 
 class CustomFilters:
@@ -55,7 +55,7 @@ class CustomFilters:
                 ):
                     continue
                 try:
-                    if await (await chat_info(str(channel_id))).get_member(uid):
+                    if await chat_cache.get_member(channel_id, uid):
                         isExists = True
                         break
                 except Exception:
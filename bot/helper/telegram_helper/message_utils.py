@@ -11,11 +11,9 @@ from pyrogram.errors import (
     FloodWait,
     MediaEmpty,
     MessageEmpty,
-    PeerIdInvalid,
     WebpageCurlFailed,
     MessageNotModified,
     ReplyMarkupInvalid,
-    UserNotParticipant,
     PhotoInvalidDimensions,
 )
 
@@ -32,12 +30,18 @@ from bot import (
 )
 from bot.helper.ext_utils.bot_utils import (
     SetInterval,
+    status_pages,
     sync_to_async,
     download_image_url,
     get_readable_message,
 )
 from bot.helper.ext_utils.exceptions import TgLinkError
+from bot.helper.telegram_helper.chat_cache import chat_cache
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.status_publisher import status_publisher
+from bot.helper.mirror_leech_utils.status_utils.status_snapshot import (
+    status_snapshot,
+)
 
 
 async def send_message(message, text, buttons=None, photo=None):
@@ -127,20 +131,17 @@ async def chat_info(channel_id):
         channel_id = channel_id.replace("@", "")
     else:
         return None
-    try:
-        return await bot.get_chat(channel_id)
-    except PeerIdInvalid as e:
-        LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {channel_id}")
-        return None
+    return await chat_cache.get_chat(channel_id)
 
 
 async def isAdmin(message, user_id=None):
     if message.chat.type == message.chat.type.PRIVATE:
         return None
-    if user_id:
-        member = await message.chat.get_member(user_id)
-    else:
-        member = await message.chat.get_member(message.from_user.id)
+    member = await chat_cache.get_member(
+        message.chat.id, user_id or message.from_user.id
+    )
+    if member is None:
+        return False
     return member.status in [member.status.ADMINISTRATOR, member.status.OWNER]
 
 
@@ -258,6 +259,7 @@ async def delete_all_messages():
         try:
             for key, data in list(status_reply_dict.items()):
                 del status_reply_dict[key]
+                status_pages.pop(key, None)
                 await delete_message(data[0])
         except Exception as e:
             LOGGER.error(str(e))
@@ -309,49 +311,31 @@ async def get_tg_link_content(link):
 
 
 async def update_all_messages(force=False):
-    async with status_reply_dict_lock:
-        if (
-            not status_reply_dict
-            or not Interval
-            or (not force and time() - next(iter(status_reply_dict.values()))[1] < 3)
-        ):
-            return
-        for chat_id in list(status_reply_dict.keys()):
-            status_reply_dict[chat_id][1] = time()
-    async with download_dict_lock:
-        msg, buttons = await sync_to_async(get_readable_message)
-    if msg is None:
-        return
-    async with status_reply_dict_lock:
-        for chat_id in list(status_reply_dict.keys()):
-            if (
-                status_reply_dict[chat_id]
-                and msg != status_reply_dict[chat_id][0].text
-            ):
-                rmsg = await edit_message(
-                    status_reply_dict[chat_id][0], msg, buttons
-                )
-                if isinstance(rmsg, str) and rmsg.startswith("Telegram says: [400"):
-                    del status_reply_dict[chat_id]
-                    continue
-                status_reply_dict[chat_id][0].text = msg
-                status_reply_dict[chat_id][1] = time()
+    await status_publisher.publish(force)
 
 
-async def sendStatusMessage(msg):
+async def sendStatusMessage(msg, scope=None):
+    # a personal view gets its own message so the chat's view stays as it is
+    key = msg.chat.id
+    if scope is not None and scope[0] == "user":
+        key = (msg.chat.id, scope[1])
+    status_pages[key] = {"no": 1, "scope": scope}
+    await status_snapshot.refresh()
     async with download_dict_lock:
-        progress, buttons = await sync_to_async(get_readable_message)
+        progress, buttons = await sync_to_async(get_readable_message, key)
     if progress is None:
+        async with status_reply_dict_lock:
+            if key not in status_reply_dict:
+                status_pages.pop(key, None)
         return
     async with status_reply_dict_lock:
-        chat_id = msg.chat.id
-        if chat_id in list(status_reply_dict.keys()):
-            message = status_reply_dict[chat_id][0]
+        if key in list(status_reply_dict.keys()):
+            message = status_reply_dict[key][0]
             await delete_message(message)
-            del status_reply_dict[chat_id]
+            del status_reply_dict[key]
         message = await send_message(msg, progress, buttons)
         message.text = progress
-        status_reply_dict[chat_id] = [message, time()]
+        status_reply_dict[key] = [message, time()]
         if not Interval:
             Interval.append(SetInterval(1, update_all_messages))
 
@@ -362,8 +346,8 @@ async def forcesub(message, ids, button=None):
     for channel_id in ids.split():
         chat = await chat_info(channel_id)
         try:
-            await chat.get_member(message.from_user.id)
-        except UserNotParticipant:
+            if await chat_cache.get_member(chat.id, message.from_user.id):
+                continue
             if username := chat.username:
                 invite_link = f"https://t.me/{username}"
             else:
@@ -388,15 +372,20 @@ async def user_info(client, userId):
 
 async def BotPm_check(message, button=None):
     user_id = message.from_user.id
-    try:
-        temp_msg = await message._client.send_message(
-            chat_id=message.from_user.id, text="<b>Checking Access...</b>"
-        )
-        await temp_msg.delete()
-        return None, button
-    except Exception:
+    if (reachable := chat_cache.pm_reachable(user_id)) is None:
+        try:
+            temp_msg = await message._client.send_message(
+                chat_id=message.from_user.id, text="<b>Checking Access...</b>"
+            )
+            await temp_msg.delete()
+            reachable = True
+        except Exception:
+            reachable = False
+        chat_cache.set_pm_reachable(user_id, reachable)
+    if not reachable:
         if button is None:
             button = ButtonMaker()
         _msg = "You haven't initiated the bot in a private message!"
         button.callback("Start", f"aeon {user_id} private", "header")
         return _msg, button
+    return None, button
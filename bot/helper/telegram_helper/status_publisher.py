@@ -0,0 +1,149 @@
+from time import time
+from asyncio import sleep
+
+from pyrogram.errors import FloodWait, MessageEmpty, MessageNotModified
+
+from bot import (
+    LOGGER,
+    Interval,
+    bot_loop,
+    download_dict,
+    status_reply_dict,
+    download_dict_lock,
+    status_reply_dict_lock,
+)
+from bot.helper.ext_utils.bot_utils import (
+    status_pages,
+    sync_to_async,
+    get_readable_message,
+)
+from bot.helper.mirror_leech_utils.status_utils.status_snapshot import (
+    status_snapshot,
+)
+
+STATUS_INTERVAL = 3
+TASKS_PER_STEP = 10
+MAX_BACKOFF = 8
+EDITS_PER_SECOND = 20
+
+
+class ChatState:
+    def __init__(self):
+        self.backoff = 1
+        self.flood_until = 0
+
+
+class StatusPublisher:
+    def __init__(self):
+        self.__chats = {}
+        self.__in_flight = set()
+        self.__next_slot = 0
+
+    def __interval(self, chat_id):
+        state = self.__chats.setdefault(chat_id, ChatState())
+        base = STATUS_INTERVAL + len(download_dict) // TASKS_PER_STEP
+        return base * state.backoff
+
+    def __is_due(self, chat_id, last_edit, now):
+        if chat_id in self.__in_flight:
+            return False
+        state = self.__chats.setdefault(chat_id, ChatState())
+        if now < state.flood_until:
+            return False
+        return now - last_edit >= self.__interval(chat_id)
+
+    async def __acquire(self):
+        now = time()
+        slot = max(now, self.__next_slot)
+        self.__next_slot = slot + 1 / EDITS_PER_SECOND
+        if slot > now:
+            await sleep(slot - now)
+
+    async def __render(self, chat_ids):
+        await status_snapshot.refresh()
+        async with download_dict_lock:
+            views = await sync_to_async(self.__views, chat_ids)
+        return {chat_id: view for chat_id, view in views.items() if view[0]}
+
+    @staticmethod
+    def __views(chat_ids):
+        return {chat_id: get_readable_message(chat_id) for chat_id in chat_ids}
+
+    async def publish(self, force=False):
+        async with status_reply_dict_lock:
+            if not status_reply_dict or not Interval:
+                return
+            now = time()
+            due = [
+                chat_id
+                for chat_id, data in status_reply_dict.items()
+                if (force and chat_id not in self.__in_flight)
+                or self.__is_due(chat_id, data[1], now)
+            ]
+            for chat_id in due:
+                status_reply_dict[chat_id][1] = now
+                self.__in_flight.add(chat_id)
+        if not due:
+            return
+        try:
+            views = await self.__render(due)
+        except Exception:
+            self.__in_flight.difference_update(due)
+            raise
+        for chat_id in due:
+            if chat_id in views:
+                bot_loop.create_task(self.__publish_chat(chat_id, *views[chat_id]))
+            else:
+                self.__in_flight.discard(chat_id)
+
+    async def __publish_chat(self, chat_id, text, buttons):
+        try:
+            async with status_reply_dict_lock:
+                if not (data := status_reply_dict.get(chat_id)):
+                    return
+                message = data[0]
+            if text == message.text:
+                return
+            await self.__acquire()
+            if await self.__edit(chat_id, message, text, buttons):
+                async with status_reply_dict_lock:
+                    if (data := status_reply_dict.get(chat_id)) and (
+                        data[0] is message
+                    ):
+                        message.text = text
+                        data[1] = time()
+        finally:
+            self.__in_flight.discard(chat_id)
+
+    async def __edit(self, chat_id, message, text, buttons):
+        state = self.__chats.setdefault(chat_id, ChatState())
+        try:
+            if message.media:
+                await message.edit_caption(caption=text, reply_markup=buttons)
+            else:
+                await message.edit(
+                    text=text, disable_web_page_preview=True, reply_markup=buttons
+                )
+        except FloodWait as f:
+            LOGGER.warning(f"Status message in {chat_id}: {f}")
+            state.flood_until = time() + f.value * 1.2
+            state.backoff = min(state.backoff * 2, MAX_BACKOFF)
+            return False
+        except (MessageNotModified, MessageEmpty):
+            return True
+        except Exception as e:
+            LOGGER.error(str(e))
+            if str(e).startswith("Telegram says: [400"):
+                async with status_reply_dict_lock:
+                    if (data := status_reply_dict.get(chat_id)) and (
+                        data[0] is message
+                    ):
+                        del status_reply_dict[chat_id]
+                        status_pages.pop(chat_id, None)
+                self.__chats.pop(chat_id, None)
+            return False
+        state.backoff = max(1, state.backoff / 2)
+        return True
+
+
+status_publisher = StatusPublisher()
@@ -43,6 +43,7 @@ from bot.helper.telegram_helper.message_utils import (
     send_message,
     update_all_messages,
 )
+from bot.helper.mirror_leech_utils.upload_utils.drive_service import drive_service
 
 START = 0
 STATE = "view"
@@ -56,7 +57,9 @@ default_values = {
 bool_vars = [
     "AS_DOCUMENT",
     "DELETE_LINKS",
+    "LEECH_STREAM",
     "STOP_DUPLICATE",
+    "USE_DRIVE_INDEX",
     "SET_COMMANDS",
     "SHOW_MEDIAINFO",
     "USE_SERVICE_ACCOUNTS",
@@ -208,6 +211,19 @@ async def load_config():
     QUEUE_UPLOAD = environ.get("QUEUE_UPLOAD", "")
     QUEUE_UPLOAD = "" if len(QUEUE_UPLOAD) == 0 else int(QUEUE_UPLOAD)
 
+    LEECH_UPLOAD_WORKERS = environ.get("LEECH_UPLOAD_WORKERS", "")
+    LEECH_UPLOAD_WORKERS = (
+        "" if len(LEECH_UPLOAD_WORKERS) == 0 else int(LEECH_UPLOAD_WORKERS)
+    )
+
+    DIRECT_DOWNLOAD_WORKERS = environ.get("DIRECT_DOWNLOAD_WORKERS", "")
+    DIRECT_DOWNLOAD_WORKERS = (
+        3 if len(DIRECT_DOWNLOAD_WORKERS) == 0 else int(DIRECT_DOWNLOAD_WORKERS)
+    )
+
+    LEECH_STREAM = environ.get("LEECH_STREAM", "")
+    LEECH_STREAM = LEECH_STREAM.lower() == "true"
+
     STREAMWISH_API = environ.get("STREAMWISH_API", "")
     if len(STREAMWISH_API) == 0:
         STREAMWISH_API = ""
@@ -218,6 +234,14 @@ async def load_config():
     USE_SERVICE_ACCOUNTS = environ.get("USE_SERVICE_ACCOUNTS", "")
     USE_SERVICE_ACCOUNTS = USE_SERVICE_ACCOUNTS.lower() == "true"
 
+    GDRIVE_UPLOAD_WORKERS = environ.get("GDRIVE_UPLOAD_WORKERS", "")
+    GDRIVE_UPLOAD_WORKERS = (
+        "" if len(GDRIVE_UPLOAD_WORKERS) == 0 else int(GDRIVE_UPLOAD_WORKERS)
+    )
+
+    USE_DRIVE_INDEX = environ.get("USE_DRIVE_INDEX", "")
+    USE_DRIVE_INDEX = USE_DRIVE_INDEX.lower() == "true"
+
     AS_DOCUMENT = environ.get("AS_DOCUMENT", "")
     AS_DOCUMENT = AS_DOCUMENT.lower() == "true"
 
@@ -376,6 +400,9 @@ async def load_config():
             "QUEUE_ALL": QUEUE_ALL,
             "QUEUE_DOWNLOAD": QUEUE_DOWNLOAD,
             "QUEUE_UPLOAD": QUEUE_UPLOAD,
+            "LEECH_UPLOAD_WORKERS": LEECH_UPLOAD_WORKERS,
+            "DIRECT_DOWNLOAD_WORKERS": DIRECT_DOWNLOAD_WORKERS,
+            "LEECH_STREAM": LEECH_STREAM,
             "RCLONE_FLAGS": RCLONE_FLAGS,
             "RCLONE_PATH": RCLONE_PATH,
             "SEARCH_API_LINK": SEARCH_API_LINK,
@@ -392,6 +419,8 @@ async def load_config():
             "USER_SESSION_STRING": USER_SESSION_STRING,
             "GROUPS_EMAIL": GROUPS_EMAIL,
             "USE_SERVICE_ACCOUNTS": USE_SERVICE_ACCOUNTS,
+            "GDRIVE_UPLOAD_WORKERS": GDRIVE_UPLOAD_WORKERS,
+            "USE_DRIVE_INDEX": USE_DRIVE_INDEX,
             "YT_DLP_OPTIONS": YT_DLP_OPTIONS,
         }
     )
@@ -544,6 +573,8 @@ async def update_private_file(_, message, pre_message):
             ).wait()
         elif file_name in ["buttons.txt", "buttons"]:
             extra_buttons.clear()
+        if fn in ["accounts", "token.pickle"]:
+            drive_service.clear()
         await message.delete()
     elif doc := message.document:
         file_name = doc.file_name
@@ -561,6 +592,9 @@ async def update_private_file(_, message, pre_message):
             await (
                 await create_subprocess_exec("chmod", "-R", "777", "accounts")
             ).wait()
+            drive_service.clear()
+        elif file_name == "token.pickle":
+            drive_service.clear()
         elif file_name == "list_drives.txt":
             list_drives_dict.clear()
             if GDRIVE_ID := config_dict["GDRIVE_ID"]:
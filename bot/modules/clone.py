@@ -1,4 +1,3 @@
-from json import loads
 from asyncio import sleep, gather
 from secrets import token_hex
 
@@ -8,7 +7,6 @@ from pyrogram.handlers import MessageHandler
 
 from bot import LOGGER, bot, config_dict, download_dict, download_dict_lock
 from bot.helper.ext_utils.bot_utils import (
-    cmd_exec,
     new_task,
     arg_parser,
     is_share_link,
@@ -18,7 +16,7 @@ from bot.helper.ext_utils.bot_utils import (
     is_rclone_path,
     get_telegraph_list,
 )
-from bot.helper.ext_utils.exceptions import DirectDownloadLinkError
+from bot.helper.ext_utils.exceptions import RcloneRcError, DirectDownloadLinkError
 from bot.helper.aeon_utils.nsfw_check import nsfw_precheck
 from bot.helper.aeon_utils.send_react import send_react
 from bot.helper.ext_utils.help_strings import CLONE_HELP_MESSAGE
@@ -36,6 +34,7 @@ from bot.helper.telegram_helper.message_utils import (
     sendStatusMessage,
 )
 from bot.helper.mirror_leech_utils.rclone_utils.list import RcloneList
+from bot.helper.mirror_leech_utils.rclone_utils.daemon import rclone_daemon
 from bot.helper.mirror_leech_utils.rclone_utils.transfer import RcloneTransferHelper
 from bot.helper.mirror_leech_utils.upload_utils.gdriveTools import GoogleDriveHelper
 from bot.helper.mirror_leech_utils.status_utils.gdrive_status import GdriveStatus
@@ -90,30 +89,28 @@ async def rcloneNode(client, message, link, dst_path, rcf, tag):
     remote, src_path = link.split(":", 1)
     src_path = src_path.strip("/")
 
-    cmd = [
-        "xone",
-        "lsjson",
-        "--fast-list",
-        "--stat",
-        "--no-modtime",
-        "--config",
-        config_path,
-        f"{remote}:{src_path}",
-    ]
-    res = await cmd_exec(cmd)
-    if res[2] != 0:
-        if res[2] != -9:
-            msg = f"Error: While getting RClone Stats. Path: {remote}:{src_path}. Stderr: {res[1][:4000]}"
-            await send_message(message, msg)
+    try:
+        rstat = await rclone_daemon.call(
+            config_path,
+            "operations/stat",
+            fs=f"{remote}:",
+            remote=src_path,
+            opt={"noModTime": True},
+        )
+    except RcloneRcError as e:
+        msg = f"Error: While getting RClone Stats. Path: {remote}:{src_path}. Error: {str(e)[:4000]}"
+        await send_message(message, msg)
+        return
+    if (item := rstat.get("item")) is None:
+        await send_message(message, f"Path not found: {remote}:{src_path}")
         return
-    rstat = loads(res[0])
-    if rstat["IsDir"]:
+    if item["IsDir"]:
         name = src_path.rsplit("/", 1)[-1] if src_path else remote
         dst_path += name if dst_path.endswith(":") else f"/{name}"
         mime_type = "Folder"
     else:
         name = src_path.rsplit("/", 1)[-1]
-        mime_type = rstat["MimeType"]
+        mime_type = item["MimeType"]
 
     listener = MirrorLeechListener(message, tag=tag)
     await listener.on_download_start()
@@ -132,49 +129,32 @@ async def rcloneNode(client, message, link, dst_path, rcf, tag):
     if not link:
         return
     LOGGER.info(f"Cloning Done: {name}")
-    cmd1 = [
-        "xone",
-        "lsf",
-        "--fast-list",
-        "-R",
-        "--files-only",
-        "--config",
-        config_path,
-        destination,
-    ]
-    cmd2 = [
-        "xone",
-        "lsf",
-        "--fast-list",
-        "-R",
-        "--dirs-only",
-        "--config",
-        config_path,
-        destination,
-    ]
-    cmd3 = [
-        "xone",
-        "size",
-        "--fast-list",
-        "--json",
-        "--config",
-        config_path,
-        destination,
-    ]
-    res1, res2, res3 = await gather(cmd_exec(cmd1), cmd_exec(cmd2), cmd_exec(cmd3))
-    if res1[2] != res2[2] != res3[2] != 0:
-        if res1[2] == -9:
-            return
+    try:
+        rsize, rdirs = await gather(
+            rclone_daemon.call(config_path, "operations/size", fs=destination),
+            rclone_daemon.call(
+                config_path,
+                "operations/list",
+                fs=destination,
+                remote="",
+                opt={
+                    "recurse": True,
+                    "dirsOnly": True,
+                    "noModTime": True,
+                    "noMimeType": True,
+                },
+            ),
+        )
+    except RcloneRcError as e:
         files = None
         folders = None
         size = 0
         LOGGER.error(
-            f"Error: While getting RClone Stats. Path: {destination}. Stderr: {res1[1][:4000]}"
+            f"Error: While getting RClone Stats. Path: {destination}. Error: {str(e)[:4000]}"
         )
     else:
-        files = len(res1[0].split("\n"))
-        folders = len(res2[0].split("\n"))
-        rsize = loads(res3[0])
+        files = rsize["count"]
+        folders = len(rdirs["list"])
         size = rsize["bytes"]
     await listener.onUploadComplete(
         link, size, files, folders, mime_type, name, destination
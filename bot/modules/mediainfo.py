@@ -3,7 +3,6 @@ from os import getcwd
 from re import search as re_search
 from shlex import split as ssplit
 
-import aiohttp
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath
 from aiofiles.os import mkdir
@@ -13,6 +12,7 @@ from pyrogram.handlers import MessageHandler
 
 from bot import LOGGER, bot
 from bot.helper.ext_utils.bot_utils import cmd_exec
+from bot.helper.ext_utils.http_client import http_client
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.ext_utils.telegraph_helper import telegraph
 from bot.helper.telegram_helper.bot_commands import BotCommands
@@ -34,8 +34,8 @@ async def gen_mediainfo(message, link=None, media=None, msg=None):
             headers = {
                 "user-agent": "Mozilla/5.0 (Linux; Android 12; 2201116PI) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/107.0.0.0 Mobile Safari/537.36"
             }
+            session = await http_client.session()
             async with (
-                aiohttp.ClientSession() as session,
                 session.get(link, headers=headers) as response,
                 aiopen(des_path, "wb") as f,
             ):
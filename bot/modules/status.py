@@ -9,6 +9,7 @@ from bot import (
     bot,
     download_dict,
     bot_start_time,
+    status_reply_dict,
     download_dict_lock,
     status_reply_dict_lock,
 )
@@ -32,8 +33,19 @@ from bot.helper.telegram_helper.message_utils import (
 
 @new_task
 async def mirror_status(_, message):
+    args = message.text.split()
+    scope = None
+    if len(args) > 1 and args[1] == "me":
+        scope = ("user", message.from_user.id)
+    elif len(args) > 1 and args[1] == "chat":
+        scope = ("chat", message.chat.id)
     async with download_dict_lock:
-        count = len(download_dict)
+        if scope is None:
+            count = len(download_dict)
+        elif scope[0] == "user":
+            count = download_dict.user_count(scope[1])
+        else:
+            count = download_dict.chat_count(scope[1])
 
     if count == 0:
         current_time = get_readable_time(time() - bot_start_time)
@@ -46,7 +58,7 @@ async def mirror_status(_, message):
         await delete_message(message)
         await one_minute_del(reply_message)
     else:
-        await sendStatusMessage(message)
+        await sendStatusMessage(message, scope)
         await delete_message(message)
         async with status_reply_dict_lock:
             if Interval:
@@ -62,7 +74,18 @@ async def status_pages(_, query):
     if data[1] == "ref":
         await update_all_messages(True)
     else:
-        await turn_page(data)
+        message = query.message
+        async with status_reply_dict_lock:
+            key = next(
+                (
+                    key
+                    for key, (status_msg, _) in status_reply_dict.items()
+                    if status_msg.chat.id == message.chat.id
+                    and status_msg.id == message.id
+                ),
+                message.chat.id,
+            )
+        await turn_page(data, key)
 
 
 bot.add_handler(
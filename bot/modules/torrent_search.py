@@ -2,7 +2,6 @@ import contextlib
 from html import escape
 from urllib.parse import quote
 
-from aiohttp import ClientSession
 from pyrogram.filters import regex, command
 from pyrogram.handlers import MessageHandler, CallbackQueryHandler
 
@@ -14,6 +13,7 @@ from bot.helper.ext_utils.bot_utils import (
     checking_access,
     get_readable_file_size,
 )
+from bot.helper.ext_utils.http_client import http_client
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.ext_utils.telegraph_helper import telegraph
 from bot.helper.telegram_helper.bot_commands import BotCommands
@@ -71,10 +71,8 @@ async def initiate_search_tools():
     if SEARCH_API_LINK := config_dict["SEARCH_API_LINK"]:
         global SITES  # noqa: PLW0603
         try:
-            async with (
-                ClientSession(trust_env=True) as c,
-                c.get(f"{SEARCH_API_LINK}/api/v1/sites") as res,
-            ):
+            session = await http_client.session()
+            async with session.get(f"{SEARCH_API_LINK}/api/v1/sites") as res:
                 data = await res.json()
             SITES = {
                 str(site): str(site).capitalize() for site in data["supported_sites"]
@@ -110,7 +108,8 @@ async def __search(key, site, message, method):
             else:
                 api = f"{SEARCH_API_LINK}/api/v1/recent?site={site}&limit={SEARCH_LIMIT}"
         try:
-            async with ClientSession(trust_env=True) as c, c.get(api) as res:
+            session = await http_client.session()
+            async with session.get(api) as res:
                 search_results = await res.json()
             if "error" in search_results or search_results["total"] == 0:
                 await edit_message(
@@ -5,8 +5,9 @@ from aiofiles.os import remove as aioremove
 from pyrogram.filters import regex
 from pyrogram.handlers import CallbackQueryHandler
 
-from bot import LOGGER, bot, aria2, xnox_client
+from bot import LOGGER, bot, xnox_client
 from bot.helper.ext_utils.bot_utils import sync_to_async, get_task_by_gid
+from bot.helper.ext_utils.aria2_client import aria2_client
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.message_utils import sendStatusMessage
 
@@ -79,7 +80,7 @@ async def handle_torrent_done(torrent_hash, download):
 
 
 async def handle_aria2_done(gid, download):
-    files = await sync_to_async(aria2.client.get_files, gid)
+    files = await aria2_client.call("getFiles", gid)
 
     for file in files:
         if file["selected"] == "false" and await aiopath.exists(file["path"]):
@@ -88,7 +89,7 @@ async def handle_aria2_done(gid, download):
 
     if not download.queued:
         try:
-            await sync_to_async(aria2.client.unpause, gid)
+            await aria2_client.call("unpause", gid)
         except Exception as e:
             LOGGER.error(
                 f"{e} Error in resume, this mostly happens after abuse aria2. Try to use select cmd again!"
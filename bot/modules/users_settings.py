@@ -6,7 +6,6 @@ from time import time
 from asyncio import sleep
 from functools import partial
 
-from PIL import Image
 from aiofiles.os import path as aiopath
 from aiofiles.os import mkdir
 from aiofiles.os import remove as aioremove
@@ -14,6 +13,7 @@ from pyrogram.filters import regex, create, command
 from pyrogram.handlers import MessageHandler, CallbackQueryHandler
 
 from bot import DATABASE_URL, IS_PREMIUM_USER, bot, user_data, config_dict
+from bot.helper.ext_utils.cpu_pool import convert_to_jpeg
 from bot.helper.ext_utils.bot_utils import (
     new_thread,
     sync_to_async,
@@ -343,7 +343,7 @@ async def set_thumb(_, message, pre_event, key):
         await mkdir(path)
     photo_dir = await message.download()
     des_dir = ospath.join(path, f"{user_id}.jpg")
-    await sync_to_async(Image.open(photo_dir).convert("RGB").save, des_dir, "JPEG")
+    await sync_to_async(convert_to_jpeg, photo_dir, des_dir, kind="cpu")
     await aioremove(photo_dir)
     update_user_ldata(user_id, "thumb", des_dir)
     await message.delete()
@@ -4,7 +4,6 @@ from asyncio import Event, sleep, wait_for, wrap_future
 from functools import partial
 
 from yt_dlp import YoutubeDL
-from aiohttp import ClientSession
 from aiofiles.os import path as aiopath
 from pyrogram.filters import user, regex, command
 from pyrogram.handlers import MessageHandler, CallbackQueryHandler
@@ -25,6 +24,7 @@ from bot.helper.ext_utils.bot_utils import (
 from bot.helper.ext_utils.bulk_links import extract_bulk_links
 from bot.helper.aeon_utils.nsfw_check import nsfw_precheck
 from bot.helper.aeon_utils.send_react import send_react
+from bot.helper.ext_utils.http_client import http_client
 from bot.helper.ext_utils.help_strings import YT_HELP_MESSAGE
 from bot.helper.ext_utils.task_manager import task_utils
 from bot.helper.telegram_helper.filters import CustomFilters
@@ -271,12 +271,10 @@ def extract_info(link, options):
 
 async def _mdisk(link, name):
     key = link.split("/")[-1]
-    async with (
-        ClientSession() as session,
-        session.get(
-            f"https://diskuploader.entertainvideo.com/v1/file/cdnurl?param={key}"
-        ) as resp,
-    ):
+    session = await http_client.session()
+    async with session.get(
+        f"https://diskuploader.entertainvideo.com/v1/file/cdnurl?param={key}"
+    ) as resp:
         if resp.status == 200:
             resp_json = await resp.json()
             link = resp_json["source"]
@@ -0,0 +1,115 @@
+from time import sleep
+from logging import getLogger
+from threading import Lock, Thread
+
+from qbittorrentapi import NotFound404Error
+
+LOGGER = getLogger(__name__)
+
+CHUNK_SIZE = 1000
+VERIFY_DELAY = 1
+VERIFY_RETRIES = 5
+
+
+def chunked(items, size=CHUNK_SIZE):
+    items = sorted(items)
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+class SelectionService:
+    """Applies torrent file selections as diffs and confirms them in background."""
+
+    def __init__(self, qbit, aria2):
+        self.__qbit = qbit
+        self.__aria2 = aria2
+        self.__lock = Lock()
+        self.__latest = {}
+
+    def __diff(self, hash_id, selection):
+        current = {
+            f.id: f.priority
+            for f in self.__qbit.torrents_files(torrent_hash=hash_id)
+        }
+        pause = {
+            id_
+            for id_, wanted in selection.items()
+            if not wanted and current.get(id_, 0) != 0
+        }
+        resume = {
+            id_
+            for id_, wanted in selection.items()
+            if wanted and current.get(id_) == 0
+        }
+        return pause, resume
+
+    def __set_priority(self, hash_id, file_ids, priority):
+        try:
+            self.__qbit.torrents_file_priority(
+                torrent_hash=hash_id, file_ids=file_ids, priority=priority
+            )
+        except NotFound404Error:
+            raise
+        except Exception as e:
+            LOGGER.error(f"{e} Errored in setting priority {priority}")
+
+    def __apply(self, hash_id, pause, resume):
+        for ids, priority in ((pause, 0), (resume, 1)):
+            for chunk in chunked(ids):
+                self.__set_priority(hash_id, chunk, priority)
+
+    def __is_latest(self, hash_id, token):
+        with self.__lock:
+            return self.__latest.get(hash_id) is token
+
+    def __confirm(self, hash_id, selection, token):
+        try:
+            for _ in range(VERIFY_RETRIES):
+                sleep(VERIFY_DELAY)
+                if not self.__is_latest(hash_id, token):
+                    return
+                pause, resume = self.__diff(hash_id, selection)
+                if not pause and not resume:
+                    LOGGER.info(f"Verified! Hash: {hash_id}")
+                    return
+                LOGGER.info(
+                    f"Reverification Failed! Correcting {len(pause) + len(resume)} files..."
+                )
+                self.__apply(hash_id, pause, resume)
+            LOGGER.error(f"Verification Failed! Hash: {hash_id}")
+        except NotFound404Error:
+            LOGGER.error(f"Torrent removed before verification! Hash: {hash_id}")
+        finally:
+            with self.__lock:
+                if self.__latest.get(hash_id) is token:
+                    del self.__latest[hash_id]
+
+    def set_qbit(self, hash_id, selection):
+        """selection maps file id to whether the file should be downloaded."""
+        pause, resume = self.__diff(hash_id, selection)
+        if not pause and not resume:
+            LOGGER.info(f"Nothing to change! Hash: {hash_id}")
+            return
+        self.__apply(hash_id, pause, resume)
+        token = object()
+        with self.__lock:
+            self.__latest[hash_id] = token
+        Thread(
+            target=self.__confirm, args=(hash_id, selection, token), daemon=True
+        ).start()
+
+    def set_aria2(self, gid, selected):
+        current = {
+            int(f["index"])
+            for f in self.__aria2.client.get_files(gid)
+            if f["selected"] == "true"
+        }
+        if current == selected:
+            LOGGER.info(f"Nothing to change! Gid: {gid}")
+            return
+        resume = ",".join(map(str, sorted(selected)))
+        res = self.__aria2.client.change_option(gid, {"select-file": resume})
+        if res == "OK":
+            LOGGER.info(f"Verified! Gid: {gid}")
+        else:
+            LOGGER.info(f"Verification Failed! Report! Gid: {gid}")
@@ -1,13 +1,12 @@
-from time import sleep
 from logging import INFO, FileHandler, StreamHandler, getLogger, basicConfig
 
 from flask import Flask, request
 from aria2p import API
 from aria2p import Client as ariaClient
 from qbittorrentapi import Client as qbClient
-from qbittorrentapi import NotFound404Error
 
 from web.nodes import make_tree
+from web.selection import SelectionService
 
 app = Flask(__name__)
 
@@ -29,6 +28,8 @@ basicConfig(
 
 LOGGER = getLogger(__name__)
 
+selection_service = SelectionService(xnox_client, aria2)
+
 page = """
 <html lang="en">
   <head>
@@ -662,52 +663,6 @@ section span{
 """
 
 
-def re_verfiy(paused, resumed, hash_id):
-    paused = paused.strip()
-    resumed = resumed.strip()
-    if paused:
-        paused = paused.split("|")
-    if resumed:
-        resumed = resumed.split("|")
-
-    k = 0
-    while True:
-        res = xnox_client.torrents_files(torrent_hash=hash_id)
-        verify = True
-        for i in res:
-            if str(i.id) in paused and i.priority != 0:
-                verify = False
-                break
-            if str(i.id) in resumed and i.priority == 0:
-                verify = False
-                break
-        if verify:
-            break
-        LOGGER.info("Reverification Failed! Correcting stuff...")
-        sleep(1)
-        try:
-            xnox_client.torrents_file_priority(
-                torrent_hash=hash_id, file_ids=paused, priority=0
-            )
-        except NotFound404Error as e:
-            raise NotFound404Error from e
-        except Exception as e:
-            LOGGER.error(f"{e} Errored in reverification paused!")
-        try:
-            xnox_client.torrents_file_priority(
-                torrent_hash=hash_id, file_ids=resumed, priority=1
-            )
-        except NotFound404Error as e:
-            raise NotFound404Error from e
-        except Exception as e:
-            LOGGER.error(f"{e} Errored in reverification resumed!")
-        k += 1
-        if k > 5:
-            return False
-    LOGGER.info(f"Verified! Hash: {hash_id}")
-    return True
-
-
 @app.route("/app/files/<string:id_>", methods=["GET"])
 def list_torrent_contents(id_):
     if "pin_code" not in request.args:
@@ -735,55 +690,17 @@ def list_torrent_contents(id_):
 
 @app.route("/app/files/<string:id_>", methods=["POST"])
 def set_priority(id_):
-    data = dict(request.form)
-    resume = ""
+    selection = {
+        int(key.split("_")[-1]): value == "on"
+        for key, value in request.form.items()
+        if "filenode" in key
+    }
     if len(id_) > 20:
-        pause = ""
-
-        for i, value in data.items():
-            if "filenode" in i:
-                node_no = i.split("_")[-1]
-
-                if value == "on":
-                    resume += f"{node_no}|"
-                else:
-                    pause += f"{node_no}|"
-
-        pause = pause.strip("|")
-        resume = resume.strip("|")
-
-        try:
-            xnox_client.torrents_file_priority(
-                torrent_hash=id_, file_ids=pause, priority=0
-            )
-        except NotFound404Error as e:
-            raise NotFound404Error from e
-        except Exception as e:
-            LOGGER.error(f"{e} Errored in paused")
-        try:
-            xnox_client.torrents_file_priority(
-                torrent_hash=id_, file_ids=resume, priority=1
-            )
-        except NotFound404Error as e:
-            raise NotFound404Error from e
-        except Exception as e:
-            LOGGER.error(f"{e} Errored in resumed")
-        sleep(1)
-        if not re_verfiy(pause, resume, id_):
-            LOGGER.error(f"Verification Failed! Hash: {id_}")
+        selection_service.set_qbit(id_, selection)
     else:
-        for i, value in data.items():
-            if "filenode" in i and value == "on":
-                node_no = i.split("_")[-1]
-                resume += f"{node_no},"
-
-        resume = resume.strip(",")
-
-        res = aria2.client.change_option(id_, {"select-file": resume})
-        if res == "OK":
-            LOGGER.info(f"Verified! Gid: {id_}")
-        else:
-            LOGGER.info(f"Verification Failed! Report! Gid: {id_}")
+        selection_service.set_aria2(
+            id_, {file_id for file_id, wanted in selection.items() if wanted}
+        )
     return list_torrent_contents(id_)
 
 